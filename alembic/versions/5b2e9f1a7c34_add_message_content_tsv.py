@@ -0,0 +1,71 @@
+"""add message content tsv
+
+Revision ID: 5b2e9f1a7c34
+Revises: c7e15a93d0b2
+Create Date: 2026-10-18 10:30:00.000000
+
+A generated column would rewrite the whole message table under an exclusive
+lock. The column is added empty instead, kept up to date by a trigger and
+filled in batches committed one at a time, then the index is built without
+blocking writes.
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+from sqlalchemy.dialects import postgresql
+
+# revision identifiers, used by Alembic.
+revision: str = '5b2e9f1a7c34'
+down_revision: Union[str, Sequence[str], None] = 'c7e15a93d0b2'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+BACKFILL_BATCH_SIZE = 10000
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.add_column('message', sa.Column('content_tsv', postgresql.TSVECTOR(), nullable=True))
+    op.execute("""
+        CREATE FUNCTION message_content_tsv_update() RETURNS trigger AS $$
+        BEGIN
+            NEW.content_tsv := to_tsvector('simple', NEW.content);
+            RETURN NEW;
+        END
+        $$ LANGUAGE plpgsql
+    """)
+    op.execute("""
+        CREATE TRIGGER message_content_tsv_update
+        BEFORE INSERT OR UPDATE OF content ON message
+        FOR EACH ROW EXECUTE FUNCTION message_content_tsv_update()
+    """)
+
+    with op.get_context().autocommit_block():
+        backfill = sa.text("""
+            WITH batch AS (
+                SELECT id FROM message WHERE id > :after ORDER BY id LIMIT :count
+            )
+            UPDATE message SET content_tsv = to_tsvector('simple', content)
+            FROM batch WHERE message.id = batch.id
+            RETURNING message.id
+        """)
+        after = '00000000-0000-0000-0000-000000000000'
+        while True:
+            ids = op.get_bind().execute(
+                backfill, {'after': after, 'count': BACKFILL_BATCH_SIZE}
+            ).scalars().all()
+            if not ids:
+                break
+            after = max(ids)
+
+        op.create_index('ix_message_content_tsv', 'message', ['content_tsv'], unique=False, postgresql_using='gin', postgresql_concurrently=True)
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_index('ix_message_content_tsv', table_name='message', postgresql_using='gin')
+    op.execute("DROP TRIGGER message_content_tsv_update ON message")
+    op.execute("DROP FUNCTION message_content_tsv_update()")
+    op.drop_column('message', 'content_tsv')
@@ -0,0 +1,38 @@
+"""add user trigram indexes
+
+Revision ID: c7e15a93d0b2
+Revises: 8d41b6a0c2f7
+Create Date: 2026-10-18 10:00:00.000000
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'c7e15a93d0b2'
+down_revision: Union[str, Sequence[str], None] = '8d41b6a0c2f7'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    bind = op.get_bind()
+    try:
+        with bind.begin_nested():
+            op.execute('CREATE EXTENSION IF NOT EXISTS pg_trgm')
+    except sa.exc.DBAPIError:
+        # Not installed or not allowed. User search falls back to LIKE.
+        return
+
+    op.create_index('ix_user_fullname_trgm', 'user', [sa.text('lower(fullname) gin_trgm_ops')], unique=False, postgresql_using='gin')
+    op.create_index('ix_user_username_trgm', 'user', [sa.text('lower(username) gin_trgm_ops')], unique=False, postgresql_using='gin')
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_index('ix_user_username_trgm', table_name='user', if_exists=True)
+    op.drop_index('ix_user_fullname_trgm', table_name='user', if_exists=True)
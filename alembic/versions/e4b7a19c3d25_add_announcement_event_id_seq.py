@@ -0,0 +1,28 @@
+"""add announcement event id seq
+
+Revision ID: e4b7a19c3d25
+Revises: ca1d12c225ad
+Create Date: 2026-10-18 12:10:00.000000
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'e4b7a19c3d25'
+down_revision: Union[str, Sequence[str], None] = 'ca1d12c225ad'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.execute(sa.schema.CreateSequence(sa.Sequence('announcement_event_id_seq')))
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.execute(sa.schema.DropSequence(sa.Sequence('announcement_event_id_seq')))
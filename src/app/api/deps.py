@@ -1,9 +1,11 @@
+import secrets
 from typing import Annotated, Any
 
-from fastapi import Depends, Request, Response, WebSocket
+from fastapi import Depends, Header, Request, Response, WebSocket
+from fastapi.requests import HTTPConnection
 
 from app.core.config import Config, config
-from app.db.session import async_session_factory
+from app.core.exceptions import AdminKeyError
 from app.schemas import TokenPayload, UserIDSchema
 from app.services import (
     AttachmentService,
@@ -13,7 +15,13 @@ from app.services import (
     UserAuthService,
     UserProfileService,
 )
-from app.utils.security import JWTManager, ResponseCookieManager, WebSocketCookieManager
+from app.utils.cache import PrimaryPins
+from app.utils.security import (
+    JWTManager,
+    PrimaryPinCookieManager,
+    ResponseCookieManager,
+    WebSocketCookieManager,
+)
 from app.utils.uow import AsyncUnitOfWork
 
 
@@ -24,9 +32,46 @@ def get_config() -> Config:
 ConfigDependency = Annotated[Config, Depends(get_config)]
 
 
-def get_uow(request: Request) -> AsyncUnitOfWork:
-    engine = request.app.state.engine
-    return AsyncUnitOfWork(async_session_factory=async_session_factory(engine))
+def verify_admin_key(
+    config: ConfigDependency, x_admin_key: Annotated[str, Header()] = ""
+) -> None:
+    if not config.ADMIN_API_KEY or not secrets.compare_digest(
+        x_admin_key.encode(), config.ADMIN_API_KEY.encode()
+    ):
+        raise AdminKeyError
+
+
+def get_uow(
+    connection: HTTPConnection, response: Response, config: ConfigDependency
+) -> AsyncUnitOfWork:
+    """
+    Returns the unit of work shared by every service of the request, which
+    endpoints may scope to a single session, see `AsyncUnitOfWork.scoped`.
+    """
+
+    sessionmaker = connection.app.state.sessionmaker
+    replicas = connection.app.state.replicas
+    if not replicas:
+        return AsyncUnitOfWork(async_session_factory=sessionmaker)
+
+    # Signed in users are pinned server-side, so that all of their clients
+    # see their writes, the cookie covers requests made before signing in.
+    pin = PrimaryPinCookieManager(config, connection, response)
+    tokenPayload: TokenPayload | None = connection.scope.get("tokenPayload")
+    pinned = pin.is_pinned() or (
+        tokenPayload is not None and PrimaryPins.is_pinned(tokenPayload.id)
+    )
+
+    async def after_commit() -> None:
+        pin.pin()
+        if tokenPayload:
+            await PrimaryPins.pin(tokenPayload.id)
+
+    return AsyncUnitOfWork(
+        async_session_factory=sessionmaker,
+        read_session_factory=None if pinned else replicas.session_factory,
+        after_commit=after_commit,
+    )
 
 
 UoWDependency = Annotated[AsyncUnitOfWork, Depends(get_uow)]
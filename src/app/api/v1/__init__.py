@@ -1,5 +1,6 @@
 from app.utils.router import APIRouterWithRouteProtection
 
+from .admin import admin_router
 from .attachment import attachment_router
 from .auth import auth_router
 from .chat import chat_router
@@ -12,6 +13,7 @@ __all__ = [
 ]
 
 api_v1_router = APIRouterWithRouteProtection()
+api_v1_router.include_router(admin_router)
 api_v1_router.include_router(attachment_router)
 api_v1_router.include_router(auth_router)
 api_v1_router.include_router(health_router)
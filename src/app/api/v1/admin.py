@@ -0,0 +1,50 @@
+from fastapi import Depends, Request
+
+from app.api.deps import verify_admin_key
+from app.db.session import pool_stats
+from app.schemas import AdminStatsSchema, UserIDSchema, WebSocketUserStatsSchema
+from app.utils.cache import (
+    ChatListCache,
+    ChatMembersCache,
+    PrimaryPins,
+    ReadMarkerBuffer,
+)
+from app.utils.purge import Purger
+from app.utils.router import APIRouterWithRouteProtection
+from app.utils.search import UserSearchIndex
+from app.utils.types import IDType
+from app.utils.websockets import WebSocketManager
+
+admin_router = APIRouterWithRouteProtection(
+    prefix="/admin", tags=["admin"], dependencies=[Depends(verify_admin_key)]
+)
+
+
+@admin_router.get("/stats")
+async def get_stats(request: Request) -> AdminStatsSchema:
+    replicas = request.app.state.replicas
+    return AdminStatsSchema(
+        websocket=WebSocketManager.registry_stats(),
+        reaped=WebSocketManager.reap_stats(),
+        compression=WebSocketManager.compression_stats(),
+        caches=[
+            ChatMembersCache.stats(),
+            ChatListCache.stats(),
+            UserSearchIndex.stats(),
+            PrimaryPins.stats(),
+        ],
+        read_markers=ReadMarkerBuffer.stats(),
+        database=pool_stats(request.app.state.engine),
+        replicas=replicas.stats() if replicas else [],
+        purge=Purger.stats(),
+    )
+
+
+@admin_router.get("/stats/users/{user_id}")
+async def get_user_stats(user_id: IDType) -> WebSocketUserStatsSchema:
+    user = UserIDSchema(id=user_id)
+    return WebSocketUserStatsSchema(
+        user_id=user_id,
+        clients=WebSocketManager.client_count(user),
+        connections=WebSocketManager.connection_stats(user),
+    )
@@ -1,7 +1,9 @@
 from fastapi import WebSocket
 
 from app.api.deps import (
+    ChatServiceDependency,
     ConfigDependency,
+    MessageServiceDependency,
     ResponseCookieManagerDependency,
     UserAuthServiceDependency,
     UserIDDependency,
@@ -12,11 +14,14 @@ from app.schemas import (
     UserLoginSchema,
     UserPasswordSchema,
     UserRegisterSchema,
+    WebSocketResumeSchema,
 )
 from app.utils.router import APIRouterWithRouteProtection
 from app.utils.security import JWTManager
 from app.utils.websockets import WebSocketManager
 
+from .commands import MessageCommandHandler
+
 auth_router = APIRouterWithRouteProtection(prefix="/auth", tags=["auth"])
 
 
@@ -55,6 +60,7 @@ async def delete_account(
     idSchema: UserIDDependency,
 ) -> None:
     await service.delete_account(idSchema=idSchema, passwordSchema=passwordSchema)
+    await WebSocketManager.disconnect_user(idSchema)
     cookie_manager.unset_token_cookie()
 
 
@@ -67,11 +73,27 @@ async def token() -> None:
 
 @auth_router.websocket("/ws")
 async def websocket_endpoint(
-    cookie_manager: WebSocketCookieManagerDependency, ws: WebSocket
+    cookie_manager: WebSocketCookieManagerDependency,
+    chat_service: ChatServiceDependency,
+    message_service: MessageServiceDependency,
+    ws: WebSocket,
+    stream: str | None = None,
+    last_event_id: int | None = None,
 ):
     tokenPayload = cookie_manager.validate_token_cookie()
+    user = UserIDSchema(id=tokenPayload.id)
+
+    resume = None
+    if stream is not None and last_event_id is not None:
+        resume = WebSocketResumeSchema(stream=stream, last_event_id=last_event_id)
+
     await WebSocketManager.handle_client(
-        user=UserIDSchema(id=tokenPayload.id), websocket=ws
+        user=user,
+        websocket=ws,
+        recv_callback=MessageCommandHandler(
+            user=user, chat_service=chat_service, message_service=message_service
+        ),
+        resume=resume,
     )
 
 
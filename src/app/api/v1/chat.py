@@ -1,23 +1,34 @@
 from datetime import datetime
+from typing import Annotated
+
+from fastapi import Query, Response
 
 from app.api.deps import (
     AttachmentServiceDependency,
     ChatDiscoveryServiceDependency,
     ChatServiceDependency,
+    UoWDependency,
     UserIDDependency,
 )
 from app.schemas import (
     AttachmentReadSchema,
     ChatIDSchema,
+    ChatReadMarkerSchema,
+    ChatReadSchema,
     ChatRetrieveSchema,
     ChatSchema,
     ChatSearchByType,
     ChatSearchResultSchema,
     ChatUserSchema,
+    MessageBatchCreateSchema,
+    MessageBatchSendSchema,
     MessageCreateSchema,
     MessageFetchSchema,
+    MessagePageDirection,
     MessagePutAnnouncementSchema,
     MessageReadSchema,
+    MessageSearchResultSchema,
+    MessageSearchSchema,
     MessageSendSchema,
 )
 from app.utils.router import APIRouterWithRouteProtection
@@ -27,6 +38,37 @@ from app.utils.websockets import WebSocketManager
 chat_router = APIRouterWithRouteProtection(prefix="/chat", tags=["chat"])
 
 
+@chat_router.get("/search/messages", protected=True)
+async def search_messages(
+    service: ChatServiceDependency,
+    idSchema: UserIDDependency,
+    response: Response,
+    query: Annotated[str, Query(min_length=1, max_length=200)],
+    chat_id: IDType | None = None,
+    count: Annotated[int, Query(gt=0, le=100)] | None = None,
+    cursor: str | None = None,
+) -> list[MessageSearchResultSchema]:
+    """
+    Searches messages in the chats of the user, or in the given one. The
+    query supports "quoted phrases", OR and -excluded words. Returns a page
+    of `count` results (20 by default, at most 100) and sets the cursor of
+    the next page in the X-Next-Cursor header, unless it is the last one.
+    """
+
+    page = await service.search_messages(
+        searchSchema=MessageSearchSchema(
+            user_id=idSchema.id,
+            query=query,
+            chat_id=chat_id,
+            count=count,
+            cursor=cursor,
+        )
+    )
+    if page.next_cursor:
+        response.headers["X-Next-Cursor"] = page.next_cursor
+    return page.results
+
+
 @chat_router.get(
     "/search/{by}",
     protected=True,
@@ -35,13 +77,24 @@ chat_router = APIRouterWithRouteProtection(prefix="/chat", tags=["chat"])
 async def search(
     service: ChatDiscoveryServiceDependency,
     idSchema: UserIDDependency,
+    response: Response,
     contains: str,
     by: ChatSearchByType,
-    count: int | None = None,
+    count: Annotated[int, Query(gt=0, le=100)] | None = None,
+    cursor: str | None = None,
 ) -> list[ChatSearchResultSchema]:
-    return await service.search_users(
-        contains=contains, by=by, skip_id=idSchema, count=count
+    """
+    Returns a page of `count` users (20 by default, at most 100), prefix
+    matches first. Sets the cursor of the next page in the X-Next-Cursor
+    header, unless it is the last one.
+    """
+
+    page = await service.search_users(
+        contains=contains, by=by, skip_id=idSchema, count=count, cursor=cursor
     )
+    if page.next_cursor:
+        response.headers["X-Next-Cursor"] = page.next_cursor
+    return page.results
 
 
 @chat_router.get("/new", protected=True)
@@ -56,6 +109,26 @@ async def get_or_create(
     )
 
 
+@chat_router.post("/read", protected=True)
+async def read(
+    service: ChatServiceDependency,
+    readSchema: ChatReadSchema,
+    idSchema: UserIDDependency,
+) -> None:
+    """
+    Marks the message and every earlier one in the chat read. The unread
+    counts in /user/chats follow within the read marker flush interval.
+    """
+
+    await service.mark_read(
+        markerSchema=ChatReadMarkerSchema(
+            user_id=idSchema.id,
+            chat_id=readSchema.chat_id,
+            message_id=readSchema.message_id,
+        )
+    )
+
+
 @chat_router.post("/leave", protected=True)
 async def leave(
     service: ChatServiceDependency,
@@ -73,38 +146,56 @@ async def leave(
 @chat_router.get("/messages", protected=True)
 async def get_messages(
     service: ChatServiceDependency,
+    response: Response,
     chat_id: IDType,
     since: datetime | None = None,
     until: datetime | None = None,
     count: int | None = None,
+    cursor: str | None = None,
+    direction: MessagePageDirection = "older",
 ) -> list[MessageReadSchema]:
-    return await service.get_messages(
-        messageFetchSchema=MessageFetchSchema(
-            chat_id=chat_id,
-            since=since,
-            until=until,
-            count=count,
-        )
+    """
+    Without `since` and `until`, returns a page of messages and sets the
+    cursor of the next page in the X-Next-Cursor header, unless it is the
+    last one.
+    """
+
+    messageFetchSchema = MessageFetchSchema(
+        chat_id=chat_id,
+        since=since,
+        until=until,
+        count=count,
+        cursor=cursor,
+        direction=direction,
     )
+    if not messageFetchSchema.paged:
+        return await service.get_messages(messageFetchSchema=messageFetchSchema)
+
+    page = await service.get_messages_page(messageFetchSchema=messageFetchSchema)
+    if page.next_cursor:
+        response.headers["X-Next-Cursor"] = page.next_cursor
+    return page.messages
 
 
 @chat_router.post("/send", protected=True)
 async def send(
+    uow: UoWDependency,
     service: ChatServiceDependency,
     messageSchema: MessageSendSchema,
     idSchema: UserIDDependency,
 ) -> MessageReadSchema:
-    newMessageSchema = await service.send_message(
-        messageSchema=MessageCreateSchema(
-            sender_id=idSchema.id,
-            chat_id=messageSchema.chat_id,
-            content=messageSchema.content,
-        ),
-    )
+    async with uow.scoped():
+        newMessageSchema = await service.send_message(
+            messageSchema=MessageCreateSchema(
+                sender_id=idSchema.id,
+                chat_id=messageSchema.chat_id,
+                content=messageSchema.content,
+            ),
+        )
 
-    chat_users = await service.get_users(
-        chatIDSchema=ChatIDSchema(id=messageSchema.chat_id)
-    )
+        chat_users = await service.get_users(
+            chatIDSchema=ChatIDSchema(id=messageSchema.chat_id)
+        )
 
     await WebSocketManager.announce(
         users=chat_users,
@@ -114,6 +205,42 @@ async def send(
     return newMessageSchema
 
 
+@chat_router.post("/send/batch", protected=True)
+async def send_batch(
+    uow: UoWDependency,
+    service: ChatServiceDependency,
+    batchSchema: MessageBatchSendSchema,
+    idSchema: UserIDDependency,
+) -> list[MessageReadSchema]:
+    """
+    Sends up to 100 messages to a chat in one transaction. Connected chat
+    users receive all of them in a single array frame.
+    """
+
+    async with uow.scoped():
+        newMessageSchemas = await service.send_messages(
+            batchSchema=MessageBatchCreateSchema(
+                sender_id=idSchema.id,
+                chat_id=batchSchema.chat_id,
+                messages=batchSchema.messages,
+            ),
+        )
+
+        chat_users = await service.get_users(
+            chatIDSchema=ChatIDSchema(id=batchSchema.chat_id)
+        )
+
+    await WebSocketManager.announce_many(
+        users=chat_users,
+        models=[
+            MessagePutAnnouncementSchema(message=message)
+            for message in newMessageSchemas
+        ],
+    )
+
+    return newMessageSchemas
+
+
 @chat_router.get("/attachments", protected=True)
 async def get_attachments(
     chat_id: IDType,
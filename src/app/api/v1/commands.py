@@ -0,0 +1,134 @@
+from fastapi import HTTPException, status
+from pydantic import TypeAdapter, ValidationError
+
+from app.core.logger import root_logger
+from app.schemas import (
+    ChatIDSchema,
+    CommandAckSchema,
+    CommandErrorSchema,
+    MessageCreateSchema,
+    MessageDeleteAnnouncementSchema,
+    MessageDeleteCommandSchema,
+    MessageDeleteSchema,
+    MessageEditCommandSchema,
+    MessagePutAnnouncementSchema,
+    MessageReadSchema,
+    MessageSendCommandSchema,
+    UserIDSchema,
+    WebSocketCommandSchema,
+)
+from app.services import ChatService, MessageService
+from app.utils.types import IDType
+from app.utils.websockets import WebSocketManager
+
+logger = root_logger.getChild("api.v1.commands")
+
+
+class MessageCommandHandler:
+    """
+    Runs message commands received over the websocket of a user, with the
+    same services and announcements as the HTTP message routes.
+
+    Every command is answered with an ack carrying the resulting message, or
+    an error frame with the status code the HTTP route would respond with.
+    Only the sender of a message may edit or delete it.
+    """
+
+    adapter: TypeAdapter[WebSocketCommandSchema] = TypeAdapter(WebSocketCommandSchema)
+
+    def __init__(
+        self,
+        *,
+        user: UserIDSchema,
+        chat_service: ChatService,
+        message_service: MessageService,
+    ) -> None:
+        self.user = user
+        self.chat_service = chat_service
+        self.message_service = message_service
+
+    async def __call__(self, data: object) -> CommandAckSchema | CommandErrorSchema:
+        request_id = data.get("request_id") if isinstance(data, dict) else None
+        if not isinstance(request_id, str):
+            request_id = None
+
+        try:
+            command = self.adapter.validate_python(data)
+            match command:
+                case MessageSendCommandSchema():
+                    message = await self.send(command)
+                case MessageEditCommandSchema():
+                    message = await self.edit(command)
+                case MessageDeleteCommandSchema():
+                    message = await self.delete(command)
+            return CommandAckSchema(request_id=command.request_id, message=message)
+
+        except ValidationError as e:
+            return CommandErrorSchema(
+                request_id=request_id,
+                status_code=status.HTTP_422_UNPROCESSABLE_CONTENT,
+                detail=self.format_errors(e),
+            )
+        except HTTPException as e:
+            return CommandErrorSchema(
+                request_id=request_id, status_code=e.status_code, detail=str(e.detail)
+            )
+        except Exception:
+            logger.exception(f"{self.user.id} - error running command {request_id}")
+            return CommandErrorSchema(
+                request_id=request_id,
+                status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
+                detail="Internal server error",
+            )
+
+    @staticmethod
+    def format_errors(e: ValidationError) -> str:
+        errors = []
+        for error in e.errors():
+            loc = ".".join(map(str, error["loc"]))
+            errors.append(f"{loc}: {error['msg']}" if loc else error["msg"])
+        return "; ".join(errors)
+
+    async def send(self, command: MessageSendCommandSchema) -> MessageReadSchema:
+        message = await self.chat_service.send_message(
+            messageSchema=MessageCreateSchema(
+                sender_id=self.user.id,
+                chat_id=command.message.chat_id,
+                content=command.message.content,
+            ),
+        )
+
+        await self.announce(
+            message.chat_id, MessagePutAnnouncementSchema(message=message)
+        )
+        return message
+
+    async def edit(self, command: MessageEditCommandSchema) -> MessageReadSchema:
+        result = await self.message_service.edit(
+            message_schema=command.message, sender_id=self.user.id
+        )
+
+        await WebSocketManager.announce(
+            users=[UserIDSchema(id=user_id) for user_id in result.recipients],
+            model=MessagePutAnnouncementSchema(message=result.message),
+        )
+        return result.message
+
+    async def delete(self, command: MessageDeleteCommandSchema) -> MessageDeleteSchema:
+        result = await self.message_service.delete(
+            message_schema=command.message, sender_id=self.user.id
+        )
+
+        await WebSocketManager.announce(
+            users=[UserIDSchema(id=user_id) for user_id in result.recipients],
+            model=MessageDeleteAnnouncementSchema(message=result.message),
+        )
+        return result.message
+
+    async def announce(
+        self,
+        chat_id: IDType,
+        model: MessagePutAnnouncementSchema | MessageDeleteAnnouncementSchema,
+    ) -> None:
+        users = await self.chat_service.get_users(chatIDSchema=ChatIDSchema(id=chat_id))
+        await WebSocketManager.announce(users=users, model=model)
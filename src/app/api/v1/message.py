@@ -1,21 +1,20 @@
 from app.api.deps import (
-    ChatServiceDependency,
     ConfigDependency,
     MessageServiceDependency,
     S3ClientDependency,
+    UoWDependency,
 )
 from app.schemas import (
     AttachmentCreateSchema,
     AttachmentReadSchema,
-    ChatIDSchema,
     MessageAttachmentAnnouncementSchema,
     MessageDeleteAnnouncementSchema,
     MessageDeleteSchema,
     MessageEditSchema,
     MessageIDSchema,
     MessagePutAnnouncementSchema,
-    MessageReadSchema,
     PresignedAttachmentReadSchema,
+    UserIDSchema,
 )
 from app.utils.router import APIRouterWithRouteProtection
 from app.utils.types import IDType
@@ -27,46 +26,26 @@ message_router = APIRouterWithRouteProtection(prefix="/message", tags=["message"
 @message_router.post("/edit", protected=True)
 async def edit_message(
     message_service: MessageServiceDependency,
-    chat_service: ChatServiceDependency,
     message_schema: MessageEditSchema,
 ) -> None:
-    message = await message_service.get(message_schema=message_schema)
-    await message_service.edit(message_schema=message_schema)
-
-    chat_users = await chat_service.get_users(
-        chatIDSchema=ChatIDSchema(id=message.chat_id)
-    )
+    result = await message_service.edit(message_schema=message_schema)
 
     await WebSocketManager.announce(
-        users=chat_users,
-        model=MessagePutAnnouncementSchema(
-            message=MessageReadSchema(
-                id=message.id,
-                chat_id=message.chat_id,
-                sender_id=message.sender_id,
-                content=message_schema.content,
-                timestamp=message.timestamp,
-            )
-        ),
+        users=[UserIDSchema(id=user_id) for user_id in result.recipients],
+        model=MessagePutAnnouncementSchema(message=result.message),
     )
 
 
 @message_router.post("/delete", protected=True)
 async def delete_message(
     message_service: MessageServiceDependency,
-    chat_service: ChatServiceDependency,
     message_schema: MessageDeleteSchema,
 ) -> None:
-    message = await message_service.get(message_schema=message_schema)
-    await message_service.delete(message_schema=message_schema)
-
-    chat_users = await chat_service.get_users(
-        chatIDSchema=ChatIDSchema(id=message.chat_id)
-    )
+    result = await message_service.delete(message_schema=message_schema)
 
     await WebSocketManager.announce(
-        users=chat_users,
-        model=MessageDeleteAnnouncementSchema(message=message_schema),
+        users=[UserIDSchema(id=user_id) for user_id in result.recipients],
+        model=MessageDeleteAnnouncementSchema(message=result.message),
     )
 
 
@@ -74,14 +53,16 @@ async def delete_message(
 async def add_and_presign_attachment(
     config: ConfigDependency,
     schema: AttachmentCreateSchema,
+    uow: UoWDependency,
     message_service: MessageServiceDependency,
     s3: S3ClientDependency,
 ) -> PresignedAttachmentReadSchema:
-    attachment = await message_service.add_attachment(schema=schema)
+    async with uow.scoped():
+        attachment = await message_service.add_attachment(schema=schema)
 
-    users = await message_service.get_users_for_message_in_chat(
-        message_schema=MessageIDSchema(id=schema.message_id)
-    )
+        users = await message_service.get_users_for_message_in_chat(
+            message_schema=MessageIDSchema(id=schema.message_id)
+        )
 
     url = s3.generate_presigned_url(
         ClientMethod="put_object",
@@ -1,9 +1,14 @@
+from typing import Annotated
+
+from fastapi import Query, Response
+
 from app.api.deps import (
     ChatServiceDependency,
     UserIDDependency,
     UserProfileServiceDependency,
 )
 from app.schemas import (
+    ChatInfoFetchSchema,
     ChatInfoSchema,
     UserFullNameSchema,
     UserProfileSchema,
@@ -44,5 +49,20 @@ async def edit_username(
 async def get_chat_info(
     service: ChatServiceDependency,
     idSchema: UserIDDependency,
+    response: Response,
+    count: Annotated[int, Query(gt=0, le=500)] | None = None,
+    cursor: str | None = None,
 ) -> list[ChatInfoSchema]:
-    return await service.get_chats_info(userIDSchema=idSchema)
+    """
+    Returns the chats with their latest message, most recently active first.
+    All of them unless a count or a cursor is given, then a page of `count`
+    (50 by default) with the cursor of the next page in the X-Next-Cursor
+    header, unless it is the last one.
+    """
+
+    page = await service.get_chats_info(
+        fetchSchema=ChatInfoFetchSchema(user_id=idSchema.id, count=count, cursor=cursor)
+    )
+    if page.next_cursor:
+        response.headers["X-Next-Cursor"] = page.next_cursor
+    return page.chats
@@ -2,7 +2,7 @@ import logging
 import secrets
 import warnings
 from pathlib import Path
-from typing import Self
+from typing import Literal, Self
 
 from pydantic import BaseModel, HttpUrl, model_validator
 from pydantic_settings import BaseSettings, SettingsConfigDict
@@ -16,6 +16,107 @@ class TokenConfig(BaseModel):
     WS_EXPIRES_SECONDS: int = 15
 
 
+SlowConsumerPolicy = Literal["drop_oldest", "coalesce", "disconnect"]
+
+
+class WebSocketConfig(BaseModel):
+    # "memory" only reaches clients connected to the same process,
+    # "postgres" fans out through LISTEN/NOTIFY to every worker.
+    BROKER: Literal["memory", "postgres"] = "memory"
+    BROKER_CHANNEL: str = "minichat_announcements"
+    # Users whose connections every worker closes, such as deleted accounts.
+    DISCONNECT_CHANNEL: str = "minichat_disconnects"
+
+    # Frames waiting to be written to a single connection. When the queue is
+    # full, the oldest frame is dropped, a queued frame about the same
+    # resource is replaced (coalesce), or the client is disconnected.
+    SEND_QUEUE_SIZE: int = 256
+    SLOW_CONSUMER_POLICY: SlowConsumerPolicy = "drop_oldest"
+
+    # Announcements queued within this many milliseconds are sent to a
+    # connection as one JSON array frame. Disabled with 0.
+    COALESCE_WINDOW_MS: int = 0
+
+    # permessage-deflate, applied when uvicorn runs with
+    # --ws app.utils.websockets.compression:DeflateWebSocketProtocol.
+    # Messages below MIN_SIZE bytes are sent uncompressed. Context takeover
+    # keeps a compressor per connection, which costs about
+    # 2 ** (WINDOW_BITS + 2) + 2 ** (MEM_LEVEL + 9) bytes of memory each.
+    COMPRESSION_ENABLED: bool = True
+    COMPRESSION_MIN_SIZE: int = 256
+    COMPRESSION_LEVEL: int = 6
+    COMPRESSION_CONTEXT_TAKEOVER: bool = True
+    COMPRESSION_WINDOW_BITS: int = 12
+    COMPRESSION_MEM_LEVEL: int = 5
+
+    # Every interval, connections get a ping frame, and those whose sends
+    # took longer than the send timeout are closed. Connections that sent
+    # nothing (not even a pong) within the idle timeout are closed as well,
+    # which is disabled with 0 since listen-only clients may never send.
+    # The heartbeat is disabled with an interval of 0.
+    HEARTBEAT_INTERVAL_SECONDS: float = 20
+    IDLE_TIMEOUT_SECONDS: float = 0
+    SEND_TIMEOUT_SECONDS: float = 10
+
+    # Recent announcements kept for each of the most recently announced to
+    # users, replayed to clients that reconnect with their last event id.
+    # Disabled with a buffer size of 0.
+    REPLAY_BUFFER_SIZE: int = 100
+    REPLAY_MAX_USERS: int = 10_000
+    # Last event ids whose delivery order is kept to resume from.
+    REPLAY_MAX_EVENTS: int = 100_000
+    # Event ids each worker reserves from the database sequence at a time.
+    EVENT_ID_BLOCK_SIZE: int = 1000
+
+
+class SearchConfig(BaseModel):
+    # Keeps the names of every user in memory to serve user search without
+    # the database, at about 1 KiB per user. Changes are published on the
+    # broker channel so that every worker applies them.
+    USER_INDEX_ENABLED: bool = False
+    USER_INDEX_MATCHES_SIZE: int = 1024
+    BROKER_CHANNEL: str = "minichat_search_updates"
+
+
+class CacheConfig(BaseModel):
+    # Invalidations are published on this broker channel so that every
+    # worker drops its copy of changed entries.
+    BROKER_CHANNEL: str = "minichat_cache_invalidations"
+
+    CHAT_MEMBERS_MAX_SIZE: int = 10_000
+    CHAT_MEMBERS_TTL_SECONDS: float = 300
+
+    # The first page of the chat list of up to this many users is kept, 0
+    # disables the cache. Invalidations are published to the other workers
+    # unless CHAT_LISTS_SHARED is off, which saves a broker message per
+    # message sent when running a single worker.
+    CHAT_LISTS_MAX_SIZE: int = 10_000
+    CHAT_LISTS_TTL_SECONDS: float = 60
+    CHAT_LISTS_SHARED: bool = True
+
+    # Read markers are written behind in one statement every interval, or
+    # sooner once this many chat members have pending markers.
+    READ_MARKERS_FLUSH_INTERVAL_SECONDS: float = 2
+    READ_MARKERS_MAX_PENDING: int = 1000
+
+    # Users pinned to the primary at once after they commit, when there are
+    # read replicas, see DATABASE__REPLICAS__PRIMARY_PIN_SECONDS.
+    PRIMARY_PINS_MAX_SIZE: int = 100_000
+
+
+class PurgeConfig(BaseModel):
+    # Chats with more messages are hidden from their members when left and
+    # deleted in the background, a batch of messages per transaction.
+    # Disabled with 0, chats are then always deleted right away.
+    CHAT_BACKGROUND_MIN_MESSAGES: int = 10_000
+    BATCH_SIZE: int = 1000
+    BATCH_PAUSE_SECONDS: float = 0.05
+
+    # Objects of deleted attachments removed from S3 with a single request,
+    # at most 1000.
+    S3_DELETE_BATCH_SIZE: int = 1000
+
+
 class Config(BaseSettings):
     model_config = SettingsConfigDict(
         env_file=Path(__file__).parent.parent.parent.parent / ".env",
@@ -30,6 +131,10 @@ class Config(BaseSettings):
     SECRET_KEY: str = ""
     SECRET_KEY_ALGORITHM: str = "HS256"
 
+    # Sent in the X-Admin-Key header to reach /admin routes, which are
+    # forbidden to everyone when empty.
+    ADMIN_API_KEY: str = ""
+
     SITE_URL: str
     ALLOW_ORIGINS: list[str]
     USE_SECURE_COOKIES: bool = True
@@ -41,6 +146,10 @@ class Config(BaseSettings):
     FRONTEND_URL: HttpUrl = HttpUrl("http://localhost:3000")
 
     token: TokenConfig = TokenConfig()
+    websocket: WebSocketConfig = WebSocketConfig()
+    cache: CacheConfig = CacheConfig()
+    search: SearchConfig = SearchConfig()
+    purge: PurgeConfig = PurgeConfig()
     database: PostgresDsnConfig  # Preferred db configuration
     s3: AwsS3BucketConfig
 
@@ -21,6 +21,13 @@ MessageNotFoundError = _make_not_found_error("message")
 AttachmentNotFoundError = _make_not_found_error("attachment")
 
 
+class InvalidCursorError(HTTPException):
+    def __init__(self) -> None:
+        super().__init__(
+            status_code=status.HTTP_400_BAD_REQUEST, detail="Invalid cursor"
+        )
+
+
 class UserEmailAlreadyRegistered(HTTPException):
     def __init__(self) -> None:
         super().__init__(
@@ -59,6 +66,13 @@ class PasswordVerificationError(HTTPException):
         )
 
 
+class AdminKeyError(HTTPException):
+    def __init__(self) -> None:
+        super().__init__(
+            status_code=status.HTTP_403_FORBIDDEN, detail="Invalid admin key"
+        )
+
+
 class InstantiationNotAllowedError(BaseException):
     def __init__(self, name: str) -> None:
         super().__init__(f"Cannot instantiate {name}")
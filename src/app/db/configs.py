@@ -1,8 +1,40 @@
+from typing import Any, Literal
+
 from pydantic import BaseModel, PostgresDsn, computed_field
 
 from app.interfaces.db.configs import AbstractDatabaseConfig
 
 
+class PostgresPoolConfig(BaseModel):
+    # Connections kept open, and opened on top of them under load. The
+    # websocket broker holds one of them for LISTEN while running.
+    SIZE: int = 5
+    MAX_OVERFLOW: int = 10
+    # How long a checkout waits for a connection before failing.
+    TIMEOUT_SECONDS: float = 30
+    # Connections older than this are replaced on checkout, -1 never.
+    RECYCLE_SECONDS: int = -1
+    # Tests connections on checkout, at the cost of a round trip.
+    PRE_PING: bool = False
+    # Prepared statements cached per connection by asyncpg. Set 0 behind a
+    # transaction pooling proxy such as PgBouncer.
+    STATEMENT_CACHE_SIZE: int = 100
+
+
+ReplicaStrategy = Literal["round_robin", "least_connections"]
+
+
+class PostgresReplicasConfig(BaseModel):
+    # "host" or "host:port" of read replicas of the primary server, sharing
+    # its credentials and database. Every read stays on the primary if empty.
+    SERVERS: list[str] = []
+    # How a replica is chosen for a read-only session.
+    STRATEGY: ReplicaStrategy = "round_robin"
+    # After a user or client commits, its reads stay on the primary for this
+    # long, so that it sees its own writes despite replication lag.
+    PRIMARY_PIN_SECONDS: int = 5
+
+
 class PostgresDsnConfig(AbstractDatabaseConfig):
     name = "postgres"
 
@@ -13,20 +45,47 @@ class PostgresDsnConfig(AbstractDatabaseConfig):
     POSTGRES_PASSWORD: str
     POSTGRES_DB: str
 
+    pool: PostgresPoolConfig = PostgresPoolConfig()
+    replicas: PostgresReplicasConfig = PostgresReplicasConfig()
+
     @computed_field
     @property
     def uri(self) -> str:
+        return self._build_uri(self.POSTGRES_SERVER, self.POSTGRES_PORT)
+
+    @property
+    def replica_uris(self) -> list[str]:
+        uris = []
+        for server in self.replicas.SERVERS:
+            host, _, port = server.partition(":")
+            uris.append(self._build_uri(host, int(port or self.POSTGRES_PORT)))
+        return uris
+
+    def _build_uri(self, host: str, port: int) -> str:
         return str(
             PostgresDsn.build(
                 scheme=self.POSTGRES_SCHEME,
                 username=self.POSTGRES_USER,
                 password=self.POSTGRES_PASSWORD,
-                host=self.POSTGRES_SERVER,
-                port=self.POSTGRES_PORT,
+                host=host,
+                port=port,
                 path=self.POSTGRES_DB,
             )
         )
 
+    @property
+    def engine_options(self) -> dict[str, Any]:
+        return {
+            "pool_size": self.pool.SIZE,
+            "max_overflow": self.pool.MAX_OVERFLOW,
+            "pool_timeout": self.pool.TIMEOUT_SECONDS,
+            "pool_recycle": self.pool.RECYCLE_SECONDS,
+            "pool_pre_ping": self.pool.PRE_PING,
+            "connect_args": {
+                "prepared_statement_cache_size": self.pool.STATEMENT_CACHE_SIZE
+            },
+        }
+
 
 class AwsS3BucketConfig(BaseModel):
     ENDPOINT_URL: str
@@ -1,5 +1,6 @@
 __all__ = [
     "Base",
+    "BrokerPayloadModel",
     "ChatModel",
     "ChatUserModel",
     "PrimaryKeyID",
@@ -9,12 +10,14 @@ __all__ = [
     "TimestampMixin",
     "UserModel",
     "AttachmentModel",
+    "announcement_event_id_seq",
 ]
 
 from .attachment import AttachmentModel
 from .base import Base
+from .broker_payload import BrokerPayloadModel
 from .chat import ChatModel, ChatUserModel
 from .mappings import PrimaryKeyID, Timestamp
-from .message import MessageModel
+from .message import MessageModel, announcement_event_id_seq
 from .mixins import PrimaryKeyIDMixin, TimestampMixin
 from .user import UserModel
@@ -19,7 +19,7 @@ class AttachmentModel(Base, PrimaryKeyIDMixin, TimestampMixin):
     content_type: Mapped[str] = mapped_column(String(255))
 
     message_id: Mapped[IDType] = mapped_column(
-        ForeignKey("message.id", ondelete="CASCADE")
+        ForeignKey("message.id", ondelete="CASCADE"), index=True
     )
 
     message: Mapped["MessageModel"] = relationship(
@@ -0,0 +1,14 @@
+from sqlalchemy import String, Text
+from sqlalchemy.orm import Mapped, mapped_column
+
+from .base import Base
+from .mixins import PrimaryKeyIDMixin, TimestampMixin
+
+
+class BrokerPayloadModel(Base, PrimaryKeyIDMixin, TimestampMixin):
+    # Payloads too large for NOTIFY, read by every listener and deleted once
+    # expired, see PostgresBroker.
+    __tablename__ = "broker_payload"
+
+    channel: Mapped[str] = mapped_column(String(63))
+    payload: Mapped[str] = mapped_column(Text)
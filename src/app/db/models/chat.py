@@ -1,9 +1,12 @@
-from sqlalchemy import ForeignKey
+from datetime import datetime
+
+from sqlalchemy import DateTime, ForeignKey, Index, func
 from sqlalchemy.orm import Mapped, mapped_column, relationship
 
 from app.utils.types import IDType
 
 from .base import Base
+from .mappings import Timestamp
 from .message import MessageModel
 from .mixins import PrimaryKeyIDMixin
 from .user import UserModel
@@ -12,10 +15,16 @@ from .user import UserModel
 class ChatModel(Base, PrimaryKeyIDMixin):
     __tablename__ = "chat"
 
+    # Summary for the chat list, see ChatRepository.refresh_summary. Not a
+    # foreign key, messages and chats reference each other.
+    last_message_id: Mapped[IDType | None]
+
     messages: Mapped[list["MessageModel"]] = relationship(
         "MessageModel",
         back_populates="chat",
         cascade="all, delete-orphan",
+        # Deleted by the database, see ChatService.leave_chat.
+        passive_deletes=True,
     )
 
     users: Mapped[list["UserModel"]] = relationship(
@@ -27,6 +36,16 @@ class ChatModel(Base, PrimaryKeyIDMixin):
 
 class ChatUserModel(Base):
     __tablename__ = "chat_user"
+    __table_args__ = (
+        # The primary key only serves lookups by chat, this one serves the
+        # chats of a user, most recently active first.
+        Index(
+            "ix_chat_user_user_id_last_activity_chat_id",
+            "user_id",
+            "last_activity",
+            "chat_id",
+        ),
+    )
 
     chat_id: Mapped[IDType] = mapped_column(
         ForeignKey("chat.id", ondelete="CASCADE"),
@@ -37,3 +56,14 @@ class ChatUserModel(Base):
         ForeignKey("user.id", ondelete="CASCADE"),
         primary_key=True,
     )
+
+    # Time of the latest message of the chat, or of its creation. Kept per
+    # member so that the chat list of a user is a range scan of one index.
+    last_activity: Mapped[Timestamp] = mapped_column(server_default=func.now())
+
+    # Latest message read by the member, only moved forward, see
+    # ReadMarkerBuffer. Messages of the other members after it are counted
+    # as they are sent, see ChatRepository.refresh_summary.
+    last_read_message_id: Mapped[IDType | None]
+    last_read_at: Mapped[datetime | None] = mapped_column(DateTime(timezone=True))
+    unread_count: Mapped[int] = mapped_column(default=0, server_default="0")
@@ -1,6 +1,7 @@
 from typing import TYPE_CHECKING
 
-from sqlalchemy import ForeignKey, String
+from sqlalchemy import ForeignKey, Index, Sequence, String
+from sqlalchemy.dialects.postgresql import TSVECTOR
 from sqlalchemy.orm import Mapped, mapped_column, relationship
 
 from app.utils.types import IDType
@@ -14,12 +15,28 @@ if TYPE_CHECKING:
     from . import ChatModel
 
 
+# Ids of websocket announcements, assigned once when they are published so
+# that every worker delivers them with the same id.
+announcement_event_id_seq = Sequence(
+    "announcement_event_id_seq", metadata=Base.metadata
+)
+
+
 class MessageModel(Base, PrimaryKeyIDMixin, TimestampMixin):
     __tablename__ = "message"
+    __table_args__ = (
+        # Keyset pagination of chat history, see MessageRepository.fetch_page.
+        Index("ix_message_chat_id_timestamp_id", "chat_id", "timestamp", "id"),
+        Index("ix_message_content_tsv", "content_tsv", postgresql_using="gin"),
+    )
 
     content: Mapped[str] = mapped_column(String(5000))
-    sender_id: Mapped[IDType] = mapped_column(ForeignKey("user.id"))
-    chat_id: Mapped[IDType] = mapped_column(ForeignKey("chat.id"))
+    # to_tsvector('simple', content), set by a trigger on insert and on
+    # content updates, see migration 5b2e9f1a7c34. The "simple"
+    # configuration does not stem, chats are in many languages.
+    content_tsv: Mapped[str | None] = mapped_column(TSVECTOR, deferred=True)
+    sender_id: Mapped[IDType] = mapped_column(ForeignKey("user.id"), index=True)
+    chat_id: Mapped[IDType] = mapped_column(ForeignKey("chat.id", ondelete="CASCADE"))
 
     chat: Mapped["ChatModel"] = relationship(
         "ChatModel",
@@ -36,4 +53,5 @@ class MessageModel(Base, PrimaryKeyIDMixin, TimestampMixin):
         "AttachmentModel",
         back_populates="message",
         cascade="all, delete-orphan",
+        passive_deletes=True,
     )
@@ -1,6 +1,7 @@
+from datetime import datetime
 from typing import TYPE_CHECKING
 
-from sqlalchemy import String
+from sqlalchemy import DateTime, Index, String, text
 from sqlalchemy.orm import Mapped, mapped_column, relationship
 
 from .base import Base
@@ -12,11 +13,24 @@ if TYPE_CHECKING:
 
 class UserModel(Base, PrimaryKeyIDMixin):
     __tablename__ = "user"
+    __table_args__ = (
+        # Accounts still being purged, see Purger.purge_account.
+        Index(
+            "ix_user_deleted_at",
+            "deleted_at",
+            postgresql_where=text("deleted_at IS NOT NULL"),
+        ),
+    )
+    # Lowercased fullname and username have GIN trigram indexes when pg_trgm
+    # is available, created by migrations only.
 
     email: Mapped[str] = mapped_column(unique=True)
     fullname: Mapped[str] = mapped_column(String(50))
     username: Mapped[str] = mapped_column(String(50), unique=True)
     password_hash: Mapped[str]
+    # Set when the account is deleted, the row itself is deleted in the
+    # background once the chats of the user are purged.
+    deleted_at: Mapped[datetime | None] = mapped_column(DateTime(timezone=True))
 
     chats: Mapped[list["ChatModel"]] = relationship(
         "ChatModel",
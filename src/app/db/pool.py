@@ -0,0 +1,59 @@
+import time
+
+from sqlalchemy import exc
+from sqlalchemy.pool import AsyncAdaptedQueuePool, PoolProxiedConnection
+
+from app.core.logger import root_logger
+from app.schemas import DatabasePoolStatsSchema
+
+logger = root_logger.getChild("db.pool")
+
+
+class InstrumentedAsyncPool(AsyncAdaptedQueuePool):
+    """
+    Queue pool of an async engine that records how long checkouts wait for
+    a connection, so that pool starvation shows up in the stats rather than
+    only as request latency.
+
+    The wait includes opening a new overflow connection and the pre-ping,
+    when enabled.
+    """
+
+    def __init__(self, *args, **kwargs) -> None:
+        super().__init__(*args, **kwargs)
+        self.waiting = 0
+        self.checkouts = 0
+        self.timeouts = 0
+        self.wait_seconds_total = 0.0
+        self.wait_seconds_max = 0.0
+
+    def connect(self) -> PoolProxiedConnection:
+        self.waiting += 1
+        start = time.perf_counter()
+        try:
+            return super().connect()
+        except exc.TimeoutError:
+            self.timeouts += 1
+            logger.warning(f"checkout timed out, {self.status()}")
+            raise
+        finally:
+            wait = time.perf_counter() - start
+            self.waiting -= 1
+            self.checkouts += 1
+            self.wait_seconds_total += wait
+            self.wait_seconds_max = max(self.wait_seconds_max, wait)
+
+    def stats(self) -> DatabasePoolStatsSchema:
+        return DatabasePoolStatsSchema(
+            size=self.size(),
+            checked_in=self.checkedin(),
+            checked_out=self.checkedout(),
+            # Negative while the pool has not opened all of its connections.
+            overflow=max(self.overflow(), 0),
+            max_overflow=self._max_overflow,
+            waiting=self.waiting,
+            checkouts=self.checkouts,
+            timeouts=self.timeouts,
+            wait_seconds_total=self.wait_seconds_total,
+            wait_seconds_max=self.wait_seconds_max,
+        )
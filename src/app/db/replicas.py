@@ -0,0 +1,48 @@
+import itertools
+
+from sqlalchemy.ext.asyncio import AsyncEngine, AsyncSession, async_sessionmaker
+from sqlalchemy.pool import QueuePool
+
+from app.schemas import DatabasePoolStatsSchema
+
+from .configs import ReplicaStrategy
+from .pool import InstrumentedAsyncPool
+
+
+class ReplicaEngines:
+    """
+    Engines of the read replicas of a database. Every read-only session is
+    bound to one of them, taken in turn or the one with the fewest checked
+    out connections.
+    """
+
+    def __init__(self, engines: list[AsyncEngine], strategy: ReplicaStrategy):
+        assert engines
+        self.engines = engines
+        self.strategy = strategy
+        self._turns = itertools.cycle(engines)
+        self._sessionmaker = async_sessionmaker(expire_on_commit=False)
+
+    def choose(self) -> AsyncEngine:
+        if self.strategy == "least_connections":
+            return min(self.engines, key=self._checked_out)
+        return next(self._turns)
+
+    @staticmethod
+    def _checked_out(engine: AsyncEngine) -> int:
+        pool = engine.pool
+        return pool.checkedout() if isinstance(pool, QueuePool) else 0
+
+    def session_factory(self) -> AsyncSession:
+        return self._sessionmaker(bind=self.choose())
+
+    def stats(self) -> list[DatabasePoolStatsSchema]:
+        return [
+            engine.pool.stats()
+            for engine in self.engines
+            if isinstance(engine.pool, InstrumentedAsyncPool)
+        ]
+
+    async def dispose(self) -> None:
+        for engine in self.engines:
+            await engine.dispose()
@@ -5,6 +5,7 @@ from sqlalchemy import select
 from app.db.models import AttachmentModel, MessageModel
 from app.interfaces.db.repositories import AbstractAttachmentRepository
 from app.schemas import AttachmentCreateSchema, AttachmentIDSchema, ChatIDSchema
+from app.utils.types import IDType
 
 from .base import GenericRepository
 
@@ -25,3 +26,13 @@ class AttachmentRepository(
 
         res = await self._session.execute(stmt)
         return res.scalars().all()
+
+    async def get_ids_in_chat(self, chat_schema: ChatIDSchema) -> Sequence[IDType]:
+        stmt = (
+            select(self.model_cls.id)
+            .join(self.model_cls.message)
+            .where(MessageModel.chat_id == chat_schema.id)
+        )
+
+        res = await self._session.scalars(stmt)
+        return res.all()
@@ -1,16 +1,44 @@
 from collections.abc import Sequence
+from datetime import datetime
 from typing import override
 
-from sqlalchemy import Row, select
+from sqlalchemy import (
+    Row,
+    Uuid,
+    and_,
+    case,
+    column,
+    delete,
+    exists,
+    func,
+    or_,
+    select,
+    tuple_,
+    update,
+    values,
+)
 from sqlalchemy.orm import aliased
 
-from app.db.models import ChatModel, ChatUserModel, PrimaryKeyID, UserModel
+from app.db.models import (
+    ChatModel,
+    ChatUserModel,
+    MessageModel,
+    PrimaryKeyID,
+    UserModel,
+)
 from app.db.repositories import GenericRepository
 from app.interfaces.db.repositories import (
     AbstractChatRepository,
     AbstractChatUserRepository,
 )
-from app.schemas import ChatIDSchema, ChatRetrieveSchema, ChatSchema, UserIDSchema
+from app.schemas import (
+    ChatIDSchema,
+    ChatInfoCursorSchema,
+    ChatReadMarkerSchema,
+    ChatRetrieveSchema,
+    ChatSchema,
+    UserIDSchema,
+)
 from app.utils.types import IDType
 
 
@@ -26,6 +54,71 @@ class ChatRepository(
         self._session.add(obj)
         return obj
 
+    async def refresh_summary(
+        self,
+        chatIDSchema: ChatIDSchema,
+        *,
+        if_last: IDType | None = None,
+        sender_id: IDType | None = None,
+        sent: int = 0,
+    ) -> None:
+        """
+        Points the chat at its latest message and moves the last activity of
+        its members to the time of that message, in one statement. With
+        `if_last`, only if that message was the latest one, as after deleting
+        it. The unread count of every member but `sender_id` grows by `sent`.
+        """
+
+        last = (
+            select(MessageModel.id, MessageModel.timestamp)
+            .where(MessageModel.chat_id == chatIDSchema.id)
+            .order_by(MessageModel.timestamp.desc(), MessageModel.id.desc())
+            .limit(1)
+            .cte("last")
+        )
+
+        clause = self.model_cls.id == chatIDSchema.id
+        if if_last:
+            clause = and_(clause, self.model_cls.last_message_id == if_last)
+        updated = (
+            update(self.model_cls)
+            .where(clause)
+            .values(last_message_id=select(last.c.id).scalar_subquery())
+            .returning(self.model_cls.id)
+            .cte("updated")
+        )
+
+        stmt = (
+            update(ChatUserModel)
+            .where(ChatUserModel.chat_id.in_(select(updated.c.id)))
+            .values(
+                # Kept when the chat has no messages left.
+                last_activity=func.coalesce(
+                    select(last.c.timestamp).scalar_subquery(),
+                    ChatUserModel.last_activity,
+                )
+            )
+            .execution_options(synchronize_session=False)
+        )
+        if sent:
+            stmt = stmt.values(
+                unread_count=ChatUserModel.unread_count
+                + case((ChatUserModel.user_id != sender_id, sent), else_=0)
+            )
+        await self._session.execute(stmt)
+
+    async def get_hidden_ids(self) -> Sequence[IDType]:
+        """
+        Returns the ids of chats without members, left but not yet purged.
+        """
+
+        stmt = select(self.model_cls.id).where(
+            ~exists().where(ChatUserModel.chat_id == self.model_cls.id)
+        )
+
+        result = await self._session.scalars(stmt)
+        return result.all()
+
 
 class ChatUserRepository(
     AbstractChatUserRepository,
@@ -33,25 +126,205 @@ class ChatUserRepository(
     model_cls = ChatUserModel
 
     async def get_chats_info(
-        self, idSchema: UserIDSchema
-    ) -> Sequence[Row[tuple[IDType, PrimaryKeyID, str, str]]]:
+        self,
+        idSchema: UserIDSchema,
+        *,
+        cursor: ChatInfoCursorSchema | None = None,
+        count: int | None = None,
+    ) -> Sequence[
+        Row[
+            tuple[
+                IDType,
+                datetime,
+                IDType | None,
+                int,
+                PrimaryKeyID,
+                str,
+                str,
+                MessageModel,
+            ]
+        ]
+    ]:
+        """
+        Returns up to `count` chats of the user past the cursor position, most
+        recently active first, with the read state of the user, the other
+        member and the latest message (None if there is none). Served by a
+        range scan of the `(user_id, last_activity, chat_id)` index.
+        """
+
         cu1 = aliased(self.model_cls)
         cu2 = aliased(self.model_cls)
         u2 = aliased(UserModel)
 
         stmt = (
-            select(cu1.chat_id, u2.id, u2.fullname, u2.username)
+            select(
+                cu1.chat_id,
+                cu1.last_activity,
+                cu1.last_read_message_id,
+                cu1.unread_count,
+                u2.id,
+                u2.fullname,
+                u2.username,
+                MessageModel,
+            )
             .join(cu2, cu1.chat_id == cu2.chat_id)
             .join(u2, u2.id == cu2.user_id)
+            .join(ChatModel, ChatModel.id == cu1.chat_id)
+            .outerjoin(MessageModel, MessageModel.id == ChatModel.last_message_id)
             .where(
                 cu1.user_id == idSchema.id,
                 cu2.user_id != idSchema.id,
+                u2.deleted_at.is_(None),
+            )
+            .order_by(cu1.last_activity.desc(), cu1.chat_id.desc())
+        )
+
+        if cursor:
+            stmt = stmt.where(
+                tuple_(cu1.last_activity, cu1.chat_id)
+                < tuple_(cursor.last_activity, cursor.chat_id)
+            )
+        if count:
+            stmt = stmt.limit(count)
+
+        result = await self._session.execute(stmt)
+        return result.all()
+
+    async def move_read_markers(self, markers: Sequence[ChatReadMarkerSchema]) -> int:
+        """
+        Moves the read marker of every member forward to the latest of their
+        given messages in one statement, and counts the messages of others
+        after it as unread. Markers of messages that are not in the chat, or
+        not past the current marker, are ignored. Returns the number of
+        moved markers.
+        """
+
+        given = values(
+            column("chat_id", Uuid),
+            column("user_id", Uuid),
+            column("message_id", Uuid),
+            name="given",
+        ).data([(m.chat_id, m.user_id, m.message_id) for m in markers])
+
+        latest = (
+            select(
+                given.c.chat_id,
+                given.c.user_id,
+                MessageModel.id,
+                MessageModel.timestamp,
+            )
+            .join(
+                MessageModel,
+                and_(
+                    MessageModel.id == given.c.message_id,
+                    MessageModel.chat_id == given.c.chat_id,
+                ),
+            )
+            .distinct(given.c.chat_id, given.c.user_id)
+            .order_by(
+                given.c.chat_id,
+                given.c.user_id,
+                MessageModel.timestamp.desc(),
+                MessageModel.id.desc(),
+            )
+            .subquery("latest")
+        )
+
+        after = aliased(MessageModel)
+        unread = (
+            select(func.count())
+            .where(
+                after.chat_id == self.model_cls.chat_id,
+                after.sender_id != self.model_cls.user_id,
+                tuple_(after.timestamp, after.id)
+                > tuple_(latest.c.timestamp, latest.c.id),
             )
+            .scalar_subquery()
+        )
+
+        stmt = (
+            update(self.model_cls)
+            .where(
+                self.model_cls.chat_id == latest.c.chat_id,
+                self.model_cls.user_id == latest.c.user_id,
+                or_(
+                    self.model_cls.last_read_at.is_(None),
+                    tuple_(latest.c.timestamp, latest.c.id)
+                    > tuple_(
+                        self.model_cls.last_read_at,
+                        self.model_cls.last_read_message_id,
+                    ),
+                ),
+            )
+            .values(
+                last_read_message_id=latest.c.id,
+                last_read_at=latest.c.timestamp,
+                unread_count=unread,
+            )
+            .execution_options(synchronize_session=False)
         )
 
         result = await self._session.execute(stmt)
+        return result.rowcount
+
+    async def unread_deleted(self, chatIDSchema: ChatIDSchema, *, message: Row) -> None:
+        """
+        Uncounts a deleted message for the members who had not read it.
+        """
+
+        stmt = (
+            update(self.model_cls)
+            .where(
+                self.model_cls.chat_id == chatIDSchema.id,
+                self.model_cls.user_id != message.sender_id,
+                or_(
+                    self.model_cls.last_read_at.is_(None),
+                    tuple_(message.timestamp, message.id)
+                    > tuple_(
+                        self.model_cls.last_read_at,
+                        self.model_cls.last_read_message_id,
+                    ),
+                ),
+            )
+            .values(unread_count=func.greatest(self.model_cls.unread_count - 1, 0))
+            .execution_options(synchronize_session=False)
+        )
+        await self._session.execute(stmt)
+
+    async def get_user_ids(self, chatIDSchema: ChatIDSchema) -> Sequence[IDType]:
+        stmt = select(self.model_cls.user_id).where(
+            self.model_cls.chat_id == chatIDSchema.id
+        )
+
+        result = await self._session.scalars(stmt)
         return result.all()
 
+    async def delete_members(self, chatIDSchema: ChatIDSchema) -> None:
+        stmt = delete(self.model_cls).where(self.model_cls.chat_id == chatIDSchema.id)
+        await self._session.execute(stmt)
+
+    async def hide_user_chats(
+        self, idSchema: UserIDSchema, count: int | None = None
+    ) -> Sequence[IDType]:
+        """
+        Deletes every member of up to `count` chats of the user, or of all of
+        them, hiding them from both users. Returns the ids of the hidden chats.
+        """
+
+        chat_ids = (
+            select(self.model_cls.chat_id)
+            .where(self.model_cls.user_id == idSchema.id)
+            .limit(count)
+        )
+        stmt = (
+            delete(self.model_cls)
+            .where(self.model_cls.chat_id.in_(chat_ids))
+            .returning(self.model_cls.chat_id)
+        )
+
+        result = await self._session.scalars(stmt)
+        return list(set(result.all()))
+
     async def get_chat(
         self, userIdSchema: UserIDSchema, retrieveSchema: ChatRetrieveSchema
     ) -> ChatUserModel | None:
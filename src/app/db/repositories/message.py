@@ -1,17 +1,43 @@
+import uuid
 from collections.abc import Sequence
-from datetime import datetime
+from datetime import datetime, timedelta
 
-from sqlalchemy import ColumnElement, and_, select
+from sqlalchemy import (
+    ColumnElement,
+    Delete,
+    Float,
+    Row,
+    Update,
+    and_,
+    delete,
+    func,
+    insert,
+    select,
+    text,
+    tuple_,
+    update,
+)
 from sqlalchemy.sql.elements import BinaryExpression
 
-from app.db.models import MessageModel
+from app.db.models import (
+    AttachmentModel,
+    ChatUserModel,
+    MessageModel,
+    announcement_event_id_seq,
+)
 from app.db.repositories import GenericRepository
 from app.interfaces.db.repositories import AbstractMessageRepository
 from app.schemas import (
     ChatIDSchema,
     MessageCreateSchema,
+    MessageCursorSchema,
+    MessageEditSchema,
     MessageIDSchema,
+    MessagePageDirection,
+    MessageSearchCursorSchema,
+    UserIDSchema,
 )
+from app.utils.types import IDType
 
 
 class MessageRepository(
@@ -19,6 +45,141 @@ class MessageRepository(
     GenericRepository[MessageModel, MessageIDSchema, MessageCreateSchema],
     model=MessageModel,
 ):
+    # Control characters marking matches in search snippets.
+    HIGHLIGHT_START = "\x02"
+    HIGHLIGHT_STOP = "\x03"
+
+    async def add_many(
+        self, entities: Sequence[MessageCreateSchema]
+    ) -> Sequence[MessageModel]:
+        """
+        Inserts the messages in a single multi-row INSERT and returns them in
+        order. Timestamps are one microsecond apart from the transaction
+        time, so that the messages keep their order in the chat history.
+        """
+
+        now = func.now()
+        stmt = (
+            insert(self.model_cls)
+            .values(
+                [
+                    entity.model_dump()
+                    | {"id": uuid.uuid4(), "timestamp": now + timedelta(microseconds=i)}
+                    for i, entity in enumerate(entities)
+                ]
+            )
+            .returning(self.model_cls)
+        )
+
+        result = await self._session.execute(stmt)
+        return sorted(result.scalars().all(), key=lambda message: message.timestamp)
+
+    async def edit_returning(
+        self, *, message_schema: MessageEditSchema, sender_id: IDType | None = None
+    ) -> Sequence[Row]:
+        """
+        Updates the content of the message, if sent by `sender_id` when
+        given. See `returning_with_members` for the result.
+        """
+
+        stmt = (
+            update(self.model_cls)
+            .where(self.mutable_clause(message_schema, sender_id))
+            .values(content=message_schema.content)
+        )
+        return await self.returning_with_members(stmt)
+
+    async def delete_returning(
+        self, *, message_schema: MessageIDSchema, sender_id: IDType | None = None
+    ) -> Sequence[Row]:
+        """
+        Deletes the message, if sent by `sender_id` when given, along with its
+        attachments. See `returning_with_members` for the result.
+        """
+
+        stmt = delete(self.model_cls).where(
+            self.mutable_clause(message_schema, sender_id)
+        )
+        return await self.returning_with_members(stmt)
+
+    def mutable_clause(
+        self, message_schema: MessageIDSchema, sender_id: IDType | None
+    ) -> ColumnElement[bool]:
+        clause = self.model_cls.id == message_schema.id
+        if sender_id:
+            clause = and_(clause, self.model_cls.sender_id == sender_id)
+        return clause
+
+    async def returning_with_members(self, stmt: Update | Delete) -> Sequence[Row]:
+        """
+        Runs the statement in a CTE joined with the members of the chat of
+        the changed message, in a single round trip. Returns one row of the
+        message columns and a member `user_id` per member (None if there are
+        none), or no rows if no message matched.
+        """
+
+        changed = stmt.returning(
+            self.model_cls.id,
+            self.model_cls.chat_id,
+            self.model_cls.sender_id,
+            self.model_cls.content,
+            self.model_cls.timestamp,
+        ).cte("changed")
+
+        result = await self._session.execute(
+            select(changed, ChatUserModel.user_id).outerjoin(
+                ChatUserModel, ChatUserModel.chat_id == changed.c.chat_id
+            )
+        )
+        return result.all()
+
+    async def count_in_chat(self, *, chat_id_schema: ChatIDSchema, limit: int) -> int:
+        """
+        Counts the messages of the chat, up to `limit`.
+        """
+
+        limited = (
+            select(self.model_cls.id)
+            .where(self.model_cls.chat_id == chat_id_schema.id)
+            .limit(limit)
+            .subquery()
+        )
+
+        result = await self._session.scalar(select(func.count()).select_from(limited))
+        return result or 0
+
+    async def delete_batch(
+        self, *, chat_id_schema: ChatIDSchema, count: int
+    ) -> Sequence[Row[tuple[IDType, IDType | None]]]:
+        """
+        Deletes up to `count` messages of the chat along with their
+        attachments, skipping messages locked by another transaction. Returns
+        a row of the message id and an attachment id (None if there are
+        none) per attachment of every deleted message.
+        """
+
+        batch = (
+            select(self.model_cls.id)
+            .where(self.model_cls.chat_id == chat_id_schema.id)
+            .limit(count)
+            .with_for_update(skip_locked=True)
+            .cte("batch")
+        )
+        deleted = (
+            delete(self.model_cls)
+            .where(self.model_cls.id.in_(select(batch.c.id)))
+            .returning(self.model_cls.id)
+            .cte("deleted")
+        )
+
+        # Every CTE sees the attachments as they were before the cascade.
+        result = await self._session.execute(
+            select(deleted.c.id, AttachmentModel.id).outerjoin(
+                AttachmentModel, AttachmentModel.message_id == deleted.c.id
+            )
+        )
+        return result.all()
+
     async def fetch_messages(
         self,
         *,
@@ -44,12 +205,139 @@ class MessageRepository(
         )
 
         if since:
-            stmt = stmt.order_by(self.model_cls.timestamp.asc())
+            stmt = stmt.order_by(
+                self.model_cls.timestamp.asc(), self.model_cls.id.asc()
+            )
         else:
-            stmt = stmt.order_by(self.model_cls.timestamp.desc())
+            stmt = stmt.order_by(
+                self.model_cls.timestamp.desc(), self.model_cls.id.desc()
+            )
 
         if count:
             stmt = stmt.limit(count)
 
         result = await self._session.execute(stmt)
         return result.scalars().all()
+
+    async def fetch_page(
+        self,
+        *,
+        chat_id_schema: ChatIDSchema,
+        cursor: MessageCursorSchema | None,
+        direction: MessagePageDirection,
+        count: int,
+    ) -> Sequence[MessageModel]:
+        """
+        Returns up to `count` messages past the cursor position, ordered by
+        `(timestamp, id)` away from it. Served by a range scan of the
+        `(chat_id, timestamp, id)` index however deep the cursor is.
+        """
+
+        key = tuple_(self.model_cls.timestamp, self.model_cls.id)
+        stmt = select(self.model_cls).where(self.model_cls.chat_id == chat_id_schema.id)
+
+        if direction == "older":
+            if cursor:
+                stmt = stmt.where(key < tuple_(cursor.timestamp, cursor.id))
+            stmt = stmt.order_by(
+                self.model_cls.timestamp.desc(), self.model_cls.id.desc()
+            )
+        else:
+            if cursor:
+                stmt = stmt.where(key > tuple_(cursor.timestamp, cursor.id))
+            stmt = stmt.order_by(
+                self.model_cls.timestamp.asc(), self.model_cls.id.asc()
+            )
+
+        result = await self._session.execute(stmt.limit(count))
+        return result.scalars().all()
+
+    async def search(
+        self,
+        *,
+        user_id_schema: UserIDSchema,
+        query: str,
+        chat_id_schema: ChatIDSchema | None,
+        cursor: MessageSearchCursorSchema | None,
+        count: int,
+    ) -> Sequence[Row[tuple[MessageModel, float, str]]]:
+        """
+        Returns up to `count` messages in the chats of the user (or in one of
+        them) matching a web search style query, past the cursor position.
+        Ordered by rank, then the most recent first. Matching is served by
+        the GIN index on `content_tsv`.
+        """
+
+        tsquery = func.websearch_to_tsquery("simple", query)
+        rank = func.ts_rank(self.model_cls.content_tsv, tsquery, type_=Float)
+
+        # Matches are marked with characters stripped from the content first,
+        # and turned into tags once the rest of the snippet is escaped.
+        start, stop = self.HIGHLIGHT_START, self.HIGHLIGHT_STOP
+        snippet = func.ts_headline(
+            "simple",
+            func.translate(self.model_cls.content, start + stop, ""),
+            tsquery,
+            f"StartSel={start}, StopSel={stop}, MaxFragments=2, MaxWords=20,"
+            " MinWords=5",
+        )
+        for char, replacement in (
+            ("&", "&amp;"),
+            ("<", "&lt;"),
+            (">", "&gt;"),
+            ('"', "&quot;"),
+            ("'", "&#x27;"),
+            (start, "<b>"),
+            (stop, "</b>"),
+        ):
+            snippet = func.replace(snippet, char, replacement)
+
+        stmt = (
+            select(self.model_cls, rank.label("rank"), snippet.label("snippet"))
+            .join(
+                ChatUserModel,
+                and_(
+                    ChatUserModel.chat_id == self.model_cls.chat_id,
+                    ChatUserModel.user_id == user_id_schema.id,
+                ),
+            )
+            .where(self.model_cls.content_tsv.bool_op("@@")(tsquery))
+        )
+
+        if chat_id_schema:
+            stmt = stmt.where(self.model_cls.chat_id == chat_id_schema.id)
+
+        if cursor:
+            stmt = stmt.where(
+                tuple_(rank, self.model_cls.timestamp, self.model_cls.id)
+                < tuple_(cursor.rank, cursor.timestamp, cursor.id)
+            )
+
+        stmt = stmt.order_by(
+            rank.desc(), self.model_cls.timestamp.desc(), self.model_cls.id.desc()
+        ).limit(count)
+
+        result = await self._session.execute(stmt)
+        return result.all()
+
+    async def next_event_ids(self, count: int) -> list[int]:
+        """
+        Returns `count` new ids of websocket announcements, in order.
+        """
+
+        stmt = select(announcement_event_id_seq.next_value()).select_from(
+            func.generate_series(1, count)
+        )
+        result = await self._session.scalars(stmt)
+        return sorted(result.all())
+
+    async def get_event_stream(self) -> str:
+        """
+        Returns the stream of announcement ids, which changes only when their
+        sequence is recreated.
+        """
+
+        name = announcement_event_id_seq.name
+        stmt = text(f"SELECT '{name}'::regclass::oid")
+        oid = await self._session.scalar(stmt)
+        return f"{oid:x}"
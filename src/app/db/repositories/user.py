@@ -1,10 +1,17 @@
+from collections.abc import Sequence
+
+from sqlalchemy import Float, Row, func, literal, not_, or_, select, text, tuple_
+
 from app.db.models import UserModel
 from app.db.repositories import GenericRepository
 from app.interfaces.db.repositories import AbstractUserRepository
 from app.schemas import (
+    ChatSearchByType,
+    ChatSearchCursorSchema,
     UserCreateSchema,
     UserIDSchema,
 )
+from app.utils.types import IDType
 
 
 class UserRepository(
@@ -12,4 +19,87 @@ class UserRepository(
     GenericRepository[UserModel, UserIDSchema, UserCreateSchema],
     model=UserModel,
 ):
-    pass
+    # Whether the database has pg_trgm, checked once per process.
+    trigram: bool | None = None
+
+    async def has_trigram(self) -> bool:
+        if UserRepository.trigram is None:
+            UserRepository.trigram = bool(
+                await self._session.scalar(
+                    text(
+                        "SELECT EXISTS"
+                        " (SELECT 1 FROM pg_extension WHERE extname = 'pg_trgm')"
+                    )
+                )
+            )
+        return UserRepository.trigram
+
+    async def get_names(self) -> Sequence[Row[tuple[IDType, str, str]]]:
+        stmt = select(
+            self.model_cls.id, self.model_cls.fullname, self.model_cls.username
+        ).where(self.model_cls.deleted_at.is_(None))
+        result = await self._session.execute(stmt)
+        return result.all()
+
+    async def get_deleted_ids(self) -> Sequence[IDType]:
+        stmt = select(self.model_cls.id).where(self.model_cls.deleted_at.isnot(None))
+        result = await self._session.scalars(stmt)
+        return result.all()
+
+    async def search(
+        self,
+        *,
+        by: ChatSearchByType,
+        contains: str,
+        skip_id: UserIDSchema,
+        cursor: ChatSearchCursorSchema | None,
+        count: int,
+    ) -> Sequence[Row[tuple[IDType, str, str, bool, float, str]]]:
+        """
+        Returns up to `count` users whose `by` column contains the given
+        string, or with pg_trgm is similar to it, past the cursor position.
+
+        Prefix matches come first, then the most similar ones, then the rest
+        in alphabetical order. With pg_trgm, matching is served by the GIN
+        trigram indexes on the lowercased columns. Without it, every result
+        has a score of 0 and matching scans the table.
+        """
+
+        model = self.model_cls
+        column = model.fullname if by.value == "fullname" else model.username
+        term = contains.lower()
+
+        value = func.lower(column)
+        if by.value == "username":
+            # Usernames always start with "@", match the name after it.
+            prefix = value.startswith("@" + term.removeprefix("@"), autoescape=True)
+        else:
+            prefix = value.startswith(term, autoescape=True)
+        match = value.contains(term, autoescape=True)
+
+        if await self.has_trigram():
+            score = func.similarity(value, term)
+            match = or_(match, value.op("%")(term))
+        else:
+            score = literal(0.0, Float)
+
+        # Ascending sort key, so that pages continue with a row comparison.
+        key = (not_(prefix), -score, value, model.id)
+
+        stmt = select(
+            model.id,
+            model.fullname,
+            model.username,
+            prefix.label("prefix"),
+            score.label("score"),
+            value.label("value"),
+        ).where(match, model.id != skip_id.id, model.deleted_at.is_(None))
+
+        if cursor:
+            stmt = stmt.where(
+                tuple_(*key)
+                > tuple_(not cursor.prefix, -cursor.score, cursor.value, cursor.id)
+            )
+
+        result = await self._session.execute(stmt.order_by(*key).limit(count))
+        return result.all()
@@ -2,9 +2,47 @@ from sqlalchemy.ext.asyncio import (
     AsyncEngine,
     AsyncSession,
     async_sessionmaker,
+    create_async_engine,
 )
 
+from app.db.configs import PostgresDsnConfig
 from app.db.models import Base
+from app.db.pool import InstrumentedAsyncPool
+from app.db.replicas import ReplicaEngines
+from app.interfaces.db.configs import AbstractDatabaseConfig
+from app.schemas import DatabasePoolStatsSchema
+
+
+def create_engine(
+    database: AbstractDatabaseConfig, uri: str | None = None
+) -> AsyncEngine:
+    return create_async_engine(
+        uri or database.uri,
+        poolclass=InstrumentedAsyncPool,
+        **database.engine_options,
+    )
+
+
+def create_replica_engines(database: PostgresDsnConfig) -> ReplicaEngines | None:
+    """
+    Returns engines of the configured read replicas, None if there are none.
+    """
+
+    uris = database.replica_uris
+    if not uris:
+        return None
+
+    return ReplicaEngines(
+        [create_engine(database, uri) for uri in uris],
+        database.replicas.STRATEGY,
+    )
+
+
+def pool_stats(engine: AsyncEngine) -> DatabasePoolStatsSchema | None:
+    pool = engine.pool
+    if isinstance(pool, InstrumentedAsyncPool):
+        return pool.stats()
+    return None
 
 
 def async_session_factory(engine: AsyncEngine) -> async_sessionmaker[AsyncSession]:
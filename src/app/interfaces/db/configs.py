@@ -1,5 +1,5 @@
 from abc import ABC, abstractmethod
-from typing import ClassVar
+from typing import Any, ClassVar
 
 from pydantic import BaseModel
 
@@ -14,3 +14,20 @@ class AbstractDatabaseConfig(ABC, BaseModel):
         Returns the connection URI for this database configuration.
         """
         ...
+
+    @property
+    @abstractmethod
+    def replica_uris(self) -> list[str]:
+        """
+        Returns the connection URIs of the read replicas of this database.
+        """
+        ...
+
+    @property
+    @abstractmethod
+    def engine_options(self) -> dict[str, Any]:
+        """
+        Returns keyword arguments for the engine of this database
+        configuration, such as connection pool settings.
+        """
+        ...
@@ -7,6 +7,7 @@ from app.schemas import (
     AttachmentIDSchema,
     ChatIDSchema,
 )
+from app.utils.types import IDType
 
 from .base import AbstractGenericRepository
 
@@ -20,3 +21,6 @@ class AbstractAttachmentRepository(
     async def get_all_in_chat(
         self, chat_schema: ChatIDSchema
     ) -> Sequence[AttachmentModel]: ...
+
+    @abstractmethod
+    async def get_ids_in_chat(self, chat_schema: ChatIDSchema) -> Sequence[IDType]: ...
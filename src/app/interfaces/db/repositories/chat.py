@@ -1,13 +1,21 @@
 from abc import ABC, abstractmethod
 from collections.abc import Sequence
+from datetime import datetime
 from typing import override
 
 from sqlalchemy import Row
 from sqlalchemy.ext.asyncio import AsyncSession
 
-from app.db.models import ChatModel, ChatUserModel
+from app.db.models import ChatModel, ChatUserModel, MessageModel
 from app.db.models.mappings import PrimaryKeyID
-from app.schemas import ChatIDSchema, ChatRetrieveSchema, ChatSchema, UserIDSchema
+from app.schemas import (
+    ChatIDSchema,
+    ChatInfoCursorSchema,
+    ChatReadMarkerSchema,
+    ChatRetrieveSchema,
+    ChatSchema,
+    UserIDSchema,
+)
 from app.utils.types import IDType
 
 from .base import AbstractGenericRepository
@@ -20,6 +28,14 @@ class AbstractChatRepository(
     @abstractmethod
     async def add_one(self, entity: ChatSchema | None = None) -> ChatModel: ...
 
+    @abstractmethod
+    async def refresh_summary(
+        self, chatIDSchema: ChatIDSchema, *, if_last: IDType | None = None
+    ) -> None: ...
+
+    @abstractmethod
+    async def get_hidden_ids(self) -> Sequence[IDType]: ...
+
 
 class AbstractChatUserRepository(ABC):
     def __init__(self, session: AsyncSession) -> None:
@@ -27,8 +43,46 @@ class AbstractChatUserRepository(ABC):
 
     @abstractmethod
     async def get_chats_info(
-        self, idSchema: UserIDSchema
-    ) -> Sequence[Row[tuple[IDType, PrimaryKeyID, str, str]]]: ...
+        self,
+        idSchema: UserIDSchema,
+        *,
+        cursor: ChatInfoCursorSchema | None = None,
+        count: int | None = None,
+    ) -> Sequence[
+        Row[
+            tuple[
+                IDType,
+                datetime,
+                IDType | None,
+                int,
+                PrimaryKeyID,
+                str,
+                str,
+                MessageModel,
+            ]
+        ]
+    ]: ...
+
+    @abstractmethod
+    async def move_read_markers(
+        self, markers: Sequence[ChatReadMarkerSchema]
+    ) -> int: ...
+
+    @abstractmethod
+    async def unread_deleted(
+        self, chatIDSchema: ChatIDSchema, *, message: Row
+    ) -> None: ...
+
+    @abstractmethod
+    async def get_user_ids(self, chatIDSchema: ChatIDSchema) -> Sequence[IDType]: ...
+
+    @abstractmethod
+    async def delete_members(self, chatIDSchema: ChatIDSchema) -> None: ...
+
+    @abstractmethod
+    async def hide_user_chats(
+        self, idSchema: UserIDSchema, count: int | None = None
+    ) -> Sequence[IDType]: ...
 
     @abstractmethod
     async def get_chat(
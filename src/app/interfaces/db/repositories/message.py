@@ -2,12 +2,20 @@ from abc import abstractmethod
 from collections.abc import Sequence
 from datetime import datetime
 
+from sqlalchemy import Row
+
 from app.db.models import MessageModel
 from app.schemas import (
     ChatIDSchema,
     MessageCreateSchema,
+    MessageCursorSchema,
+    MessageEditSchema,
     MessageIDSchema,
+    MessagePageDirection,
+    MessageSearchCursorSchema,
+    UserIDSchema,
 )
+from app.utils.types import IDType
 
 from .base import AbstractGenericRepository
 
@@ -15,6 +23,31 @@ from .base import AbstractGenericRepository
 class AbstractMessageRepository(
     AbstractGenericRepository[MessageModel, MessageIDSchema, MessageCreateSchema]
 ):
+    @abstractmethod
+    async def add_many(
+        self, entities: Sequence[MessageCreateSchema]
+    ) -> Sequence[MessageModel]: ...
+
+    @abstractmethod
+    async def edit_returning(
+        self, *, message_schema: MessageEditSchema, sender_id: IDType | None = None
+    ) -> Sequence[Row]: ...
+
+    @abstractmethod
+    async def delete_returning(
+        self, *, message_schema: MessageIDSchema, sender_id: IDType | None = None
+    ) -> Sequence[Row]: ...
+
+    @abstractmethod
+    async def count_in_chat(
+        self, *, chat_id_schema: ChatIDSchema, limit: int
+    ) -> int: ...
+
+    @abstractmethod
+    async def delete_batch(
+        self, *, chat_id_schema: ChatIDSchema, count: int
+    ) -> Sequence[Row[tuple[IDType, IDType | None]]]: ...
+
     @abstractmethod
     async def fetch_messages(
         self,
@@ -24,3 +57,30 @@ class AbstractMessageRepository(
         until: datetime | None = None,
         count: int | None = None,
     ) -> Sequence[MessageModel]: ...
+
+    @abstractmethod
+    async def fetch_page(
+        self,
+        *,
+        chat_id_schema: ChatIDSchema,
+        cursor: MessageCursorSchema | None,
+        direction: MessagePageDirection,
+        count: int,
+    ) -> Sequence[MessageModel]: ...
+
+    @abstractmethod
+    async def search(
+        self,
+        *,
+        user_id_schema: UserIDSchema,
+        query: str,
+        chat_id_schema: ChatIDSchema | None,
+        cursor: MessageSearchCursorSchema | None,
+        count: int,
+    ) -> Sequence[Row[tuple[MessageModel, float, str]]]: ...
+
+    @abstractmethod
+    async def next_event_ids(self, count: int) -> list[int]: ...
+
+    @abstractmethod
+    async def get_event_stream(self) -> str: ...
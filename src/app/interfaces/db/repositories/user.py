@@ -1,8 +1,15 @@
+from abc import abstractmethod
+from collections.abc import Sequence
+
+from sqlalchemy import Row
+
 from app.db.models.user import UserModel
+from app.schemas.chat import ChatSearchByType, ChatSearchCursorSchema
 from app.schemas.user import (
     UserCreateSchema,
     UserIDSchema,
 )
+from app.utils.types import IDType
 
 from .base import AbstractGenericRepository
 
@@ -10,4 +17,19 @@ from .base import AbstractGenericRepository
 class AbstractUserRepository(
     AbstractGenericRepository[UserModel, UserIDSchema, UserCreateSchema],
 ):
-    pass
+    @abstractmethod
+    async def get_names(self) -> Sequence[Row[tuple[IDType, str, str]]]: ...
+
+    @abstractmethod
+    async def get_deleted_ids(self) -> Sequence[IDType]: ...
+
+    @abstractmethod
+    async def search(
+        self,
+        *,
+        by: ChatSearchByType,
+        contains: str,
+        skip_id: UserIDSchema,
+        cursor: ChatSearchCursorSchema | None,
+        count: int,
+    ) -> Sequence[Row[tuple[IDType, str, str, bool, float, str]]]: ...
@@ -0,0 +1,35 @@
+from abc import ABC, abstractmethod
+from collections.abc import Awaitable, Callable
+
+BrokerHandler = Callable[[str], Awaitable[None]]
+
+
+class AbstractBroker(ABC):
+    @abstractmethod
+    async def start(self) -> None:
+        """
+        Opens the resources the broker needs to publish and receive payloads.
+        """
+        ...
+
+    @abstractmethod
+    async def stop(self) -> None:
+        """
+        Releases the resources opened by `start`.
+        """
+        ...
+
+    @abstractmethod
+    async def subscribe(self, channel: str, handler: BrokerHandler) -> None:
+        """
+        Registers a handler called with every payload published to the given
+        channel by any process connected to the same broker.
+        """
+        ...
+
+    @abstractmethod
+    async def publish(self, channel: str, payload: str) -> None:
+        """
+        Publishes a payload to the given channel once.
+        """
+        ...
@@ -1,4 +1,6 @@
 from abc import ABC, abstractmethod
+from collections.abc import Awaitable, Callable
+from contextlib import AbstractAsyncContextManager
 from types import TracebackType
 from typing import Self
 
@@ -24,8 +26,46 @@ class AbstractAsyncUnitOfWork(ABC):
     chatUserRepository: AbstractChatUserRepository
     attachmentRepository: AbstractAttachmentRepository
 
-    def __init__(self, async_session_factory: Factory[AsyncSession]) -> None:
+    def __init__(
+        self,
+        async_session_factory: Factory[AsyncSession],
+        read_session_factory: Factory[AsyncSession] | None = None,
+        after_commit: Callable[[], Awaitable[None]] | None = None,
+    ) -> None:
         self._async_session_factory = async_session_factory
+        self._read_session_factory = read_session_factory
+        self._after_commit = after_commit
+        self._commit_hooks: list[Callable[[], Awaitable[None]]] = []
+        self.is_read_only = False
+        # Whether the sessions are bound to a read replica, which may lag.
+        self.is_replica = False
+        self.is_scoped = False
+
+    @abstractmethod
+    def read_only(self) -> Self:
+        """
+        Returns a unit of work for reads that tolerate replication lag, bound
+        to a read replica when there is one. It cannot commit.
+        """
+        ...
+
+    @abstractmethod
+    def scoped(self) -> AbstractAsyncContextManager[Self]:
+        """
+        Shares one session and transaction between every `async with` of
+        this unit of work inside the block, so that services called by one
+        endpoint commit atomically. Commits inside the block only flush, the
+        transaction is committed when the block exits without an error.
+        """
+        ...
+
+    def on_commit(self, hook: Callable[[], Awaitable[None]]) -> None:
+        """
+        Registers a hook awaited once the current transaction is committed,
+        dropped if it is rolled back.
+        """
+
+        self._commit_hooks.append(hook)
 
     @abstractmethod
     async def __aenter__(self) -> Self: ...
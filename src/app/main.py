@@ -2,25 +2,80 @@ from contextlib import asynccontextmanager
 
 from fastapi import FastAPI
 from fastapi.middleware.cors import CORSMiddleware
-from sqlalchemy.ext.asyncio import create_async_engine
 
 from app.api import api_v1_router
 from app.core.config import config
+from app.db.session import (
+    async_session_factory,
+    create_engine,
+    create_replica_engines,
+)
+from app.utils.cache import (
+    ChatListCache,
+    ChatMembersCache,
+    PrimaryPins,
+    ReadMarkerBuffer,
+)
 from app.utils.middleware import AuthenticationMiddleware
+from app.utils.purge import Purger
 from app.utils.router import resolve_protected_paths
 from app.utils.s3 import create_s3_client
+from app.utils.search import UserSearchIndex
+from app.utils.uow import AsyncUnitOfWork
+from app.utils.websockets import WebSocketManager, create_broker
 
 
 @asynccontextmanager
 async def lifespan(app: FastAPI):
-    engine = create_async_engine(config.database.uri)
+    engine = create_engine(config.database)
     app.state.engine = engine
+    sessionmaker = async_session_factory(engine)
+    app.state.sessionmaker = sessionmaker
+    replicas = create_replica_engines(config.database)
+    app.state.replicas = replicas
 
     s3_client = create_s3_client(config)
     app.state.s3_client = s3_client
 
+    broker = create_broker(config, engine)
+    await WebSocketManager.start(
+        broker,
+        config.websocket,
+        lambda: AsyncUnitOfWork(async_session_factory=sessionmaker),
+    )
+    await ChatMembersCache.start(broker, config.cache)
+    await ChatListCache.start(
+        broker,
+        config.cache,
+        replica_lag=config.database.replicas.PRIMARY_PIN_SECONDS if replicas else 0,
+    )
+    if replicas:
+        await PrimaryPins.start(
+            broker, config.cache, config.database.replicas.PRIMARY_PIN_SECONDS
+        )
+    await ReadMarkerBuffer.start(
+        config.cache, AsyncUnitOfWork(async_session_factory=sessionmaker)
+    )
+    await UserSearchIndex.start(
+        broker,
+        config.search,
+        AsyncUnitOfWork(async_session_factory=sessionmaker),
+    )
+
+    await Purger.start(
+        config.purge,
+        AsyncUnitOfWork(async_session_factory=sessionmaker),
+        s3_client,
+        config.s3.BUCKET_NAME,
+    )
+
     yield
+    await ReadMarkerBuffer.stop()
+    await Purger.stop()
+    await WebSocketManager.stop()
     await engine.dispose()
+    if replicas:
+        await replicas.dispose()
 
 
 app = FastAPI(lifespan=lifespan)
@@ -39,6 +94,7 @@ app.add_middleware(
     allow_credentials=True,
     allow_methods=["*"],
     allow_headers=["*"],
+    expose_headers=["X-Next-Cursor"],
 )
 
 app.include_router(api_v1_router, prefix=config.PREFIX_API_V1)
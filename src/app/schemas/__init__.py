@@ -1,28 +1,56 @@
 __all__ = [
     "Base",
     "IDSchema",
+    "AdminStatsSchema",
+    "PurgeJobType",
+    "PurgeProgressSchema",
+    "PurgeStatsSchema",
+    "AnnouncementEnvelopeSchema",
+    "AnnouncementSchema",
     "AttachmentCreateSchema",
     "AttachmentIDSchema",
     "AttachmentReadSchema",
     "PresignedAttachmentReadSchema",
+    "CacheInvalidationSchema",
+    "CacheStatsSchema",
+    "ReadMarkerStatsSchema",
     "ChatIDSchema",
+    "ChatInfoCursorSchema",
+    "ChatInfoFetchSchema",
+    "ChatInfoPageSchema",
     "ChatInfoSchema",
+    "ChatReadMarkerSchema",
+    "ChatReadSchema",
     "ChatRetrieveSchema",
     "ChatSchema",
     "ChatSearchByType",
+    "ChatSearchCursorSchema",
+    "ChatSearchPageSchema",
     "ChatSearchResultSchema",
     "ChatUserSchema",
+    "DatabasePoolStatsSchema",
     "MessageAttachmentAnnouncementSchema",
+    "MessageBatchCreateSchema",
+    "MessageBatchSendSchema",
     "MessageChangeContentSchema",
     "MessageContentSchema",
     "MessageCreateSchema",
+    "MessageCursorSchema",
     "MessageDeleteAnnouncementSchema",
+    "MessageDeleteResultSchema",
     "MessageDeleteSchema",
+    "MessageEditResultSchema",
     "MessageEditSchema",
     "MessageFetchSchema",
     "MessageIDSchema",
+    "MessagePageDirection",
+    "MessagePageSchema",
     "MessagePutAnnouncementSchema",
     "MessageReadSchema",
+    "MessageSearchCursorSchema",
+    "MessageSearchPageSchema",
+    "MessageSearchResultSchema",
+    "MessageSearchSchema",
     "MessageSendSchema",
     "MessageTimestampSchema",
     "TokenPayload",
@@ -44,6 +72,21 @@ __all__ = [
     "UserReadSchema",
     "UserRegisterSchema",
     "UserUserNameSchema",
+    "UserSearchUpdateSchema",
+    "WebSocketCompressionStatsSchema",
+    "WebSocketConnectionStatsSchema",
+    "WebSocketReapStatsSchema",
+    "HeartbeatPingSchema",
+    "CommandAckSchema",
+    "CommandErrorSchema",
+    "MessageDeleteCommandSchema",
+    "MessageEditCommandSchema",
+    "MessageSendCommandSchema",
+    "WebSocketCommandSchema",
+    "WebSocketResumeSchema",
+    "WebSocketSessionSchema",
+    "WebSocketRegistryStatsSchema",
+    "WebSocketUserStatsSchema",
 ]
 
 from .attachment import (
@@ -53,30 +96,63 @@ from .attachment import (
     PresignedAttachmentReadSchema,
 )
 from .base import Base, IDSchema
+from .cache import (
+    CacheInvalidationSchema,
+    CacheStatsSchema,
+    ReadMarkerStatsSchema,
+)
 from .chat import (
     ChatIDSchema,
+    ChatInfoCursorSchema,
+    ChatInfoFetchSchema,
+    ChatInfoPageSchema,
     ChatInfoSchema,
+    ChatReadMarkerSchema,
+    ChatReadSchema,
     ChatRetrieveSchema,
     ChatSchema,
     ChatSearchByType,
+    ChatSearchCursorSchema,
+    ChatSearchPageSchema,
     ChatSearchResultSchema,
     ChatUserSchema,
+    UserSearchUpdateSchema,
 )
+from .database import DatabasePoolStatsSchema
 from .message import (
+    AnnouncementEnvelopeSchema,
+    AnnouncementSchema,
     MessageAttachmentAnnouncementSchema,
+    MessageBatchCreateSchema,
+    MessageBatchSendSchema,
     MessageChangeContentSchema,
     MessageContentSchema,
     MessageCreateSchema,
+    MessageCursorSchema,
     MessageDeleteAnnouncementSchema,
+    MessageDeleteResultSchema,
     MessageDeleteSchema,
+    MessageEditResultSchema,
     MessageEditSchema,
     MessageFetchSchema,
     MessageIDSchema,
+    MessagePageDirection,
+    MessagePageSchema,
     MessagePutAnnouncementSchema,
     MessageReadSchema,
+    MessageSearchCursorSchema,
+    MessageSearchPageSchema,
+    MessageSearchResultSchema,
+    MessageSearchSchema,
     MessageSendSchema,
     MessageTimestampSchema,
 )
+from .stats import (
+    AdminStatsSchema,
+    PurgeJobType,
+    PurgeProgressSchema,
+    PurgeStatsSchema,
+)
 from .token import (
     AccessTokenSchema,
     RefreshTokenSchema,
@@ -100,3 +176,19 @@ from .user import (
     UserRegisterSchema,
     UserUserNameSchema,
 )
+from .websocket import (
+    CommandAckSchema,
+    CommandErrorSchema,
+    HeartbeatPingSchema,
+    MessageDeleteCommandSchema,
+    MessageEditCommandSchema,
+    MessageSendCommandSchema,
+    WebSocketCommandSchema,
+    WebSocketCompressionStatsSchema,
+    WebSocketConnectionStatsSchema,
+    WebSocketReapStatsSchema,
+    WebSocketRegistryStatsSchema,
+    WebSocketResumeSchema,
+    WebSocketSessionSchema,
+    WebSocketUserStatsSchema,
+)
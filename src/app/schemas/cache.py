@@ -0,0 +1,32 @@
+from typing import Literal
+
+from app.utils.types import IDType
+
+from . import Base
+
+
+class CacheStatsSchema(Base):
+    name: str
+    size: int
+    max_size: int
+    hits: int
+    misses: int
+    evictions: int
+
+
+class ReadMarkerStatsSchema(Base):
+    # Chat members with markers not written yet.
+    pending: int
+    received: int
+    flushes: int
+    moved: int
+
+
+class CacheInvalidationSchema(Base):
+    cache: Literal["chat_members", "chat_lists", "primary_pins"]
+    chat_ids: list[IDType] = []
+    # Entries with these users in them: their chats, or the chat lists with a
+    # chat with them.
+    user_ids: list[IDType] = []
+    # Chat lists of these users, or the users pinned to the primary.
+    owner_ids: list[IDType] = []
@@ -1,8 +1,13 @@
+from datetime import datetime
 from enum import Enum
+from typing import Annotated
+
+from pydantic import Field
 
 from app.utils.types import IDType
 
 from . import Base, IDSchema
+from .message import MessageReadSchema
 from .user import UserFullNameSchema, UserIDSchema, UserUserNameSchema
 
 
@@ -32,5 +37,54 @@ class ChatSearchResultSchema(UserIDSchema, UserFullNameSchema, UserUserNameSchem
     pass
 
 
+class ChatSearchCursorSchema(Base):
+    # Sort key of the last result of a page, see UserRepository.search.
+    prefix: bool
+    score: float
+    value: str
+    id: IDType
+
+
+class UserSearchUpdateSchema(Base):
+    users: list[ChatSearchResultSchema] = []
+    removed: list[IDType] = []
+
+
+class ChatSearchPageSchema(Base):
+    results: list[ChatSearchResultSchema]
+    next_cursor: str | None
+
+
 class ChatInfoSchema(UserIDSchema, UserFullNameSchema, UserUserNameSchema):
     chat_id: IDType
+    last_activity: datetime
+    # None until the first message is sent.
+    last_message: MessageReadSchema | None = None
+    last_read_message_id: IDType | None = None
+    unread_count: int = 0
+
+
+class ChatReadSchema(Base):
+    chat_id: IDType
+    # The latest message read, earlier ones are read too.
+    message_id: IDType
+
+
+class ChatReadMarkerSchema(ChatReadSchema):
+    user_id: IDType
+
+
+class ChatInfoFetchSchema(Base):
+    user_id: IDType
+    count: Annotated[int, Field(gt=0, le=500)] | None = None
+    cursor: str | None = None
+
+
+class ChatInfoCursorSchema(Base):
+    last_activity: datetime
+    chat_id: IDType
+
+
+class ChatInfoPageSchema(Base):
+    chats: list[ChatInfoSchema]
+    next_cursor: str | None
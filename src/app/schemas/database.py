@@ -0,0 +1,15 @@
+from . import Base
+
+
+class DatabasePoolStatsSchema(Base):
+    size: int
+    checked_in: int
+    checked_out: int
+    overflow: int
+    max_overflow: int
+    # Checkouts currently waiting for a connection.
+    waiting: int
+    checkouts: int
+    timeouts: int
+    wait_seconds_total: float
+    wait_seconds_max: float
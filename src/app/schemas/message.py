@@ -1,7 +1,7 @@
 from datetime import datetime
 from typing import Annotated, Literal, Self
 
-from pydantic import StringConstraints, model_validator
+from pydantic import Field, StringConstraints, model_validator
 
 from app.utils.types import IDType
 
@@ -29,6 +29,15 @@ class MessageCreateSchema(MessageSendSchema):
     sender_id: IDType
 
 
+class MessageBatchSendSchema(Base):
+    chat_id: IDType
+    messages: Annotated[list[MessageContentSchema], Field(min_length=1, max_length=100)]
+
+
+class MessageBatchCreateSchema(MessageBatchSendSchema):
+    sender_id: IDType
+
+
 class MessageReadSchema(MessageIDSchema, MessageTimestampSchema, MessageCreateSchema):
     pass
 
@@ -45,34 +54,110 @@ class MessageEditSchema(MessageContentSchema, MessageIDSchema):
     pass
 
 
-class MessagePutAnnouncementSchema(Base):
+class MessageEditResultSchema(Base):
+    message: MessageReadSchema
+    # Members of the chat to announce the change to.
+    recipients: list[IDType]
+
+
+class MessageDeleteResultSchema(Base):
+    message: MessageDeleteSchema
+    recipients: list[IDType]
+
+
+class EventSchema(Base):
+    # Assigned once when the announcement is published, see
+    # WebSocketSessionSchema.
+    event_id: int | None = None
+
+
+class MessagePutAnnouncementSchema(EventSchema):
     announcement_type: Literal["message/put"] = "message/put"
     message: MessageReadSchema
 
 
-class MessageDeleteAnnouncementSchema(Base):
+class MessageDeleteAnnouncementSchema(EventSchema):
     announcement_type: Literal["message/delete"] = "message/delete"
     message: MessageDeleteSchema
 
 
-class MessageAttachmentAnnouncementSchema(Base):
+class MessageAttachmentAnnouncementSchema(EventSchema):
     announcement_type: Literal["message/attachment"] = "message/attachment"
     attachment: AttachmentReadSchema
 
 
+AnnouncementSchema = Annotated[
+    MessagePutAnnouncementSchema
+    | MessageDeleteAnnouncementSchema
+    | MessageAttachmentAnnouncementSchema,
+    Field(discriminator="announcement_type"),
+]
+
+
+class AnnouncementEnvelopeSchema(Base):
+    users: list[IDType]
+    # Delivered together as a single array frame when there are many.
+    announcements: list[AnnouncementSchema]
+
+
+MessagePageDirection = Literal["older", "newer"]
+
+
+class MessageCursorSchema(MessageIDSchema, MessageTimestampSchema):
+    pass
+
+
 class MessageFetchSchema(Base):
+    """
+    Fetches messages in a period with `since` and `until`, or else a page of
+    `count` messages (50 by default) older or newer than the message the
+    `cursor` points at. The first page without a cursor starts at the
+    latest (or the earliest) message.
+    """
+
     chat_id: IDType
     since: datetime | None = None
     until: datetime | None = None
-    count: int | None = None
+    count: Annotated[int, Field(gt=0, le=500)] | None = None
+    cursor: str | None = None
+    direction: MessagePageDirection = "older"
+
+    @property
+    def paged(self) -> bool:
+        return not (self.since or self.until)
 
     @model_validator(mode="after")
     def check(self) -> Self:
-        if not any(
-            [
-                self.since or self.until,
-                self.since and self.until and not self.count,
-            ]
-        ):
-            raise ValueError("invalid arguments")
+        if self.cursor and not self.paged:
+            raise ValueError("cursor cannot be combined with since or until")
         return self
+
+
+class MessageSearchSchema(Base):
+    user_id: IDType
+    query: Annotated[str, StringConstraints(min_length=1, max_length=200)]
+    chat_id: IDType | None = None
+    count: Annotated[int, Field(gt=0, le=100)] | None = None
+    cursor: str | None = None
+
+
+class MessageSearchCursorSchema(MessageIDSchema, MessageTimestampSchema):
+    rank: float
+
+
+class MessageSearchResultSchema(Base):
+    message: MessageReadSchema
+    # HTML: matched words are wrapped in <b></b>, the rest of the content is
+    # escaped.
+    snippet: str
+    rank: float
+
+
+class MessageSearchPageSchema(Base):
+    results: list[MessageSearchResultSchema]
+    next_cursor: str | None
+
+
+class MessagePageSchema(Base):
+    messages: list[MessageReadSchema]
+    next_cursor: str | None
@@ -0,0 +1,45 @@
+from typing import Literal
+
+from app.utils.types import IDType
+
+from . import Base
+from .cache import CacheStatsSchema, ReadMarkerStatsSchema
+from .database import DatabasePoolStatsSchema
+from .websocket import (
+    WebSocketCompressionStatsSchema,
+    WebSocketReapStatsSchema,
+    WebSocketRegistryStatsSchema,
+)
+
+PurgeJobType = Literal["chat", "account"]
+
+
+class PurgeProgressSchema(Base):
+    job_type: PurgeJobType
+    id: IDType
+    chats: int = 0
+    messages: int = 0
+
+
+class PurgeStatsSchema(Base):
+    queued_chats: int
+    queued_accounts: int
+    # The job being purged.
+    current: PurgeProgressSchema | None
+    purged_accounts: int
+    purged_chats: int
+    purged_messages: int
+    deleted_objects: int
+
+
+class AdminStatsSchema(Base):
+    websocket: WebSocketRegistryStatsSchema
+    reaped: WebSocketReapStatsSchema
+    # Zero unless uvicorn runs with DeflateWebSocketProtocol.
+    compression: WebSocketCompressionStatsSchema
+    caches: list[CacheStatsSchema]
+    read_markers: ReadMarkerStatsSchema
+    # None unless the engine uses InstrumentedAsyncPool.
+    database: DatabasePoolStatsSchema | None
+    replicas: list[DatabasePoolStatsSchema]
+    purge: PurgeStatsSchema
@@ -1,3 +1,4 @@
+from datetime import datetime
 from typing import Annotated, Self
 
 from pydantic import EmailStr, StringConstraints, model_validator
@@ -34,7 +35,7 @@ class UserCreateSchema(UserProfileSchema):
 
 
 class UserReadSchema(UserIDSchema, UserCreateSchema):
-    pass
+    deleted_at: datetime | None = None
 
 
 class UserRegisterSchema(UserPasswordSchema, UserProfileSchema):
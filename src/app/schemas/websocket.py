@@ -0,0 +1,110 @@
+from typing import Annotated, Literal
+
+from pydantic import Field, StringConstraints
+
+from app.utils.types import IDType
+
+from . import Base
+from .message import (
+    MessageDeleteSchema,
+    MessageEditSchema,
+    MessageReadSchema,
+    MessageSendSchema,
+)
+
+RequestIDAnnotation = Annotated[str, StringConstraints(min_length=1, max_length=64)]
+
+
+class WebSocketConnectionStatsSchema(Base):
+    user_id: IDType
+    client: str
+    queue_depth: int
+    max_queue_depth: int
+    sent: int
+    dropped: int
+    coalesced: int
+
+
+class WebSocketRegistryStatsSchema(Base):
+    users: int
+    connections: int
+
+
+class WebSocketUserStatsSchema(Base):
+    user_id: IDType
+    clients: int
+    connections: list[WebSocketConnectionStatsSchema]
+
+
+class WebSocketReapStatsSchema(Base):
+    idle: int
+    stalled: int
+
+
+class HeartbeatPingSchema(Base):
+    announcement_type: Literal["ping"] = "ping"
+
+
+class MessageSendCommandSchema(Base):
+    type: Literal["message/send"]
+    request_id: RequestIDAnnotation
+    message: MessageSendSchema
+
+
+class MessageEditCommandSchema(Base):
+    type: Literal["message/edit"]
+    request_id: RequestIDAnnotation
+    message: MessageEditSchema
+
+
+class MessageDeleteCommandSchema(Base):
+    type: Literal["message/delete"]
+    request_id: RequestIDAnnotation
+    message: MessageDeleteSchema
+
+
+WebSocketCommandSchema = Annotated[
+    MessageSendCommandSchema | MessageEditCommandSchema | MessageDeleteCommandSchema,
+    Field(discriminator="type"),
+]
+
+
+class CommandAckSchema(Base):
+    announcement_type: Literal["ack"] = "ack"
+    request_id: str
+    message: MessageReadSchema | MessageDeleteSchema
+
+
+class CommandErrorSchema(Base):
+    announcement_type: Literal["error"] = "error"
+    request_id: str | None
+    status_code: int
+    detail: str
+
+
+class WebSocketResumeSchema(Base):
+    stream: str
+    last_event_id: int
+
+
+class WebSocketSessionSchema(Base):
+    """
+    First frame of every connection. Announcements carry event ids unique
+    within a stream, and a client reconnecting with the stream and the id of
+    the last event it received gets the events it missed replayed. When
+    they cannot be replayed, `resync` is set and the client should fetch
+    its chats again.
+    """
+
+    announcement_type: Literal["session"] = "session"
+    stream: str
+    event_id: int
+    resync: bool = False
+
+
+class WebSocketCompressionStatsSchema(Base):
+    frames_compressed: int
+    frames_uncompressed: int
+    bytes_in: int
+    bytes_out: int
+    ratio: float | None
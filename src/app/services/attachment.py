@@ -17,7 +17,7 @@ class AttachmentService(BaseService):
     async def get_all_in_chat(
         self, *, chat_schema: ChatIDSchema
     ) -> list[AttachmentReadSchema]:
-        async with self.uow as uow:
+        async with self.uow.read_only() as uow:
             if not await uow.chatRepository.get(chat_schema):
                 raise ChatNotFoundError
 
@@ -1,4 +1,7 @@
 from app.core.config import Config
+from app.schemas import ChatIDSchema
+from app.utils.cache import ChatMembersCache
+from app.utils.types import IDType
 from app.utils.uow import AsyncUnitOfWork
 
 
@@ -6,3 +9,23 @@ class BaseService:
     def __init__(self, config: Config, uow: AsyncUnitOfWork) -> None:
         self.config = config
         self.uow = uow
+
+    async def get_chat_member_ids(
+        self, uow: AsyncUnitOfWork, chatIDSchema: ChatIDSchema
+    ) -> frozenset[IDType]:
+        """
+        Returns ids of the chat members, from the chat members cache when
+        possible. Empty if the chat does not exist.
+
+        Members read from a replica are not cached, they may be stale.
+        """
+
+        members = ChatMembersCache.get(chatIDSchema.id)
+        if members is not None:
+            return members
+
+        generation = ChatMembersCache.generation
+        members = frozenset(await uow.chatUserRepository.get_user_ids(chatIDSchema))
+        if members and not uow.is_replica:
+            ChatMembersCache.set(chatIDSchema.id, members, generation)
+        return members
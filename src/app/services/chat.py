@@ -1,49 +1,113 @@
-from sqlalchemy.orm import selectinload
-
 from app.core.exceptions import ChatNotFoundError, UserNotFoundError
-from app.db.repositories import ChatRepository
 from app.schemas import (
     ChatIDSchema,
+    ChatInfoCursorSchema,
+    ChatInfoFetchSchema,
+    ChatInfoPageSchema,
     ChatInfoSchema,
+    ChatReadMarkerSchema,
     ChatRetrieveSchema,
     ChatSchema,
     ChatUserSchema,
+    MessageBatchCreateSchema,
     MessageCreateSchema,
+    MessageCursorSchema,
     MessageFetchSchema,
+    MessagePageSchema,
     MessageReadSchema,
+    MessageSearchCursorSchema,
+    MessageSearchPageSchema,
+    MessageSearchResultSchema,
+    MessageSearchSchema,
     UserIDSchema,
 )
+from app.utils.cache import ChatListCache, ChatMembersCache, ReadMarkerBuffer
+from app.utils.pagination import CursorManager
+from app.utils.purge import Purger
 
 from .base import BaseService
 
 
 class ChatService(BaseService):
+    CHAT_PAGE_SIZE = 50
+    MESSAGE_PAGE_SIZE = 50
+    MESSAGE_SEARCH_PAGE_SIZE = 20
+
     async def get_chats(self, *, userIDSchema: UserIDSchema) -> list[ChatSchema]:
-        async with self.uow as uow:
+        async with self.uow.read_only() as uow:
             resource = await uow.userRepository.get(userIDSchema)
-            if not resource:
+            if not resource or resource.deleted_at:
                 raise UserNotFoundError
 
             return [ChatSchema.model_validate(chat) for chat in resource.chats]
 
     async def get_chats_info(
-        self, *, userIDSchema: UserIDSchema
-    ) -> list[ChatInfoSchema]:
-        async with self.uow as uow:
-            resources = await uow.chatUserRepository.get_chats_info(userIDSchema)
-            return [ChatInfoSchema.model_validate(resource) for resource in resources]
+        self, *, fetchSchema: ChatInfoFetchSchema
+    ) -> ChatInfoPageSchema:
+        """
+        Returns a page of chats of the user, or all of them when neither a
+        count nor a cursor is given, as before the list was paged. First pages
+        are served from the chat list cache when possible, see ChatListCache
+        for how lists read from a replica are kept from going stale.
+        """
 
-    async def get_users(self, *, chatIDSchema: ChatIDSchema) -> list[UserIDSchema]:
-        async with self.uow as uow:
-            resource = await uow.chatRepository.get(
-                chatIDSchema,
-                options=[selectinload(ChatRepository.model_cls.users)],
+        cursor = None
+        count = fetchSchema.count
+        if fetchSchema.cursor:
+            cursor = CursorManager.decode(fetchSchema.cursor, ChatInfoCursorSchema)
+            count = count or self.CHAT_PAGE_SIZE
+
+        token = None
+        if not cursor and ChatListCache.enabled():
+            page = ChatListCache.get(fetchSchema.user_id, count)
+            if page is not None:
+                return page
+            token = ChatListCache.begin(fetchSchema.user_id)
+
+        async with self.uow.read_only() as uow:
+            resources = await uow.chatUserRepository.get_chats_info(
+                UserIDSchema(id=fetchSchema.user_id), cursor=cursor, count=count
+            )
+
+            chats = [
+                ChatInfoSchema(
+                    chat_id=row.chat_id,
+                    last_activity=row.last_activity,
+                    id=row.id,
+                    fullname=row.fullname,
+                    username=row.username,
+                    last_read_message_id=row.last_read_message_id,
+                    unread_count=row.unread_count,
+                    last_message=(
+                        MessageReadSchema.model_validate(row.MessageModel)
+                        if row.MessageModel
+                        else None
+                    ),
+                )
+                for row in resources
+            ]
+
+        next_cursor = None
+        if count and len(chats) == count:
+            last = chats[-1]
+            next_cursor = CursorManager.encode(
+                ChatInfoCursorSchema(
+                    last_activity=last.last_activity, chat_id=last.chat_id
+                )
             )
 
-            if not resource:
+        page = ChatInfoPageSchema(chats=chats, next_cursor=next_cursor)
+        if token:
+            ChatListCache.set(fetchSchema.user_id, count, page, token)
+        return page
+
+    async def get_users(self, *, chatIDSchema: ChatIDSchema) -> list[UserIDSchema]:
+        async with self.uow as uow:
+            members = await self.get_chat_member_ids(uow, chatIDSchema)
+            if not members:
                 raise ChatNotFoundError
 
-            return [UserIDSchema(id=user_model.id) for user_model in resource.users]
+            return [UserIDSchema(id=user_id) for user_id in members]
 
     async def get_or_create_chat(
         self, *, userIDSchema: UserIDSchema, retrieveSchema: ChatRetrieveSchema
@@ -68,67 +132,133 @@ class ChatService(BaseService):
 
             if not userResource or not userWithResource:
                 raise UserNotFoundError
+            if userResource.deleted_at or userWithResource.deleted_at:
+                raise UserNotFoundError
 
             chatResource = await uow.chatRepository.add_one()
             chatResource.users.append(userResource)
             chatResource.users.append(userWithResource)
+            uow.on_commit(
+                lambda: ChatMembersCache.invalidate(chat_ids=[chatResource.id])
+            )
+            uow.on_commit(
+                lambda: ChatListCache.invalidate(
+                    owner_ids=[userIDSchema.id, retrieveSchema.with_user_id]
+                )
+            )
             await uow.commit()
 
             return ChatSchema.model_validate(chatResource)
 
     async def leave_chat(self, *, chatUserSchema: ChatUserSchema) -> None:
+        """
+        Deletes the chat for both users. Messages and attachments are deleted
+        by the database cascades, or in the background for chats with many
+        messages, see Purger.
+        """
+
+        chat = ChatIDSchema(id=chatUserSchema.chat_id)
         async with self.uow as uow:
-            userResource = await uow.userRepository.get(
-                UserIDSchema(id=chatUserSchema.user_id)
-            )
-            if not userResource:
-                raise UserNotFoundError
+            members = await uow.chatUserRepository.get_user_ids(chat)
+            if chatUserSchema.user_id not in members:
+                raise ChatNotFoundError
 
-            chatResource = await uow.chatRepository.get(
-                ChatIDSchema(id=chatUserSchema.chat_id),
-                options=[
-                    selectinload(ChatRepository.model_cls.users),
-                    selectinload(ChatRepository.model_cls.messages),
-                ],
+            threshold = Purger.settings.CHAT_BACKGROUND_MIN_MESSAGES
+            messages = 0
+            if threshold:
+                messages = await uow.messageRepository.count_in_chat(
+                    chat_id_schema=chat, limit=threshold
+                )
+
+            if threshold and messages >= threshold:
+                await uow.chatUserRepository.delete_members(chat)
+                uow.on_commit(lambda: Purger.enqueue_chat(chat))
+            else:
+                attachment_ids = await uow.attachmentRepository.get_ids_in_chat(chat)
+                await uow.chatRepository.delete_one(chat)
+                uow.on_commit(lambda: Purger.enqueue_attachments(attachment_ids))
+
+            uow.on_commit(
+                lambda: ChatMembersCache.invalidate(chat_ids=[chatUserSchema.chat_id])
             )
+            uow.on_commit(lambda: ChatListCache.invalidate(owner_ids=list(members)))
+            await uow.commit()
 
-            if not chatResource:
-                raise ChatNotFoundError
+    async def mark_read(self, *, markerSchema: ChatReadMarkerSchema) -> None:
+        """
+        Marks the message and every earlier one in the chat read by the
+        user. Written behind, see ReadMarkerBuffer.
+        """
 
-            if userResource in chatResource.users:
-                chatResource.users.clear()
-                chatResource.messages.clear()
-            else:
+        async with self.uow.read_only() as uow:
+            members = await self.get_chat_member_ids(
+                uow, ChatIDSchema(id=markerSchema.chat_id)
+            )
+            if markerSchema.user_id not in members:
                 raise ChatNotFoundError
 
-            await uow.chatRepository.delete_one(ChatIDSchema(id=chatUserSchema.chat_id))
-            await uow.commit()
+        ReadMarkerBuffer.put(markerSchema)
 
     async def send_message(
         self, *, messageSchema: MessageCreateSchema
     ) -> MessageReadSchema:
         async with self.uow as uow:
-            chatResource = await uow.chatRepository.get(
-                ChatIDSchema(id=messageSchema.chat_id),
+            members = await self.get_chat_member_ids(
+                uow, ChatIDSchema(id=messageSchema.chat_id)
             )
-            if not chatResource:
+            if messageSchema.sender_id not in members:
                 raise ChatNotFoundError
 
-            userResource = await uow.userRepository.get(
-                UserIDSchema(id=messageSchema.sender_id)
-            )
-            if not userResource:
-                raise UserNotFoundError
-
             resource = await uow.messageRepository.add_one(messageSchema)
+            await uow.chatRepository.refresh_summary(
+                ChatIDSchema(id=messageSchema.chat_id),
+                sender_id=messageSchema.sender_id,
+                sent=1,
+            )
+            uow.on_commit(lambda: ChatListCache.invalidate(owner_ids=list(members)))
 
             await uow.commit()
             return MessageReadSchema.model_validate(resource)
 
+    async def send_messages(
+        self, *, batchSchema: MessageBatchCreateSchema
+    ) -> list[MessageReadSchema]:
+        """
+        Checks the chat and the sender once and inserts all messages in one
+        statement, committed together.
+        """
+
+        async with self.uow as uow:
+            members = await self.get_chat_member_ids(
+                uow, ChatIDSchema(id=batchSchema.chat_id)
+            )
+            if batchSchema.sender_id not in members:
+                raise ChatNotFoundError
+
+            resources = await uow.messageRepository.add_many(
+                [
+                    MessageCreateSchema(
+                        chat_id=batchSchema.chat_id,
+                        sender_id=batchSchema.sender_id,
+                        content=message.content,
+                    )
+                    for message in batchSchema.messages
+                ]
+            )
+            await uow.chatRepository.refresh_summary(
+                ChatIDSchema(id=batchSchema.chat_id),
+                sender_id=batchSchema.sender_id,
+                sent=len(resources),
+            )
+            uow.on_commit(lambda: ChatListCache.invalidate(owner_ids=list(members)))
+
+            await uow.commit()
+            return [MessageReadSchema.model_validate(r) for r in resources]
+
     async def get_messages(
         self, *, messageFetchSchema: MessageFetchSchema
     ) -> list[MessageReadSchema]:
-        async with self.uow as uow:
+        async with self.uow.read_only() as uow:
             chatResource = await uow.chatRepository.get(
                 ChatIDSchema(id=messageFetchSchema.chat_id),
             )
@@ -143,3 +273,88 @@ class ChatService(BaseService):
             )
 
             return [MessageReadSchema.model_validate(model) for model in resource]
+
+    async def get_messages_page(
+        self, *, messageFetchSchema: MessageFetchSchema
+    ) -> MessagePageSchema:
+        cursor = None
+        if messageFetchSchema.cursor:
+            cursor = CursorManager.decode(
+                messageFetchSchema.cursor, MessageCursorSchema
+            )
+        count = messageFetchSchema.count or self.MESSAGE_PAGE_SIZE
+
+        async with self.uow.read_only() as uow:
+            chatResource = await uow.chatRepository.get(
+                ChatIDSchema(id=messageFetchSchema.chat_id),
+            )
+            if not chatResource:
+                raise ChatNotFoundError
+
+            resource = await uow.messageRepository.fetch_page(
+                chat_id_schema=ChatIDSchema(id=messageFetchSchema.chat_id),
+                cursor=cursor,
+                direction=messageFetchSchema.direction,
+                count=count,
+            )
+
+            messages = [MessageReadSchema.model_validate(model) for model in resource]
+
+        next_cursor = None
+        if len(messages) == count:
+            last = messages[-1]
+            next_cursor = CursorManager.encode(
+                MessageCursorSchema(id=last.id, timestamp=last.timestamp)
+            )
+
+        return MessagePageSchema(messages=messages, next_cursor=next_cursor)
+
+    async def search_messages(
+        self, *, searchSchema: MessageSearchSchema
+    ) -> MessageSearchPageSchema:
+        cursor = None
+        if searchSchema.cursor:
+            cursor = CursorManager.decode(
+                searchSchema.cursor, MessageSearchCursorSchema
+            )
+        count = searchSchema.count or self.MESSAGE_SEARCH_PAGE_SIZE
+
+        chatIDSchema = None
+        if searchSchema.chat_id:
+            chatIDSchema = ChatIDSchema(id=searchSchema.chat_id)
+
+        async with self.uow.read_only() as uow:
+            if chatIDSchema:
+                members = await self.get_chat_member_ids(uow, chatIDSchema)
+                if searchSchema.user_id not in members:
+                    raise ChatNotFoundError
+
+            resource = await uow.messageRepository.search(
+                user_id_schema=UserIDSchema(id=searchSchema.user_id),
+                query=searchSchema.query,
+                chat_id_schema=chatIDSchema,
+                cursor=cursor,
+                count=count,
+            )
+
+            results = [
+                MessageSearchResultSchema(
+                    message=MessageReadSchema.model_validate(row.MessageModel),
+                    snippet=row.snippet,
+                    rank=row.rank,
+                )
+                for row in resource
+            ]
+
+        next_cursor = None
+        if len(results) == count:
+            last = results[-1]
+            next_cursor = CursorManager.encode(
+                MessageSearchCursorSchema(
+                    id=last.message.id,
+                    timestamp=last.message.timestamp,
+                    rank=last.rank,
+                )
+            )
+
+        return MessageSearchPageSchema(results=results, next_cursor=next_cursor)
@@ -1,13 +1,19 @@
-from sqlalchemy import Row
-
-from app.db.models.mappings import PrimaryKeyID
-from app.db.repositories import UserRepository
-from app.schemas import ChatSearchByType, ChatSearchResultSchema, UserIDSchema
+from app.schemas import (
+    ChatSearchByType,
+    ChatSearchCursorSchema,
+    ChatSearchPageSchema,
+    ChatSearchResultSchema,
+    UserIDSchema,
+)
+from app.utils.pagination import CursorManager
+from app.utils.search import UserSearchIndex
 
 from .base import BaseService
 
 
 class ChatDiscoveryService(BaseService):
+    SEARCH_PAGE_SIZE = 20
+
     async def search_users(
         self,
         *,
@@ -15,26 +21,64 @@ class ChatDiscoveryService(BaseService):
         by: ChatSearchByType,
         skip_id: UserIDSchema,
         count: int | None = None,
-    ) -> list[ChatSearchResultSchema]:
-        async with self.uow as uow:
-            model = UserRepository.model_cls
-            filter_by = model.fullname if by.value == "fullname" else model.username
-
-            resource = await uow.userRepository.get_column_scalars(
-                model.id,
-                (model.fullname, model.username),
-                filter_by,
-                skip_id,
-                contains.lower(),
-                count,
+        cursor: str | None = None,
+    ) -> ChatSearchPageSchema:
+        count = count or self.SEARCH_PAGE_SIZE
+        cursorSchema = None
+        if cursor:
+            cursorSchema = CursorManager.decode(cursor, ChatSearchCursorSchema)
+
+        if UserSearchIndex.ready:
+            page = await UserSearchIndex.search(
+                by=by,
+                contains=contains,
+                skip_id=skip_id,
+                cursor=cursorSchema,
+                count=count,
+            )
+        else:
+            page = await self.search_users_in_db(
+                by=by,
+                contains=contains,
+                skip_id=skip_id,
+                cursor=cursorSchema,
+                count=count,
             )
 
-            def transform(row: Row[tuple[PrimaryKeyID, str, str]]):
-                resource = row.tuple()
-                return ChatSearchResultSchema(
-                    id=resource[0],
-                    fullname=resource[1],
-                    username=resource[2],
-                )
+        next_cursor = None
+        if len(page) == count:
+            next_cursor = CursorManager.encode(page[-1][0])
 
-            return [transform(v) for v in resource]
+        return ChatSearchPageSchema(
+            results=[result for _, result in page], next_cursor=next_cursor
+        )
+
+    async def search_users_in_db(
+        self,
+        *,
+        by: ChatSearchByType,
+        contains: str,
+        skip_id: UserIDSchema,
+        cursor: ChatSearchCursorSchema | None,
+        count: int,
+    ) -> list[tuple[ChatSearchCursorSchema, ChatSearchResultSchema]]:
+        async with self.uow.read_only() as uow:
+            resource = await uow.userRepository.search(
+                by=by,
+                contains=contains,
+                skip_id=skip_id,
+                cursor=cursor,
+                count=count,
+            )
+
+        return [
+            (
+                ChatSearchCursorSchema(
+                    prefix=row.prefix, score=row.score, value=row.value, id=row.id
+                ),
+                ChatSearchResultSchema(
+                    id=row.id, fullname=row.fullname, username=row.username
+                ),
+            )
+            for row in resource
+        ]
@@ -1,15 +1,24 @@
+from collections.abc import Sequence
+
+from sqlalchemy import Row
 from sqlalchemy.orm import selectinload
 
 from app.core.exceptions import MessageNotFoundError
-from app.db.repositories import ChatRepository, MessageRepository
+from app.db.repositories import MessageRepository
 from app.schemas import (
     AttachmentCreateSchema,
     AttachmentReadSchema,
+    ChatIDSchema,
+    MessageDeleteResultSchema,
+    MessageDeleteSchema,
+    MessageEditResultSchema,
     MessageEditSchema,
     MessageIDSchema,
     MessageReadSchema,
-    UserReadSchema,
+    UserIDSchema,
 )
+from app.utils.cache import ChatListCache, ChatMembersCache
+from app.utils.types import IDType
 
 from .base import BaseService
 
@@ -22,27 +31,72 @@ class MessageService(BaseService):
                 raise MessageNotFoundError
             return MessageReadSchema.model_validate(resource)
 
-    async def edit(self, *, message_schema: MessageEditSchema) -> None:
-        async with self.uow as uow:
-            resource = await uow.messageRepository.get(message_schema)
-            if not resource:
-                raise MessageNotFoundError
+    async def edit(
+        self, *, message_schema: MessageEditSchema, sender_id: IDType | None = None
+    ) -> MessageEditResultSchema:
+        """
+        Edits the message, if sent by `sender_id` when given, and returns it
+        with the chat members to announce it to, in one statement.
+        """
 
-            await uow.messageRepository.update_one(
-                message_schema, content=message_schema.content
+        async with self.uow as uow:
+            generation = ChatMembersCache.generation
+            rows = await uow.messageRepository.edit_returning(
+                message_schema=message_schema, sender_id=sender_id
             )
+            if not rows:
+                raise MessageNotFoundError
 
+            # The message may be the latest one shown in the chat lists.
+            owner_ids = [row.user_id for row in rows if row.user_id]
+            uow.on_commit(lambda: ChatListCache.invalidate(owner_ids=owner_ids))
             await uow.commit()
 
-    async def delete(self, *, message_schema: MessageIDSchema) -> None:
+        message = MessageReadSchema.model_validate(rows[0])
+        return MessageEditResultSchema(
+            message=message,
+            recipients=self.cache_recipients(message.chat_id, rows, generation),
+        )
+
+    async def delete(
+        self, *, message_schema: MessageIDSchema, sender_id: IDType | None = None
+    ) -> MessageDeleteResultSchema:
+        """
+        Deletes the message, if sent by `sender_id` when given, and returns
+        it with the chat members to announce it to, in one statement. The
+        chat summary and unread counts are updated in two more.
+        """
+
         async with self.uow as uow:
-            resource = await uow.messageRepository.get(message_schema)
-            if not resource:
+            generation = ChatMembersCache.generation
+            rows = await uow.messageRepository.delete_returning(
+                message_schema=message_schema, sender_id=sender_id
+            )
+            if not rows:
                 raise MessageNotFoundError
 
-            await uow.messageRepository.delete_one(message_schema)
+            message = MessageDeleteSchema.model_validate(rows[0])
+            chat = ChatIDSchema(id=message.chat_id)
+            await uow.chatRepository.refresh_summary(chat, if_last=message.id)
+            await uow.chatUserRepository.unread_deleted(chat, message=rows[0])
+            owner_ids = [row.user_id for row in rows if row.user_id]
+            uow.on_commit(lambda: ChatListCache.invalidate(owner_ids=owner_ids))
             await uow.commit()
 
+        return MessageDeleteResultSchema(
+            message=message,
+            recipients=self.cache_recipients(message.chat_id, rows, generation),
+        )
+
+    @staticmethod
+    def cache_recipients(
+        chat_id: IDType, rows: Sequence[Row], generation: int
+    ) -> list[IDType]:
+        members = frozenset(row.user_id for row in rows if row.user_id)
+        if members:
+            ChatMembersCache.set(chat_id, members, generation)
+        return list(members)
+
     async def add_attachment(self, *, schema: AttachmentCreateSchema):
         async with self.uow as uow:
             resource = await uow.messageRepository.get(
@@ -63,7 +117,7 @@ class MessageService(BaseService):
     async def get_attachments(
         self, *, message_schema: MessageIDSchema
     ) -> list[AttachmentReadSchema]:
-        async with self.uow as uow:
+        async with self.uow.read_only() as uow:
             resource = await uow.messageRepository.get(
                 message_schema,
                 options=[selectinload(MessageRepository.model_cls.attachments)],
@@ -78,21 +132,13 @@ class MessageService(BaseService):
 
     async def get_users_for_message_in_chat(
         self, *, message_schema: MessageIDSchema
-    ) -> list[UserReadSchema]:
+    ) -> list[UserIDSchema]:
         async with self.uow as uow:
-            resource = await uow.messageRepository.get(
-                message_schema,
-                options=[
-                    selectinload(
-                        MessageRepository.model_cls.chat,
-                    ).selectinload(
-                        ChatRepository.model_cls.users,
-                    ),
-                ],
-            )
+            resource = await uow.messageRepository.get(message_schema)
             if not resource:
                 raise MessageNotFoundError
 
-            return [
-                UserReadSchema.model_validate(model) for model in resource.chat.users
-            ]
+            members = await self.get_chat_member_ids(
+                uow, ChatIDSchema(id=resource.chat_id)
+            )
+            return [UserIDSchema(id=user_id) for user_id in members]
@@ -1,5 +1,7 @@
 from typing import Any
 
+from sqlalchemy import func
+
 from app.core.exceptions import (
     LoginError,
     PasswordVerificationError,
@@ -9,6 +11,7 @@ from app.core.exceptions import (
 )
 from app.db.repositories import UserRepository
 from app.schemas import (
+    ChatSearchResultSchema,
     TokenSchema,
     UserCreateSchema,
     UserIDSchema,
@@ -17,6 +20,9 @@ from app.schemas import (
     UserReadSchema,
     UserRegisterSchema,
 )
+from app.utils.cache import ChatListCache, ChatMembersCache
+from app.utils.purge import Purger
+from app.utils.search import UserSearchIndex
 from app.utils.security import JWTManager, PasswordManager
 
 from .base import BaseService
@@ -46,6 +52,9 @@ class UserAuthService(BaseService):
 
             user = UserReadSchema.model_validate(resource)
 
+        if user.deleted_at:
+            raise LoginError
+
         try:
             PasswordManager.verify_password(loginSchema.password, user.password_hash)
         except PasswordVerificationError as error:
@@ -75,6 +84,11 @@ class UserAuthService(BaseService):
                 raise UserEmailAlreadyRegistered
 
             resource = await uow.userRepository.add_one(userSchema)
+            uow.on_commit(
+                lambda: UserSearchIndex.put(
+                    [ChatSearchResultSchema.model_validate(resource)]
+                )
+            )
             await uow.commit()
             user = UserReadSchema.model_validate(resource)
 
@@ -85,11 +99,32 @@ class UserAuthService(BaseService):
     ) -> None:
         async with self.uow as uow:
             resource = await uow.userRepository.get(idSchema)
-            if not resource:
+            if not resource or resource.deleted_at:
                 raise UserNotFoundError
 
             user = UserReadSchema.model_validate(resource)
             PasswordManager.verify_password(passwordSchema.password, user.password_hash)
 
-            await uow.userRepository.delete_one(idSchema)
+            # Hiding the chats right away leaves the user no chat to post in,
+            # even with tokens that have not expired yet. Only a batch is
+            # hidden here, so that the request does not lock every chat of
+            # the user, the rest are hidden by the purge. The chats, messages
+            # and the user row itself are deleted in the background, the
+            # chats first, see Purger.purge_account.
+            await uow.userRepository.update_one(idSchema, deleted_at=func.now())
+            chat_ids = await uow.chatUserRepository.hide_user_chats(
+                idSchema, count=Purger.settings.BATCH_SIZE
+            )
+            uow.on_commit(
+                lambda: ChatMembersCache.invalidate(
+                    chat_ids=list(chat_ids), user_ids=[idSchema.id]
+                )
+            )
+            uow.on_commit(
+                lambda: ChatListCache.invalidate(
+                    owner_ids=[idSchema.id], user_ids=[idSchema.id]
+                )
+            )
+            uow.on_commit(lambda: UserSearchIndex.remove([idSchema.id]))
+            uow.on_commit(lambda: Purger.enqueue_account(idSchema, chat_ids))
             await uow.commit()
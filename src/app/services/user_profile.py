@@ -2,12 +2,15 @@ from sqlalchemy.exc import IntegrityError
 
 from app.core.exceptions import UserNameAlreadyRegistered, UserNotFoundError
 from app.schemas import (
+    ChatSearchResultSchema,
     UserFullNameSchema,
     UserIDSchema,
     UserProfileSchema,
     UserReadSchema,
     UserUserNameSchema,
 )
+from app.utils.cache import ChatListCache
+from app.utils.search import UserSearchIndex
 
 from .base import BaseService
 
@@ -16,7 +19,7 @@ class UserProfileService(BaseService):
     async def get_user(self, *, idSchema: UserIDSchema) -> UserProfileSchema:
         async with self.uow as uow:
             resource = await uow.userRepository.get(idSchema)
-            if not resource:
+            if not resource or resource.deleted_at:
                 raise UserNotFoundError
             user = UserReadSchema.model_validate(resource)
             return UserProfileSchema(
@@ -30,7 +33,7 @@ class UserProfileService(BaseService):
     ) -> None:
         async with self.uow as uow:
             user = await uow.userRepository.get(idSchema)
-            if not user:
+            if not user or user.deleted_at:
                 raise UserNotFoundError
 
             try:
@@ -40,6 +43,13 @@ class UserProfileService(BaseService):
             except IntegrityError as error:
                 raise UserNameAlreadyRegistered from error
 
+            result = ChatSearchResultSchema(
+                id=user.id,
+                fullname=user.fullname,
+                username=new_username_schema.username,
+            )
+            uow.on_commit(lambda: UserSearchIndex.put([result]))
+            uow.on_commit(lambda: ChatListCache.invalidate(user_ids=[idSchema.id]))
             await uow.commit()
 
     async def edit_fullname(
@@ -47,11 +57,18 @@ class UserProfileService(BaseService):
     ) -> None:
         async with self.uow as uow:
             user = await uow.userRepository.get(idSchema)
-            if not user:
+            if not user or user.deleted_at:
                 raise UserNotFoundError
 
             await uow.userRepository.update_one(
                 idSchema, fullname=new_fullname_schema.fullname
             )
 
+            result = ChatSearchResultSchema(
+                id=user.id,
+                fullname=new_fullname_schema.fullname,
+                username=user.username,
+            )
+            uow.on_commit(lambda: UserSearchIndex.put([result]))
+            uow.on_commit(lambda: ChatListCache.invalidate(user_ids=[idSchema.id]))
             await uow.commit()
@@ -0,0 +1,13 @@
+__all__ = [
+    "ChatListCache",
+    "ChatMembersCache",
+    "LRUCache",
+    "PrimaryPins",
+    "ReadMarkerBuffer",
+]
+
+from .chat_lists import ChatListCache
+from .chat_members import ChatMembersCache
+from .lru import LRUCache
+from .primary_pins import PrimaryPins
+from .read_markers import ReadMarkerBuffer
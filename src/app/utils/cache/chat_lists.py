@@ -0,0 +1,163 @@
+import time
+
+from app.core.config import CacheConfig
+from app.core.exceptions import InstantiationNotAllowedError
+from app.core.logger import root_logger
+from app.interfaces.utils.broker import AbstractBroker
+from app.schemas import CacheInvalidationSchema, CacheStatsSchema, ChatInfoPageSchema
+from app.utils.types import IDType
+
+from .lru import LRUCache
+
+logger = root_logger.getChild("utils.cache.chat_lists")
+
+
+class ChatListCache:
+    """
+    Process-wide cache of the first page of chat lists, keyed by the user.
+
+    A list is dropped when a chat of the user is created or left, a message
+    in one of them is sent, edited, deleted or read, and when the other
+    member of one of them is renamed or deleted. Invalidations are applied
+    locally right away and, when shared, published through the broker so
+    that every worker drops its own copy.
+
+    Lists are read from replicas when there are any. A replica may not have
+    caught up with the change that invalidated a list yet, so lists of users
+    invalidated within the replica lag are not stored.
+    """
+
+    name = "chat_lists"
+    cache: LRUCache[IDType, tuple[int | None, ChatInfoPageSchema]] = LRUCache(
+        max_size=10_000, ttl=60
+    )
+
+    settings: CacheConfig = CacheConfig()
+    broker: AbstractBroker | None = None
+
+    # Lists being read from the database, by user. Invalidations drop the
+    # users' tokens, so that lists read before them are not stored after.
+    loading: dict[IDType, object] = {}
+
+    # Owners invalidated within the replica lag, and the time of the latest
+    # invalidation by member, which may concern any owner.
+    replica_lag: float = 0
+    recent: LRUCache[IDType, bool] = LRUCache(max_size=10_000)
+    members_invalidated_at = 0.0
+
+    def __init__(self) -> None:
+        raise InstantiationNotAllowedError(self.__class__.__name__)
+
+    @classmethod
+    async def start(
+        cls, broker: AbstractBroker, settings: CacheConfig, replica_lag: float = 0
+    ) -> None:
+        cls.settings = settings
+        cls.cache = LRUCache(
+            max_size=settings.CHAT_LISTS_MAX_SIZE,
+            ttl=settings.CHAT_LISTS_TTL_SECONDS,
+        )
+        cls.loading = {}
+        cls.replica_lag = replica_lag
+        cls.recent = LRUCache(max_size=settings.CHAT_LISTS_MAX_SIZE, ttl=replica_lag)
+        cls.members_invalidated_at = 0.0
+        cls.broker = broker
+        await broker.subscribe(settings.BROKER_CHANNEL, cls.receive_invalidation)
+
+    @classmethod
+    def enabled(cls) -> bool:
+        return cls.cache.max_size > 0
+
+    @classmethod
+    def get(cls, user_id: IDType, count: int | None) -> ChatInfoPageSchema | None:
+        entry = cls.cache.get(user_id)
+        if entry is None:
+            return None
+
+        cached_count, page = entry
+        return page if cached_count == count else None
+
+    @classmethod
+    def begin(cls, user_id: IDType) -> object:
+        """
+        Returns the token to store the list of the user with, taken before it
+        is read from the database.
+        """
+
+        token = cls.loading[user_id] = object()
+        return token
+
+    @classmethod
+    def set(
+        cls, user_id: IDType, count: int | None, page: ChatInfoPageSchema, token: object
+    ) -> None:
+        """
+        Stores a list read from the database when it was not invalidated
+        since `token` was taken, nor within the replica lag before.
+        """
+
+        if cls.loading.get(user_id) is not token:
+            return
+
+        del cls.loading[user_id]
+        if cls.replica_lag and (
+            cls.recent.get(user_id)
+            or time.monotonic() - cls.members_invalidated_at < cls.replica_lag
+        ):
+            return
+        cls.cache.set(user_id, (count, page))
+
+    @classmethod
+    async def invalidate(
+        cls,
+        *,
+        owner_ids: list[IDType] | None = None,
+        user_ids: list[IDType] | None = None,
+    ) -> None:
+        """
+        Drops the lists of the given owners and every list with a chat with
+        the given users.
+        """
+
+        if not cls.enabled():
+            return
+
+        schema = CacheInvalidationSchema(
+            cache=cls.name, owner_ids=owner_ids or [], user_ids=user_ids or []
+        )
+        cls.apply_invalidation(schema)
+
+        if cls.broker and cls.settings.CHAT_LISTS_SHARED:
+            await cls.broker.publish(
+                cls.settings.BROKER_CHANNEL, schema.model_dump_json()
+            )
+
+    @classmethod
+    async def receive_invalidation(cls, payload: str) -> None:
+        schema = CacheInvalidationSchema.model_validate_json(payload)
+        if schema.cache == cls.name:
+            cls.apply_invalidation(schema)
+
+    @classmethod
+    def apply_invalidation(cls, schema: CacheInvalidationSchema) -> None:
+        for owner_id in schema.owner_ids:
+            cls.cache.pop(owner_id)
+            cls.loading.pop(owner_id, None)
+            if cls.replica_lag:
+                cls.recent.set(owner_id, True)
+
+        if schema.user_ids:
+            # Only happens on renames and account deletion, a scan is cheap
+            # enough. Lists being read may have a chat with the users too.
+            user_ids = set(schema.user_ids)
+            for owner_id, (_, page) in cls.cache.items():
+                if any(chat.id in user_ids for chat in page.chats):
+                    cls.cache.pop(owner_id)
+            cls.loading.clear()
+            cls.members_invalidated_at = time.monotonic()
+
+        logger.debug(f"invalidated {schema.owner_ids} lists, {schema.user_ids} users")
+
+    @classmethod
+    def stats(cls) -> CacheStatsSchema:
+        return cls.cache.stats(cls.name)
@@ -0,0 +1,104 @@
+from app.core.config import CacheConfig
+from app.core.exceptions import InstantiationNotAllowedError
+from app.core.logger import root_logger
+from app.interfaces.utils.broker import AbstractBroker
+from app.schemas import CacheInvalidationSchema, CacheStatsSchema
+from app.utils.types import IDType
+
+from .lru import LRUCache
+
+logger = root_logger.getChild("utils.cache.chat_members")
+
+
+class ChatMembersCache:
+    """
+    Process-wide cache of chat member ids, used to find announcement
+    recipients and check membership without a database round trip.
+
+    Invalidations are applied locally right away and published through the
+    broker, so that every worker drops its own copy.
+    """
+
+    name = "chat_members"
+    cache: LRUCache[IDType, frozenset[IDType]] = LRUCache(max_size=10_000, ttl=300)
+
+    settings: CacheConfig = CacheConfig()
+    broker: AbstractBroker | None = None
+
+    # Bumped on every invalidation. Values read from the database before an
+    # invalidation must not be stored after it.
+    generation = 0
+
+    def __init__(self) -> None:
+        raise InstantiationNotAllowedError(self.__class__.__name__)
+
+    @classmethod
+    async def start(cls, broker: AbstractBroker, settings: CacheConfig) -> None:
+        cls.settings = settings
+        cls.cache = LRUCache(
+            max_size=settings.CHAT_MEMBERS_MAX_SIZE,
+            ttl=settings.CHAT_MEMBERS_TTL_SECONDS,
+        )
+        cls.broker = broker
+        await broker.subscribe(settings.BROKER_CHANNEL, cls.receive_invalidation)
+
+    @classmethod
+    def get(cls, chat_id: IDType) -> frozenset[IDType] | None:
+        return cls.cache.get(chat_id)
+
+    @classmethod
+    def set(cls, chat_id: IDType, members: frozenset[IDType], generation: int):
+        """
+        Stores members read from the database when no invalidation happened
+        since `generation` was taken.
+        """
+
+        if generation == cls.generation:
+            cls.cache.set(chat_id, members)
+
+    @classmethod
+    async def invalidate(
+        cls,
+        *,
+        chat_ids: list[IDType] | None = None,
+        user_ids: list[IDType] | None = None,
+    ) -> None:
+        """
+        Drops the given chats and every chat of the given users.
+        """
+
+        schema = CacheInvalidationSchema(
+            cache=cls.name, chat_ids=chat_ids or [], user_ids=user_ids or []
+        )
+        cls.apply_invalidation(schema)
+
+        if cls.broker:
+            await cls.broker.publish(
+                cls.settings.BROKER_CHANNEL, schema.model_dump_json()
+            )
+
+    @classmethod
+    async def receive_invalidation(cls, payload: str) -> None:
+        schema = CacheInvalidationSchema.model_validate_json(payload)
+        if schema.cache == cls.name:
+            cls.apply_invalidation(schema)
+
+    @classmethod
+    def apply_invalidation(cls, schema: CacheInvalidationSchema) -> None:
+        cls.generation += 1
+
+        for chat_id in schema.chat_ids:
+            cls.cache.pop(chat_id)
+
+        if schema.user_ids:
+            # Only happens on account deletion, a scan is cheap enough.
+            user_ids = set(schema.user_ids)
+            for chat_id, members in cls.cache.items():
+                if not user_ids.isdisjoint(members):
+                    cls.cache.pop(chat_id)
+
+        logger.debug(f"invalidated {schema.chat_ids} chats, {schema.user_ids} users")
+
+    @classmethod
+    def stats(cls) -> CacheStatsSchema:
+        return cls.cache.stats(cls.name)
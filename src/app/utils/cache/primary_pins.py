@@ -0,0 +1,80 @@
+import time
+
+from app.core.config import CacheConfig
+from app.core.exceptions import InstantiationNotAllowedError
+from app.core.logger import root_logger
+from app.interfaces.utils.broker import AbstractBroker
+from app.schemas import CacheInvalidationSchema, CacheStatsSchema
+from app.utils.types import IDType
+
+from .lru import LRUCache
+
+logger = root_logger.getChild("utils.cache.primary_pins")
+
+
+class PrimaryPins:
+    """
+    Users whose reads stay on the primary for a while after they commit, so
+    that a lagging replica does not hide their own writes from any of their
+    clients, on any worker.
+
+    Pins are published through the broker at most once per user and pin
+    period, and last two periods on receipt, so that every commit is
+    covered for a whole period wherever the next request lands.
+    """
+
+    name = "primary_pins"
+    seconds: float = 0
+    # Time each user is pinned until, by the monotonic clock of the worker.
+    pins: LRUCache[IDType, float] = LRUCache(max_size=100_000)
+    # Users whose pin was published within the last period.
+    published: LRUCache[IDType, bool] = LRUCache(max_size=100_000)
+
+    settings: CacheConfig = CacheConfig()
+    broker: AbstractBroker | None = None
+
+    def __init__(self) -> None:
+        raise InstantiationNotAllowedError(self.__class__.__name__)
+
+    @classmethod
+    async def start(
+        cls, broker: AbstractBroker, settings: CacheConfig, seconds: float
+    ) -> None:
+        cls.settings = settings
+        cls.seconds = seconds
+        cls.pins = LRUCache(max_size=settings.PRIMARY_PINS_MAX_SIZE)
+        cls.published = LRUCache(max_size=settings.PRIMARY_PINS_MAX_SIZE, ttl=seconds)
+        cls.broker = broker
+        await broker.subscribe(settings.BROKER_CHANNEL, cls.receive_invalidation)
+
+    @classmethod
+    def is_pinned(cls, user_id: IDType) -> bool:
+        until = cls.pins.get(user_id)
+        return until is not None and until > time.monotonic()
+
+    @classmethod
+    async def pin(cls, user_id: IDType) -> None:
+        cls._extend(user_id, cls.seconds)
+        if not cls.broker or cls.published.get(user_id):
+            return
+
+        cls.published.set(user_id, True)
+        schema = CacheInvalidationSchema(cache=cls.name, owner_ids=[user_id])
+        await cls.broker.publish(cls.settings.BROKER_CHANNEL, schema.model_dump_json())
+
+    @classmethod
+    async def receive_invalidation(cls, payload: str) -> None:
+        schema = CacheInvalidationSchema.model_validate_json(payload)
+        if schema.cache == cls.name:
+            for user_id in schema.owner_ids:
+                cls._extend(user_id, 2 * cls.seconds)
+            logger.debug(f"pinned {schema.owner_ids}")
+
+    @classmethod
+    def _extend(cls, user_id: IDType, seconds: float) -> None:
+        until = time.monotonic() + seconds
+        cls.pins.set(user_id, max(until, cls.pins.get(user_id) or 0))
+
+    @classmethod
+    def stats(cls) -> CacheStatsSchema:
+        return cls.pins.stats(cls.name)
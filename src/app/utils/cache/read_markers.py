@@ -0,0 +1,126 @@
+import asyncio
+
+from app.core.config import CacheConfig
+from app.core.exceptions import InstantiationNotAllowedError
+from app.core.logger import root_logger
+from app.interfaces.utils.uow import AbstractAsyncUnitOfWork
+from app.schemas import ChatReadMarkerSchema, ReadMarkerStatsSchema
+from app.utils.types import IDType
+
+from .chat_lists import ChatListCache
+
+logger = root_logger.getChild("utils.cache.read_markers")
+
+
+class ReadMarkerBuffer:
+    """
+    Write-behind buffer of read markers. The messages marked read by a chat
+    member are kept until the next flush, which moves every marker to the
+    latest of them in a single statement, so that a client marking messages
+    read while scrolling does not cost an UPDATE per message.
+
+    Markers only move forward, whichever worker flushes last. Markers that
+    fail to be written are kept for the next flush. Stopping waits for a
+    flush in progress and flushes once more. Markers pending in a worker
+    that dies without flushing are lost, clients mark the messages read
+    again when they are next shown.
+    """
+
+    settings: CacheConfig = CacheConfig()
+    uow: AbstractAsyncUnitOfWork | None = None
+
+    # Messages marked read per (chat_id, user_id).
+    pending: dict[tuple[IDType, IDType], set[IDType]] = {}
+    flusher: asyncio.Task | None = None
+    stopping = False
+    _full = asyncio.Event()
+
+    received = 0
+    flushes = 0
+    moved = 0
+
+    def __init__(self) -> None:
+        raise InstantiationNotAllowedError(self.__class__.__name__)
+
+    @classmethod
+    async def start(cls, settings: CacheConfig, uow: AbstractAsyncUnitOfWork) -> None:
+        cls.settings = settings
+        cls.uow = uow
+        cls.pending = {}
+        cls.stopping = False
+        cls._full = asyncio.Event()
+        cls.flusher = asyncio.create_task(cls.flush_loop())
+
+    @classmethod
+    async def stop(cls) -> None:
+        flusher, cls.flusher = cls.flusher, None
+        if flusher:
+            cls.stopping = True
+            cls._full.set()
+            await flusher
+        await cls.flush()
+
+    @classmethod
+    def put(cls, marker: ChatReadMarkerSchema) -> None:
+        cls.received += 1
+        cls.pending.setdefault((marker.chat_id, marker.user_id), set()).add(
+            marker.message_id
+        )
+        if len(cls.pending) >= cls.settings.READ_MARKERS_MAX_PENDING:
+            cls._full.set()
+
+    @classmethod
+    async def flush_loop(cls) -> None:
+        while True:
+            try:
+                await asyncio.wait_for(
+                    cls._full.wait(), cls.settings.READ_MARKERS_FLUSH_INTERVAL_SECONDS
+                )
+            except TimeoutError:
+                pass
+
+            if cls.stopping:
+                return
+            cls._full.clear()
+            await cls.flush()
+
+    @classmethod
+    async def flush(cls) -> None:
+        if not cls.pending or not cls.uow:
+            return
+
+        pending, cls.pending = cls.pending, {}
+        markers = [
+            ChatReadMarkerSchema(
+                chat_id=chat_id, user_id=user_id, message_id=message_id
+            )
+            for (chat_id, user_id), message_ids in pending.items()
+            for message_id in message_ids
+        ]
+
+        try:
+            async with cls.uow as uow:
+                moved = await uow.chatUserRepository.move_read_markers(markers)
+                await uow.commit()
+        except Exception:
+            logger.exception(f"error writing {len(pending)} read markers, retrying")
+            for key, message_ids in pending.items():
+                cls.pending.setdefault(key, set()).update(message_ids)
+            return
+
+        cls.flushes += 1
+        cls.moved += moved
+        if moved:
+            await ChatListCache.invalidate(
+                owner_ids=list({user_id for _, user_id in pending})
+            )
+        logger.debug(f"moved {moved} of {len(pending)} read markers")
+
+    @classmethod
+    def stats(cls) -> ReadMarkerStatsSchema:
+        return ReadMarkerStatsSchema(
+            pending=len(cls.pending),
+            received=cls.received,
+            flushes=cls.flushes,
+            moved=cls.moved,
+        )
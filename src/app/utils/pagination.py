@@ -0,0 +1,28 @@
+import base64
+import binascii
+
+from pydantic import BaseModel
+
+from app.core.exceptions import InstantiationNotAllowedError, InvalidCursorError
+
+
+class CursorManager:
+    """
+    Encodes positions in ordered results as opaque page cursors for clients.
+    """
+
+    def __init__(self) -> None:
+        raise InstantiationNotAllowedError(self.__class__.__name__)
+
+    @classmethod
+    def encode(cls, schema: BaseModel) -> str:
+        data = schema.model_dump_json().encode("utf-8")
+        return base64.urlsafe_b64encode(data).decode("ascii")
+
+    @classmethod
+    def decode[T: BaseModel](cls, cursor: str, schema_cls: type[T]) -> T:
+        try:
+            data = base64.urlsafe_b64decode(cursor.encode("ascii"))
+            return schema_cls.model_validate_json(data)
+        except (ValueError, binascii.Error) as e:
+            raise InvalidCursorError from e
@@ -0,0 +1,5 @@
+__all__ = [
+    "Purger",
+]
+
+from .purger import Purger
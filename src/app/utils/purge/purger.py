@@ -0,0 +1,257 @@
+import asyncio
+from collections.abc import Sequence
+from itertools import batched
+from typing import Any
+
+from app.core.config import PurgeConfig
+from app.core.exceptions import InstantiationNotAllowedError
+from app.core.logger import root_logger
+from app.interfaces.utils.uow import AbstractAsyncUnitOfWork
+from app.schemas import (
+    ChatIDSchema,
+    PurgeJobType,
+    PurgeProgressSchema,
+    PurgeStatsSchema,
+    UserIDSchema,
+)
+from app.utils.cache import ChatMembersCache
+from app.utils.types import IDType
+
+logger = root_logger.getChild("utils.purge.purger")
+
+
+class Purger:
+    """
+    Deletes left chats and deleted accounts in the background, one job at a
+    time and a bounded batch of rows per transaction, so that neither loads
+    nor locks all of their rows at once.
+
+    A left chat has no members and is hidden from both users until it is
+    purged. A deleted account has `deleted_at` set and a batch of its chats
+    hidden in the same transaction, the rest are hidden when it is purged and
+    all of them are purged before the user row is deleted. Both markers
+    are committed before the job is queued, so jobs interrupted by a
+    restart are found and queued again on start.
+
+    Objects of deleted attachments are removed from S3 in batches once the
+    deletion is committed.
+    """
+
+    settings: PurgeConfig = PurgeConfig()
+    uow: AbstractAsyncUnitOfWork | None = None
+    s3: Any = None
+    bucket = ""
+
+    queue: asyncio.Queue[tuple[PurgeJobType, IDType]] = asyncio.Queue()
+    queued: set[tuple[PurgeJobType, IDType]] = set()
+    worker: asyncio.Task | None = None
+    cleanups: set[asyncio.Task] = set()
+
+    current: PurgeProgressSchema | None = None
+    purged_accounts = 0
+    purged_chats = 0
+    purged_messages = 0
+    deleted_objects = 0
+
+    def __init__(self) -> None:
+        raise InstantiationNotAllowedError(self.__class__.__name__)
+
+    @classmethod
+    async def start(
+        cls,
+        settings: PurgeConfig,
+        uow: AbstractAsyncUnitOfWork,
+        s3: Any,
+        bucket: str,
+    ) -> None:
+        cls.settings = settings
+        cls.uow = uow
+        cls.s3 = s3
+        cls.bucket = bucket
+        cls.queue = asyncio.Queue()
+        cls.queued = set()
+
+        async with uow:
+            chat_ids = await uow.chatRepository.get_hidden_ids()
+            user_ids = await uow.userRepository.get_deleted_ids()
+
+        for chat_id in chat_ids:
+            await cls.enqueue_chat(ChatIDSchema(id=chat_id))
+        for user_id in user_ids:
+            await cls.enqueue_account(UserIDSchema(id=user_id))
+        if chat_ids or user_ids:
+            logger.info(
+                f"resuming purge of {len(chat_ids)} chats and {len(user_ids)} accounts"
+            )
+
+        cls.worker = asyncio.create_task(cls.work_loop())
+
+    @classmethod
+    async def stop(cls) -> None:
+        worker, cls.worker = cls.worker, None
+        if worker:
+            worker.cancel()
+
+        # Committed deletions leave orphaned objects if their cleanup is
+        # cancelled.
+        await asyncio.gather(*cls.cleanups, return_exceptions=True)
+
+    @classmethod
+    async def enqueue_chat(cls, chat: ChatIDSchema) -> None:
+        """
+        Queues a chat without members for purging.
+        """
+
+        cls._enqueue(("chat", chat.id))
+
+    @classmethod
+    async def enqueue_account(
+        cls, user: UserIDSchema, chat_ids: Sequence[IDType] = ()
+    ) -> None:
+        """
+        Queues an account marked deleted for purging, after the chats hidden
+        along with it.
+        """
+
+        for chat_id in chat_ids:
+            cls._enqueue(("chat", chat_id))
+        cls._enqueue(("account", user.id))
+
+    @classmethod
+    def _enqueue(cls, job: tuple[PurgeJobType, IDType]) -> None:
+        if job not in cls.queued:
+            cls.queued.add(job)
+            cls.queue.put_nowait(job)
+
+    @classmethod
+    async def enqueue_attachments(cls, attachment_ids: Sequence[IDType]) -> None:
+        """
+        Removes the objects of deleted attachments from S3 in the background.
+        """
+
+        if not attachment_ids:
+            return
+
+        task = asyncio.create_task(cls.delete_objects(attachment_ids))
+        cls.cleanups.add(task)
+        task.add_done_callback(cls.cleanups.discard)
+
+    @classmethod
+    async def work_loop(cls) -> None:
+        while True:
+            job = await cls.queue.get()
+            job_type, job_id = job
+            cls.current = PurgeProgressSchema(job_type=job_type, id=job_id)
+            try:
+                if job_type == "chat":
+                    await cls.purge_chat(ChatIDSchema(id=job_id))
+                else:
+                    await cls.purge_account(UserIDSchema(id=job_id))
+            except asyncio.CancelledError:
+                raise
+            except Exception:
+                logger.exception(
+                    f"{job_type} {job_id} - error purging, retried on start"
+                )
+            finally:
+                cls.queued.discard(job)
+                cls.current = None
+
+    @classmethod
+    async def purge_account(cls, user: UserIDSchema) -> None:
+        assert cls.uow is not None
+
+        while True:
+            async with cls.uow as uow:
+                chat_ids = await uow.chatUserRepository.hide_user_chats(
+                    user, count=cls.settings.BATCH_SIZE
+                )
+                await uow.commit()
+
+            if not chat_ids:
+                break
+
+            await ChatMembersCache.invalidate(chat_ids=list(chat_ids))
+            for chat_id in chat_ids:
+                await cls.purge_chat(ChatIDSchema(id=chat_id))
+
+        # Every message of the user was in one of the purged chats.
+        async with cls.uow as uow:
+            await uow.userRepository.delete_one(user)
+            await uow.commit()
+
+        cls.purged_accounts += 1
+        chats = cls.current.chats if cls.current else 0
+        logger.info(f"{user.id} - purged account and {chats} chats")
+
+    @classmethod
+    async def purge_chat(cls, chat: ChatIDSchema) -> None:
+        assert cls.uow is not None
+
+        messages = 0
+        while True:
+            async with cls.uow as uow:
+                rows = await uow.messageRepository.delete_batch(
+                    chat_id_schema=chat, count=cls.settings.BATCH_SIZE
+                )
+                await uow.commit()
+
+            if not rows:
+                break
+
+            deleted = len({message_id for message_id, _ in rows})
+            messages += deleted
+            cls.purged_messages += deleted
+            if cls.current:
+                cls.current.messages += deleted
+
+            await cls.delete_objects(
+                [attachment_id for _, attachment_id in rows if attachment_id]
+            )
+            await asyncio.sleep(cls.settings.BATCH_PAUSE_SECONDS)
+
+        # Messages locked by a purge in another worker are deleted by the
+        # cascade, once that purge commits.
+        async with cls.uow as uow:
+            await uow.chatRepository.delete_one(chat)
+            await uow.commit()
+
+        cls.purged_chats += 1
+        if cls.current:
+            cls.current.chats += 1
+        logger.info(f"{chat.id} - purged {messages} messages")
+
+    @classmethod
+    async def delete_objects(cls, attachment_ids: Sequence[IDType]) -> None:
+        for keys in batched(attachment_ids, cls.settings.S3_DELETE_BATCH_SIZE):
+            try:
+                response = await asyncio.to_thread(
+                    cls.s3.delete_objects,
+                    Bucket=cls.bucket,
+                    Delete={
+                        "Objects": [{"Key": str(key)} for key in keys],
+                        "Quiet": True,
+                    },
+                )
+            except Exception:
+                logger.exception(f"error deleting {len(keys)} objects")
+                continue
+
+            errors = response.get("Errors", [])
+            if errors:
+                logger.warning(f"{len(errors)} of {len(keys)} objects not deleted")
+            cls.deleted_objects += len(keys) - len(errors)
+
+    @classmethod
+    def stats(cls) -> PurgeStatsSchema:
+        return PurgeStatsSchema(
+            queued_chats=sum(1 for job_type, _ in cls.queued if job_type == "chat"),
+            queued_accounts=sum(
+                1 for job_type, _ in cls.queued if job_type == "account"
+            ),
+            current=cls.current,
+            purged_accounts=cls.purged_accounts,
+            purged_chats=cls.purged_chats,
+            purged_messages=cls.purged_messages,
+            deleted_objects=cls.deleted_objects,
+        )
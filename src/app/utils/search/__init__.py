@@ -0,0 +1,9 @@
+__all__ = [
+    "NGramIndex",
+    "UserSearchIndex",
+    "trigram_similarity",
+    "trigrams",
+]
+
+from .ngram import NGramIndex, trigram_similarity, trigrams
+from .users import UserSearchIndex
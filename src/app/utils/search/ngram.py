@@ -0,0 +1,97 @@
+import re
+from collections import defaultdict
+from collections.abc import Collection
+
+
+def trigrams(value: str) -> set[str]:
+    """
+    Returns the trigrams of a string the way pg_trgm extracts them: from
+    each lowercased alphanumeric word padded with two spaces in front and
+    one behind.
+    """
+
+    grams: set[str] = set()
+    for word in re.findall(r"[^\W_]+", value.lower()):
+        padded = f"  {word} "
+        grams.update(padded[i : i + 3] for i in range(len(padded) - 2))
+    return grams
+
+
+def trigram_similarity(a: set[str], b: set[str]) -> float:
+    """
+    Similarity of two trigram sets as computed by pg_trgm `similarity`.
+    """
+
+    if not a or not b:
+        return 0.0
+    shared = len(a & b)
+    return shared / (len(a) + len(b) - shared)
+
+
+class NGramIndex[K]:
+    """
+    Substring index of short lowercased strings over their n-grams of length
+    1 to `n`.
+
+    Terms up to `n` characters long are answered by a single posting set.
+    Longer ones check the values of the smallest posting set of their
+    n-grams.
+    """
+
+    def __init__(self, n: int = 3) -> None:
+        self.n = n
+        self.values: dict[K, str] = {}
+        self._postings: defaultdict[str, set[K]] = defaultdict(set)
+
+    def __len__(self) -> int:
+        return len(self.values)
+
+    def _grams(self, value: str) -> set[str]:
+        return {
+            value[i : i + size]
+            for size in range(1, self.n + 1)
+            for i in range(len(value) - size + 1)
+        }
+
+    def add(self, key: K, value: str) -> None:
+        self.remove(key)
+        value = value.lower()
+        self.values[key] = value
+        for gram in self._grams(value):
+            self._postings[gram].add(key)
+
+    def remove(self, key: K) -> None:
+        value = self.values.pop(key, None)
+        if value is None:
+            return
+
+        for gram in self._grams(value):
+            postings = self._postings[gram]
+            postings.discard(key)
+            if not postings:
+                del self._postings[gram]
+
+    def search(self, term: str, candidates: Collection[K] | None = None) -> set[K]:
+        """
+        Returns keys of the values containing `term`. Only `candidates` are
+        checked when given, which must include every such key.
+        """
+
+        term = term.lower()
+        if candidates is None:
+            if not term:
+                return set(self.values)
+            if len(term) <= self.n:
+                return set(self._postings.get(term, ()))
+
+            candidates = min(
+                (
+                    self._postings.get(term[i : i + self.n], set())
+                    for i in range(len(term) - self.n + 1)
+                ),
+                key=len,
+            )
+
+        return {
+            key for key in candidates if key in self.values and term in self.values[key]
+        }
@@ -0,0 +1,246 @@
+import asyncio
+import heapq
+from collections.abc import Sequence
+
+from sqlalchemy import Row
+
+from app.core.config import SearchConfig
+from app.core.exceptions import InstantiationNotAllowedError
+from app.core.logger import root_logger
+from app.interfaces.utils.broker import AbstractBroker
+from app.interfaces.utils.uow import AbstractAsyncUnitOfWork
+from app.schemas import (
+    CacheStatsSchema,
+    ChatSearchByType,
+    ChatSearchCursorSchema,
+    ChatSearchResultSchema,
+    UserIDSchema,
+    UserSearchUpdateSchema,
+)
+from app.utils.cache import LRUCache
+from app.utils.types import IDType
+
+from .ngram import NGramIndex, trigram_similarity, trigrams
+
+logger = root_logger.getChild("utils.search.users")
+
+type SearchKey = tuple[bool, float, str, IDType]
+
+
+class UserSearchIndex:
+    """
+    Optional in-memory index of user names serving user search without the
+    database. Loaded on start and kept current by publishing every change
+    through the broker, so that every worker applies it.
+
+    Results are ordered like UserRepository.search with pg_trgm, although
+    only names containing the search string match.
+
+    Matches of recent search strings are kept, and a string extending one
+    of them (typing "ab", then "abc") only checks the previous matches.
+
+    Loading, updates and searches scale with the number of users, so they
+    run in a thread to keep the event loop responsive, one at a time since
+    they share the index.
+    """
+
+    name = "user_search"
+    settings: SearchConfig = SearchConfig()
+    broker: AbstractBroker | None = None
+
+    ready = False
+    users: dict[IDType, ChatSearchResultSchema] = {}
+    indexes: dict[ChatSearchByType, NGramIndex[IDType]] = {}
+    trigrams: dict[ChatSearchByType, dict[IDType, set[str]]] = {}
+    matches: LRUCache[tuple[ChatSearchByType, str], frozenset[IDType]] = LRUCache(
+        max_size=1024
+    )
+
+    # Updates received while loading, applied after the loaded users.
+    _queued: list[UserSearchUpdateSchema] | None = None
+    _lock = asyncio.Lock()
+
+    def __init__(self) -> None:
+        raise InstantiationNotAllowedError(self.__class__.__name__)
+
+    @classmethod
+    async def start(
+        cls,
+        broker: AbstractBroker,
+        settings: SearchConfig,
+        uow: AbstractAsyncUnitOfWork,
+    ) -> None:
+        cls.settings = settings
+        if not settings.USER_INDEX_ENABLED:
+            return
+
+        cls.broker = broker
+        cls.users = {}
+        cls.indexes = {by: NGramIndex() for by in ChatSearchByType}
+        cls.trigrams = {by: {} for by in ChatSearchByType}
+        cls.matches = LRUCache(max_size=settings.USER_INDEX_MATCHES_SIZE)
+        cls._lock = asyncio.Lock()
+
+        await broker.subscribe(settings.BROKER_CHANNEL, cls.receive_update)
+
+        cls._queued = []
+        async with uow:
+            rows = await uow.userRepository.get_names()
+
+        # Nothing else touches the index until it is ready, updates are
+        # queued meanwhile.
+        await asyncio.to_thread(cls._load, rows)
+        for schema in cls._queued:
+            cls._apply(schema)
+        cls._queued = None
+
+        cls.ready = True
+        logger.info(f"loaded {len(cls.users)} users")
+
+    @classmethod
+    async def put(cls, users: list[ChatSearchResultSchema]) -> None:
+        await cls.update(UserSearchUpdateSchema(users=users))
+
+    @classmethod
+    async def remove(cls, user_ids: list[IDType]) -> None:
+        await cls.update(UserSearchUpdateSchema(removed=user_ids))
+
+    @classmethod
+    async def update(cls, schema: UserSearchUpdateSchema) -> None:
+        """
+        Applies the change locally right away and publishes it to the other
+        workers.
+        """
+
+        if not cls.settings.USER_INDEX_ENABLED:
+            return
+
+        await cls.apply_update(schema)
+        if cls.broker:
+            await cls.broker.publish(
+                cls.settings.BROKER_CHANNEL, schema.model_dump_json()
+            )
+
+    @classmethod
+    async def receive_update(cls, payload: str) -> None:
+        await cls.apply_update(UserSearchUpdateSchema.model_validate_json(payload))
+
+    @classmethod
+    async def apply_update(cls, schema: UserSearchUpdateSchema) -> None:
+        if cls._queued is not None:
+            cls._queued.append(schema)
+            return
+
+        async with cls._lock:
+            await asyncio.to_thread(cls._apply, schema)
+
+    @classmethod
+    def _load(cls, rows: Sequence[Row[tuple[IDType, str, str]]]) -> None:
+        for row in rows:
+            cls._put(
+                ChatSearchResultSchema(
+                    id=row.id, fullname=row.fullname, username=row.username
+                )
+            )
+
+    @classmethod
+    def _apply(cls, schema: UserSearchUpdateSchema) -> None:
+        for user in schema.users:
+            cls._put(user)
+        for user_id in schema.removed:
+            cls._remove(user_id)
+
+        # Any cached match set may have changed.
+        cls.matches.clear()
+
+    @classmethod
+    def _put(cls, user: ChatSearchResultSchema) -> None:
+        cls.users[user.id] = user
+        for by in ChatSearchByType:
+            value = user.fullname if by.value == "fullname" else user.username
+            cls.indexes[by].add(user.id, value)
+            cls.trigrams[by][user.id] = trigrams(value)
+
+    @classmethod
+    def _remove(cls, user_id: IDType) -> None:
+        cls.users.pop(user_id, None)
+        for by in ChatSearchByType:
+            cls.indexes[by].remove(user_id)
+            cls.trigrams[by].pop(user_id, None)
+
+    @classmethod
+    def match(cls, by: ChatSearchByType, term: str) -> frozenset[IDType]:
+        matches = cls.matches.get((by, term))
+        if matches is not None:
+            return matches
+
+        # Values containing the term contain any of its prefixes too.
+        candidates = None
+        for end in range(len(term) - 1, 0, -1):
+            if (by, term[:end]) in cls.matches:
+                candidates = cls.matches.get((by, term[:end]))
+                break
+
+        matches = frozenset(cls.indexes[by].search(term, candidates))
+        cls.matches.set((by, term), matches)
+        return matches
+
+    @classmethod
+    async def search(
+        cls,
+        *,
+        by: ChatSearchByType,
+        contains: str,
+        skip_id: UserIDSchema,
+        cursor: ChatSearchCursorSchema | None,
+        count: int,
+    ) -> list[tuple[ChatSearchCursorSchema, ChatSearchResultSchema]]:
+        """
+        Returns up to `count` users whose `by` name contains the given string
+        past the cursor position, with the cursor of each.
+        """
+
+        async with cls._lock:
+            return await asyncio.to_thread(
+                cls._search, by, contains, skip_id, cursor, count
+            )
+
+    @classmethod
+    def _search(
+        cls,
+        by: ChatSearchByType,
+        contains: str,
+        skip_id: UserIDSchema,
+        cursor: ChatSearchCursorSchema | None,
+        count: int,
+    ) -> list[tuple[ChatSearchCursorSchema, ChatSearchResultSchema]]:
+        term = contains.lower()
+        prefix = term
+        if by.value == "username":
+            prefix = "@" + term.removeprefix("@")
+
+        index, term_trigrams = cls.indexes[by], trigrams(term)
+
+        def sort_key(user_id: IDType) -> SearchKey:
+            value = index.values[user_id]
+            score = trigram_similarity(cls.trigrams[by][user_id], term_trigrams)
+            return (not value.startswith(prefix), -score, value, user_id)
+
+        keys = (sort_key(i) for i in cls.match(by, term) if i != skip_id.id)
+        if cursor:
+            after = (not cursor.prefix, -cursor.score, cursor.value, cursor.id)
+            keys = (key for key in keys if key > after)
+
+        return [
+            (
+                ChatSearchCursorSchema(
+                    prefix=not not_prefix, score=-score, value=value, id=user_id
+                ),
+                cls.users[user_id],
+            )
+            for not_prefix, score, value, user_id in heapq.nsmallest(count, keys)
+        ]
+
+    @classmethod
+    def stats(cls) -> CacheStatsSchema:
+        return cls.matches.stats(cls.name)
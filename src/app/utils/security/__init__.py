@@ -1,10 +1,15 @@
 __all__ = [
+    "PrimaryPinCookieManager",
     "ResponseCookieManager",
     "WebSocketCookieManager",
     "JWTManager",
     "PasswordManager",
 ]
 
-from .cookies import ResponseCookieManager, WebSocketCookieManager
+from .cookies import (
+    PrimaryPinCookieManager,
+    ResponseCookieManager,
+    WebSocketCookieManager,
+)
 from .jwt import JWTManager
 from .passwords import PasswordManager
@@ -1,4 +1,7 @@
+import time
+
 from fastapi import Response, WebSocket
+from fastapi.requests import HTTPConnection
 
 from app.core.config import Config
 from app.core.exceptions import TokenValidationError
@@ -53,3 +56,44 @@ class ResponseCookieManager:
         self.response.delete_cookie(key=TokenType.access_token.value)
         self.response.delete_cookie(key=TokenType.refresh_token.value)
         self.response.delete_cookie(key=TokenType.ws_access_token.value)
+
+
+class PrimaryPinCookieManager:
+    """
+    Keeps the reads of a client on the primary database for a while after
+    it commits, so that a lagging replica does not hide its own writes.
+
+    The cookie holds the time the pin expires at. Websocket connections can
+    read it, but not set it. Signed in users are pinned on every client as
+    well, see PrimaryPins.
+    """
+
+    key = "primary_pin"
+
+    def __init__(
+        self, config: Config, connection: HTTPConnection, response: Response
+    ) -> None:
+        self.config = config
+        self.connection = connection
+        self.response = response
+        self.pinned = False
+
+    def is_pinned(self) -> bool:
+        try:
+            return float(self.connection.cookies.get(self.key, 0)) > time.time()
+        except ValueError:
+            return False
+
+    def pin(self) -> None:
+        if self.pinned:
+            return
+
+        self.pinned = True
+        seconds = self.config.database.replicas.PRIMARY_PIN_SECONDS
+        self.response.set_cookie(
+            key=self.key,
+            value=f"{time.time() + seconds:.3f}",
+            httponly=True,
+            secure=self.config.USE_SECURE_COOKIES,
+            max_age=seconds,
+        )
@@ -1,3 +1,5 @@
+from collections.abc import AsyncIterator
+from contextlib import asynccontextmanager
 from types import TracebackType
 from typing import Self
 
@@ -12,7 +14,39 @@ from app.interfaces.utils.uow import AbstractAsyncUnitOfWork
 
 
 class AsyncUnitOfWork(AbstractAsyncUnitOfWork):
+    def read_only(self) -> Self:
+        if self.is_scoped and not self._read_session_factory:
+            # Reads from the primary share the session of the scope.
+            return self
+
+        uow = self.__class__(self._read_session_factory or self._async_session_factory)
+        uow.is_read_only = True
+        uow.is_replica = self._read_session_factory is not None
+        return uow
+
+    @asynccontextmanager
+    async def scoped(self) -> AsyncIterator[Self]:
+        assert not self.is_scoped
+
+        await self.__aenter__()
+        self.is_scoped = True
+        try:
+            yield self
+        except BaseException as e:
+            self.is_scoped = False
+            await self.__aexit__(type(e), e, e.__traceback__)
+            raise
+
+        self.is_scoped = False
+        try:
+            await self.commit()
+        finally:
+            await self.__aexit__(None, None, None)
+
     async def __aenter__(self) -> Self:
+        if self.is_scoped:
+            return self
+
         self._async_session = self._async_session_factory()
         self.userRepository = UserRepository(self._async_session)
         self.messageRepository = MessageRepository(self._async_session)
@@ -30,10 +64,27 @@ class AsyncUnitOfWork(AbstractAsyncUnitOfWork):
         _ = exc_type, tb
         assert self._async_session is not None
 
+        if self.is_scoped:
+            return None  # Rolled back or committed by the scope.
+
+        self._commit_hooks.clear()
         if exc:
             await self._async_session.rollback()
         await self._async_session.close()
 
     async def commit(self) -> None:
         assert self._async_session is not None
+        assert not self.is_read_only
+
+        if self.is_scoped:
+            await self._async_session.flush()
+            return
+
         await self._async_session.commit()
+
+        if self._after_commit:
+            await self._after_commit()
+
+        hooks, self._commit_hooks = self._commit_hooks, []
+        for hook in hooks:
+            await hook()
@@ -0,0 +1,9 @@
+__all__ = [
+    "InProcessBroker",
+    "PostgresBroker",
+    "WebSocketManager",
+    "create_broker",
+]
+
+from .broker import InProcessBroker, PostgresBroker, create_broker
+from .manager import WebSocketManager
@@ -0,0 +1,198 @@
+import asyncio
+import uuid
+from collections import defaultdict
+from datetime import timedelta
+from typing import Any
+
+from sqlalchemy import delete, func, insert, select
+from sqlalchemy.ext.asyncio import AsyncConnection, AsyncEngine
+
+from app.core.config import Config
+from app.core.logger import root_logger
+from app.db.models import BrokerPayloadModel
+from app.interfaces.utils.broker import AbstractBroker, BrokerHandler
+
+logger = root_logger.getChild("utils.websockets.broker")
+
+
+class InProcessBroker(AbstractBroker):
+    """
+    Delivers published payloads to handlers registered in the same process.
+    Suitable for a single worker only.
+    """
+
+    def __init__(self) -> None:
+        self._handlers: dict[str, list[BrokerHandler]] = defaultdict(list)
+
+    async def start(self) -> None:
+        pass
+
+    async def stop(self) -> None:
+        self._handlers.clear()
+
+    async def subscribe(self, channel: str, handler: BrokerHandler) -> None:
+        self._handlers[channel].append(handler)
+
+    async def publish(self, channel: str, payload: str) -> None:
+        for handler in self._handlers.get(channel, ()):
+            try:
+                await handler(payload)
+            except Exception:
+                logger.exception(f"{channel} - handler failed")
+
+
+class PostgresBroker(AbstractBroker):
+    """
+    Delivers published payloads to every process connected to the same
+    database using Postgres LISTEN/NOTIFY.
+
+    One pooled connection of the given engine is held for listening while
+    the broker is running. Notifications are handled one at a time in the
+    order Postgres delivers them.
+
+    NOTIFY rejects payloads of 8000 bytes or more. Larger ones are stored in
+    a table in the same transaction and notified by reference, each listener
+    reads them from there. Stored payloads are deleted once expired.
+    """
+
+    MAX_PAYLOAD_BYTES = 7999
+    STORED_PAYLOAD_PREFIX = "stored:"
+    STORED_PAYLOAD_TTL_SECONDS = 60
+    RECONNECT_DELAY_SECONDS = 1.0
+
+    def __init__(self, engine: AsyncEngine) -> None:
+        self.engine = engine
+        self._handlers: dict[str, list[BrokerHandler]] = defaultdict(list)
+        self._queue: asyncio.Queue[tuple[str, str]] = asyncio.Queue()
+        self._connection: AsyncConnection | None = None
+        self._driver_connection: Any = None
+        self._consumer: asyncio.Task | None = None
+        self._reconnect: asyncio.Task | None = None
+
+    async def start(self) -> None:
+        await self._listen()
+        self._consumer = asyncio.create_task(self._consume())
+
+    async def stop(self) -> None:
+        for task in (self._consumer, self._reconnect):
+            if task:
+                task.cancel()
+        self._consumer = self._reconnect = None
+        await self._close_connection()
+
+    async def subscribe(self, channel: str, handler: BrokerHandler) -> None:
+        if channel not in self._handlers and self._driver_connection:
+            await self._driver_connection.add_listener(channel, self._on_notify)
+        self._handlers[channel].append(handler)
+
+    async def publish(self, channel: str, payload: str) -> None:
+        async with self.engine.connect() as conn:
+            size = len(payload.encode("utf-8"))
+            if size > self.MAX_PAYLOAD_BYTES:
+                payload = await self._store(conn, channel, payload)
+                logger.info(f"{channel} - stored {size} bytes as {payload}")
+
+            await conn.execute(select(func.pg_notify(channel, payload)))
+            await conn.commit()
+
+    async def _store(self, conn: AsyncConnection, channel: str, payload: str) -> str:
+        """
+        Stores a payload too large for NOTIFY and returns the reference to
+        notify instead. Expired payloads are deleted along the way.
+        """
+
+        model = BrokerPayloadModel
+        expiry = func.now() - timedelta(seconds=self.STORED_PAYLOAD_TTL_SECONDS)
+        await conn.execute(delete(model).where(model.timestamp < expiry))
+
+        stored_id = await conn.scalar(
+            insert(model).values(channel=channel, payload=payload).returning(model.id)
+        )
+        return f"{self.STORED_PAYLOAD_PREFIX}{stored_id}"
+
+    async def _load(self, reference: str) -> str | None:
+        """
+        Returns the payload stored under the reference, or None when it
+        expired or cannot be read.
+        """
+
+        model = BrokerPayloadModel
+        stored_id = uuid.UUID(reference.removeprefix(self.STORED_PAYLOAD_PREFIX))
+        try:
+            async with self.engine.connect() as conn:
+                payload = await conn.scalar(
+                    select(model.payload).where(model.id == stored_id)
+                )
+        except Exception:
+            logger.exception(f"{reference} - error reading stored payload")
+            return None
+
+        if payload is None:
+            logger.warning(f"{reference} - stored payload expired")
+        return payload
+
+    async def _listen(self) -> None:
+        self._connection = await self.engine.connect()
+        raw_connection = await self._connection.get_raw_connection()
+        self._driver_connection = raw_connection.driver_connection
+        assert self._driver_connection is not None
+
+        self._driver_connection.add_termination_listener(self._on_termination)
+        for channel in self._handlers:
+            await self._driver_connection.add_listener(channel, self._on_notify)
+
+    async def _close_connection(self) -> None:
+        connection, self._connection = self._connection, None
+        self._driver_connection = None
+        if connection:
+            try:
+                # Never hand a listening connection back to the pool.
+                await connection.invalidate()
+                await connection.close()
+            except Exception:
+                logger.exception("error closing listener connection")
+
+    async def _relisten(self) -> None:
+        await self._close_connection()
+        while True:
+            try:
+                await self._listen()
+                logger.info("listener connection restored")
+                return
+            except Exception:
+                logger.exception("error restoring listener connection")
+                await asyncio.sleep(self.RECONNECT_DELAY_SECONDS)
+
+    def _on_notify(self, connection: Any, pid: int, channel: str, payload: str):
+        _ = connection, pid
+        self._queue.put_nowait((channel, payload))
+
+    def _on_termination(self, connection: Any) -> None:
+        if self._consumer is None or connection is not self._driver_connection:
+            return  # Stopped on purpose or already replaced.
+
+        logger.warning("listener connection lost, reconnecting")
+        self._reconnect = asyncio.create_task(self._relisten())
+
+    async def _consume(self) -> None:
+        while True:
+            channel, payload = await self._queue.get()
+            if payload.startswith(self.STORED_PAYLOAD_PREFIX):
+                stored = await self._load(payload)
+                if stored is None:
+                    continue
+                payload = stored
+            await self._dispatch(channel, payload)
+
+    async def _dispatch(self, channel: str, payload: str) -> None:
+        for handler in self._handlers.get(channel, ()):
+            try:
+                await handler(payload)
+            except Exception:
+                logger.exception(f"{channel} - handler failed")
+
+
+def create_broker(config: Config, engine: AsyncEngine) -> AbstractBroker:
+    if config.websocket.BROKER == "postgres":
+        return PostgresBroker(engine)
+    return InProcessBroker()
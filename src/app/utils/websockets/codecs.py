@@ -0,0 +1,111 @@
+import json
+from abc import ABC, abstractmethod
+from typing import Any
+
+import msgpack
+from pydantic import BaseModel
+
+
+class Codec(ABC):
+    """
+    Wire format of a websocket connection, negotiated as a subprotocol.
+    """
+
+    subprotocol: str
+    binary: bool
+
+    @abstractmethod
+    def encode(self, model: BaseModel) -> str | bytes: ...
+
+    @abstractmethod
+    def join(self, frames: list[Any]) -> str | bytes:
+        """
+        Combines encoded frames into a single array frame.
+        """
+        ...
+
+    @abstractmethod
+    def decode(self, data: bytes) -> object: ...
+
+
+class JSONCodec(Codec):
+    subprotocol = "minichat.json.v1"
+    binary = False
+
+    def encode(self, model: BaseModel) -> str:
+        return model.model_dump_json()
+
+    def join(self, frames: list[str]) -> str:
+        return "[" + ",".join(frames) + "]"
+
+    def decode(self, data: bytes) -> object:
+        return json.loads(data)
+
+
+class MessagePackCodec(Codec):
+    subprotocol = "minichat.msgpack.v1"
+    binary = True
+
+    def __init__(self) -> None:
+        self._packer = msgpack.Packer()
+
+    def encode(self, model: BaseModel) -> bytes:
+        return self._packer.pack(model.model_dump(mode="json"))
+
+    def join(self, frames: list[bytes]) -> bytes:
+        # An array is its header followed by the already packed items.
+        return self._packer.pack_array_header(len(frames)) + b"".join(frames)
+
+    def decode(self, data: bytes) -> object:
+        return msgpack.unpackb(data)
+
+
+default_codec = JSONCodec()
+
+"""Available codecs keyed by subprotocol."""
+codecs: dict[str, Codec] = {
+    codec.subprotocol: codec for codec in (default_codec, MessagePackCodec())
+}
+
+
+def negotiate_codec(subprotocols: list[str]) -> tuple[Codec, str | None]:
+    """
+    Returns the codec for the first supported subprotocol offered by the
+    client and the subprotocol to accept. Falls back to JSON without a
+    subprotocol when none is supported.
+    """
+
+    for subprotocol in subprotocols:
+        if subprotocol in codecs:
+            return codecs[subprotocol], subprotocol
+    return default_codec, None
+
+
+class OutboundPayload:
+    """
+    A model sent to many connections, encoded at most once per codec.
+    """
+
+    def __init__(self, key: str, model: BaseModel) -> None:
+        self.key = key
+        self.model = model
+        self._encoded: dict[str, str | bytes] = {}
+
+    def encode(self, codec: Codec) -> str | bytes:
+        data = self._encoded.get(codec.subprotocol)
+        if data is None:
+            data = self._encoded[codec.subprotocol] = codec.encode(self.model)
+        return data
+
+
+class OutboundBatch:
+    """
+    Payloads sent to many connections together as a single array frame.
+    """
+
+    def __init__(self, payloads: list[OutboundPayload]) -> None:
+        self.key = f"batch:{payloads[0].key}"
+        self.payloads = payloads
+
+    def encode(self, codec: Codec) -> list[str | bytes]:
+        return [payload.encode(codec) for payload in self.payloads]
@@ -0,0 +1,106 @@
+from typing import Any
+
+from uvicorn.protocols.websockets.websockets_impl import WebSocketProtocol
+from websockets import frames
+from websockets.extensions.permessage_deflate import (
+    PerMessageDeflate,
+    ServerPerMessageDeflateFactory,
+)
+
+from app.core.config import WebSocketConfig, config
+from app.schemas import WebSocketCompressionStatsSchema
+
+
+class CompressionStats:
+    def __init__(self) -> None:
+        self.frames_compressed = 0
+        self.frames_uncompressed = 0
+        self.bytes_in = 0
+        self.bytes_out = 0
+
+    def schema(self) -> WebSocketCompressionStatsSchema:
+        return WebSocketCompressionStatsSchema(
+            frames_compressed=self.frames_compressed,
+            frames_uncompressed=self.frames_uncompressed,
+            bytes_in=self.bytes_in,
+            bytes_out=self.bytes_out,
+            ratio=self.bytes_out / self.bytes_in if self.bytes_in else None,
+        )
+
+
+"""Outbound data frames of every connection of the process."""
+stats = CompressionStats()
+
+
+class ThresholdPerMessageDeflate(PerMessageDeflate):
+    """
+    permessage-deflate that sends messages below `min_size` bytes as they
+    are, which RFC 7692 allows by leaving RSV1 unset, and counts the bytes
+    of outbound data frames before and after compression.
+    """
+
+    def __init__(self, *args: Any, min_size: int, **kwargs: Any) -> None:
+        super().__init__(*args, **kwargs)
+        self.min_size = min_size
+        self._skipping = False
+
+    def encode(self, frame: frames.Frame) -> frames.Frame:
+        if frame.opcode in frames.CTRL_OPCODES:
+            return frame
+
+        # Fragments follow the choice made for the first frame of a message.
+        if frame.opcode is not frames.OP_CONT:
+            self._skipping = frame.fin and len(frame.data) < self.min_size
+
+        stats.bytes_in += len(frame.data)
+        if self._skipping:
+            stats.frames_uncompressed += 1
+            encoded = frame
+        else:
+            stats.frames_compressed += 1
+            encoded = super().encode(frame)
+        stats.bytes_out += len(encoded.data)
+        return encoded
+
+
+class ThresholdPerMessageDeflateFactory(ServerPerMessageDeflateFactory):
+    def __init__(self, settings: WebSocketConfig) -> None:
+        super().__init__(
+            server_no_context_takeover=not settings.COMPRESSION_CONTEXT_TAKEOVER,
+            server_max_window_bits=settings.COMPRESSION_WINDOW_BITS,
+            compress_settings={
+                "level": settings.COMPRESSION_LEVEL,
+                "memLevel": settings.COMPRESSION_MEM_LEVEL,
+            },
+        )
+        self.min_size = settings.COMPRESSION_MIN_SIZE
+
+    def process_request_params(self, params, accepted_extensions):
+        response, extension = super().process_request_params(
+            params, accepted_extensions
+        )
+        return response, ThresholdPerMessageDeflate(
+            extension.remote_no_context_takeover,
+            extension.local_no_context_takeover,
+            extension.remote_max_window_bits,
+            extension.local_max_window_bits,
+            extension.compress_settings,
+            min_size=self.min_size,
+        )
+
+
+class DeflateWebSocketProtocol(WebSocketProtocol):
+    """
+    uvicorn's websockets protocol with permessage-deflate configured by the
+    WEBSOCKET__COMPRESSION_* settings, selected with
+    `uvicorn --ws app.utils.websockets.compression:DeflateWebSocketProtocol`.
+    """
+
+    def __init__(self, *args: Any, **kwargs: Any) -> None:
+        super().__init__(*args, **kwargs)
+        settings = config.websocket
+        self.available_extensions = (
+            [ThresholdPerMessageDeflateFactory(settings)]
+            if settings.COMPRESSION_ENABLED and self.config.ws_per_message_deflate
+            else []
+        )
@@ -0,0 +1,240 @@
+import asyncio
+import time
+from collections import deque
+from dataclasses import dataclass
+
+from fastapi import status
+from fastapi.websockets import WebSocket
+from starlette.datastructures import Address
+
+from app.core.config import SlowConsumerPolicy
+from app.core.logger import root_logger
+from app.schemas import WebSocketConnectionStatsSchema
+from app.utils.types import IDType
+
+from .codecs import Codec, OutboundBatch, OutboundPayload, default_codec
+
+logger = root_logger.getChild("utils.websockets.connection")
+
+
+@dataclass
+class OutboundFrame:
+    # Frames sharing a key describe the same resource, the latest one wins
+    # when frames are coalesced.
+    key: str
+    data: str | bytes
+    # Encoded items of an array frame, flattened into the array when frames
+    # are coalesced.
+    parts: list[str | bytes] | None = None
+
+
+class WebSocketConnection:
+    """
+    A single client connection with a bounded outbound queue drained by its
+    own writer task, so that enqueueing never waits for the client.
+
+    With a coalescing window, the writer waits for the window to pass after
+    the first queued frame and sends everything queued by then as a single
+    array frame, keeping only the latest frame for each key.
+    """
+
+    def __init__(
+        self,
+        *,
+        user_id: IDType,
+        client: Address,
+        websocket: WebSocket,
+        max_queue_size: int,
+        policy: SlowConsumerPolicy,
+        coalesce_window: float = 0,
+        codec: Codec = default_codec,
+        send_timeout: float | None = None,
+    ) -> None:
+        self.user_id = user_id
+        self.client = client
+        self.websocket = websocket
+        self.max_queue_size = max_queue_size
+        self.policy = policy
+        self.coalesce_window = coalesce_window
+        self.codec = codec
+        self.send_timeout = send_timeout
+
+        self.closed = False
+        self.sent = 0
+        self.dropped = 0
+        self.coalesced = 0
+        self.max_queue_depth = 0
+        self.last_seen = time.monotonic()
+
+        self._queue: deque[OutboundFrame] = deque()
+        self._pending: dict[str, OutboundFrame] = {}
+        self._ready = asyncio.Event()
+        self._writer: asyncio.Task | None = None
+        self._closing: asyncio.Task | None = None
+
+    @property
+    def queue_depth(self) -> int:
+        return len(self._queue)
+
+    def touch(self) -> None:
+        """
+        Marks the client as alive, called for every frame it sends.
+        """
+
+        self.last_seen = time.monotonic()
+
+    def start(self) -> None:
+        self._writer = asyncio.create_task(self._write_loop())
+
+    def enqueue(self, payload: OutboundPayload | OutboundBatch) -> bool:
+        """
+        Queues a payload encoded with the connection codec for sending.
+        Returns False if the connection is closed or the payload was rejected
+        by the slow consumer policy.
+        """
+
+        if self.closed:
+            return False
+
+        if isinstance(payload, OutboundBatch):
+            parts = payload.encode(self.codec)
+            frame = OutboundFrame(
+                key=payload.key, data=self.codec.join(parts), parts=parts
+            )
+        else:
+            frame = OutboundFrame(key=payload.key, data=payload.encode(self.codec))
+
+        if len(self._queue) >= self.max_queue_size:
+            if not self._make_room(frame):
+                return False
+
+        self._queue.append(frame)
+        self._pending[frame.key] = frame
+        self.max_queue_depth = max(self.max_queue_depth, len(self._queue))
+        self._ready.set()
+        return True
+
+    def _make_room(self, frame: OutboundFrame) -> bool:
+        match self.policy:
+            case "coalesce" if frame.key in self._pending:
+                pending = self._pending[frame.key]
+                pending.data, pending.parts = frame.data, frame.parts
+                self.coalesced += 1
+                return False
+            case "coalesce" | "drop_oldest":
+                self._discard(self._queue.popleft())
+                self.dropped += 1
+                return True
+            case "disconnect":
+                logger.warning(
+                    f"{self.user_id} - {self.client} - queue full, disconnecting"
+                )
+                self.dropped += len(self._queue) + 1
+                self.closed = True
+                self._closing = asyncio.create_task(
+                    self.close(status.WS_1008_POLICY_VIOLATION)
+                )
+                return False
+
+    def _discard(self, frame: OutboundFrame) -> None:
+        if self._pending.get(frame.key) is frame:
+            del self._pending[frame.key]
+
+    async def _write_loop(self) -> None:
+        try:
+            while True:
+                await self._ready.wait()
+                if self.coalesce_window:
+                    await asyncio.sleep(self.coalesce_window)
+                    await self._write_batch()
+                    continue
+
+                while self._queue:
+                    frame = self._queue.popleft()
+                    self._discard(frame)
+                    await self._send(frame.data)
+                self._ready.clear()
+        except asyncio.CancelledError:
+            raise
+        except TimeoutError:
+            logger.warning(f"{self.user_id} - {self.client} - send timed out")
+            self.closed = True
+        except Exception:
+            logger.exception(f"{self.user_id} - {self.client} - error sending")
+            self.closed = True
+
+    async def _write_batch(self) -> None:
+        self._ready.clear()
+
+        # Insertion order keeps the position of the first frame for a key,
+        # while later frames for the same key replace its data.
+        batch: dict[str, OutboundFrame] = {}
+        while self._queue:
+            frame = self._queue.popleft()
+            if frame.key in batch:
+                self.coalesced += 1
+            batch[frame.key] = frame
+        self._pending.clear()
+
+        if not batch:
+            return
+
+        if len(batch) == 1:
+            data = next(iter(batch.values())).data
+        else:
+            data = self.codec.join(
+                [
+                    part
+                    for frame in batch.values()
+                    for part in (frame.parts or [frame.data])
+                ]
+            )
+
+        await self._send(data)
+
+    async def _send(self, data: str | bytes) -> None:
+        if isinstance(data, bytes):
+            send = self.websocket.send_bytes(data)
+        else:
+            send = self.websocket.send_text(data)
+
+        await asyncio.wait_for(send, self.send_timeout)
+        self.sent += 1
+
+    async def close(self, code: int = status.WS_1000_NORMAL_CLOSURE) -> None:
+        """
+        Stops the writer and closes the websocket, dropping unsent frames.
+        """
+
+        if self.closed and self._writer is None:
+            return
+
+        self.stop()
+        try:
+            await asyncio.wait_for(self.websocket.close(code), self.send_timeout)
+        except Exception:
+            pass  # Already closed by the client or stalled.
+
+    def stop(self) -> None:
+        """
+        Stops the writer without closing the websocket.
+        """
+
+        self.closed = True
+        writer, self._writer = self._writer, None
+        if writer and writer is not asyncio.current_task():
+            writer.cancel()
+
+        self._queue.clear()
+        self._pending.clear()
+
+    def stats(self) -> WebSocketConnectionStatsSchema:
+        return WebSocketConnectionStatsSchema(
+            user_id=self.user_id,
+            client=f"{self.client.host}:{self.client.port}",
+            queue_depth=self.queue_depth,
+            max_queue_depth=self.max_queue_depth,
+            sent=self.sent,
+            dropped=self.dropped,
+            coalesced=self.coalesced,
+        )
@@ -0,0 +1,524 @@
+import asyncio
+import itertools
+import json
+import logging
+import time
+from collections import deque
+from collections.abc import Awaitable, Callable, Iterable
+
+from fastapi import status
+from fastapi.websockets import WebSocket, WebSocketDisconnect
+from pydantic import BaseModel
+from starlette.datastructures import Address
+
+from app.core.config import WebSocketConfig
+from app.core.exceptions import (
+    InstantiationNotAllowedError,
+    WebSocketNoClientError,
+)
+from app.core.logger import root_logger
+from app.interfaces.utils.broker import AbstractBroker
+from app.interfaces.utils.uow import AbstractAsyncUnitOfWork
+from app.schemas import (
+    AnnouncementEnvelopeSchema,
+    AnnouncementSchema,
+    HeartbeatPingSchema,
+    MessageAttachmentAnnouncementSchema,
+    MessageDeleteAnnouncementSchema,
+    MessagePutAnnouncementSchema,
+    UserIDSchema,
+    WebSocketCompressionStatsSchema,
+    WebSocketConnectionStatsSchema,
+    WebSocketReapStatsSchema,
+    WebSocketRegistryStatsSchema,
+    WebSocketResumeSchema,
+    WebSocketSessionSchema,
+)
+from app.utils.types import Factory, IDType
+
+from . import compression
+from .codecs import OutboundBatch, OutboundPayload, negotiate_codec
+from .connection import WebSocketConnection
+from .replay import EventLog
+
+logger = root_logger.getChild("utils.websockets")
+
+
+class WebSocketManager:
+    # Users without connections are removed, so that the registry size and
+    # the connection count are known without walking it.
+    users: dict[IDType, dict[Address, WebSocketConnection]] = {}
+    connections = 0
+    logger = logger.getChild("manager")
+
+    settings: WebSocketConfig = WebSocketConfig()
+    broker: AbstractBroker | None = None
+
+    replies = itertools.count()
+
+    # Event ids are assigned once when announcements are published, from
+    # blocks each worker reserves from a database sequence, so that they are
+    # unique across workers and restarts. The stream only changes when the
+    # sequence is recreated. Ids are not in delivery order across workers,
+    # so the last one is the id of the last event delivered.
+    uow_factory: Factory[AbstractAsyncUnitOfWork] | None = None
+    stream = ""
+    last_event_id = 0
+    event_ids: deque[int] = deque()
+    event_ids_lock: asyncio.Lock | None = None
+    event_log = EventLog(size=0, max_users=0, max_events=0)
+
+    reaper: asyncio.Task | None = None
+    reaped_idle = 0
+    reaped_stalled = 0
+
+    def __init__(self) -> None:
+        raise InstantiationNotAllowedError(self.__class__.__name__)
+
+    @classmethod
+    async def start(
+        cls,
+        broker: AbstractBroker,
+        settings: WebSocketConfig,
+        uow_factory: Factory[AbstractAsyncUnitOfWork],
+    ) -> None:
+        """
+        Starts delivering announcements published through the given broker
+        to the clients connected to this process.
+        """
+
+        cls.broker = broker
+        cls.settings = settings
+        cls.uow_factory = uow_factory
+
+        async with uow_factory() as uow:
+            cls.stream = await uow.messageRepository.get_event_stream()
+        cls.last_event_id = 0
+        cls.event_ids = deque()
+        cls.event_ids_lock = asyncio.Lock()
+        cls.event_log = EventLog(
+            size=settings.REPLAY_BUFFER_SIZE,
+            max_users=settings.REPLAY_MAX_USERS,
+            max_events=settings.REPLAY_MAX_EVENTS,
+        )
+
+        await broker.start()
+        await broker.subscribe(settings.BROKER_CHANNEL, cls.receive_announcement)
+        await broker.subscribe(settings.DISCONNECT_CHANNEL, cls.receive_disconnect)
+
+        if settings.HEARTBEAT_INTERVAL_SECONDS:
+            cls.reaper = asyncio.create_task(cls.reap_loop())
+
+    @classmethod
+    async def stop(cls) -> None:
+        reaper, cls.reaper = cls.reaper, None
+        if reaper:
+            reaper.cancel()
+
+        broker, cls.broker = cls.broker, None
+        if broker:
+            await broker.stop()
+
+    @classmethod
+    async def accept_client(
+        cls,
+        user: UserIDSchema,
+        websocket: WebSocket,
+        resume: WebSocketResumeSchema | None = None,
+    ) -> Address:
+        client = websocket.client
+        if not client:
+            raise WebSocketNoClientError
+
+        codec, subprotocol = negotiate_codec(websocket.scope.get("subprotocols", []))
+        await websocket.accept(subprotocol=subprotocol)
+
+        connection = WebSocketConnection(
+            user_id=user.id,
+            client=client,
+            websocket=websocket,
+            max_queue_size=cls.settings.SEND_QUEUE_SIZE,
+            policy=cls.settings.SLOW_CONSUMER_POLICY,
+            coalesce_window=cls.settings.COALESCE_WINDOW_MS / 1000,
+            codec=codec,
+            send_timeout=cls.settings.SEND_TIMEOUT_SECONDS or None,
+        )
+        connection.start()
+        cls.resume(user, connection, resume)
+        clients = cls.users.setdefault(user.id, {})
+        if client not in clients:
+            cls.connections += 1
+        clients[client] = connection
+
+        if cls.logger.isEnabledFor(logging.DEBUG):
+            cls.logger.debug(
+                f"{user.id} - {client} - accepted ({subprotocol}),"
+                f" {cls.connections} connections"
+            )
+
+        return client
+
+    @classmethod
+    def resume(
+        cls,
+        user: UserIDSchema,
+        connection: WebSocketConnection,
+        resume: WebSocketResumeSchema | None,
+    ) -> None:
+        """
+        Queues the session frame and the events the client missed since the
+        event it resumes from, if any.
+        """
+
+        payloads: list[OutboundPayload] | None = []
+        if resume:
+            payloads = None
+            if resume.stream == cls.stream:
+                payloads = cls.event_log.since(user.id, resume.last_event_id)
+
+        session = WebSocketSessionSchema(
+            stream=cls.stream, event_id=cls.last_event_id, resync=payloads is None
+        )
+        connection.enqueue(OutboundPayload("session", session))
+        for payload in payloads or ():
+            connection.enqueue(payload)
+
+        if resume and cls.logger.isEnabledFor(logging.DEBUG):
+            replayed = "resync" if payloads is None else f"{len(payloads)} replayed"
+            cls.logger.debug(
+                f"{user.id} - {connection.client} - resumed from"
+                f" {resume.last_event_id}, {replayed}"
+            )
+
+    @classmethod
+    def close_client(cls, user: UserIDSchema, client: Address) -> None:
+        clients = cls.users.get(user.id)
+        connection = clients.pop(client, None) if clients is not None else None
+        if not connection:
+            return
+
+        connection.stop()
+        cls.connections -= 1
+        if not clients:
+            del cls.users[user.id]
+
+        if cls.logger.isEnabledFor(logging.DEBUG):
+            cls.logger.debug(
+                f"{user.id} - {client} - client closed, {cls.connections} connections"
+            )
+
+    @classmethod
+    async def disconnect_user(cls, user: UserIDSchema) -> None:
+        """
+        Closes every connection of the user, in any process subscribed to the
+        broker.
+        """
+
+        if not cls.broker:
+            await cls.close_user(user)
+            return
+
+        await cls.broker.publish(
+            cls.settings.DISCONNECT_CHANNEL, user.model_dump_json()
+        )
+
+    @classmethod
+    async def receive_disconnect(cls, payload: str) -> None:
+        await cls.close_user(UserIDSchema.model_validate_json(payload))
+
+    @classmethod
+    async def close_user(cls, user: UserIDSchema) -> None:
+        clients = cls.users.pop(user.id, {})
+        cls.connections -= len(clients)
+        for connection in clients.values():
+            await connection.close(status.WS_1000_NORMAL_CLOSURE)
+
+        if cls.logger.isEnabledFor(logging.DEBUG):
+            cls.logger.debug(f"{user.id} - closed {len(clients)} clients")
+
+    @classmethod
+    async def reap_loop(cls) -> None:
+        while True:
+            await asyncio.sleep(cls.settings.HEARTBEAT_INTERVAL_SECONDS)
+            try:
+                await cls.reap()
+            except Exception:
+                cls.logger.exception("error reaping connections")
+
+    @classmethod
+    async def reap(cls) -> None:
+        """
+        Closes connections that stalled on a send or, with an idle timeout
+        set, sent nothing within it, and pings the rest. Clients are expected
+        to reply to a ping, although any frame they send keeps the connection
+        alive.
+        """
+
+        deadline = None
+        if cls.settings.IDLE_TIMEOUT_SECONDS:
+            deadline = time.monotonic() - cls.settings.IDLE_TIMEOUT_SECONDS
+        ping = OutboundPayload("ping", HeartbeatPingSchema())
+
+        for user_id, clients in list(cls.users.items()):
+            for client, connection in list(clients.items()):
+                if connection.closed:
+                    cls.reaped_stalled += 1
+                    cls.logger.info(f"{user_id} - {client} - reaping stalled")
+                elif deadline is not None and connection.last_seen < deadline:
+                    cls.reaped_idle += 1
+                    cls.logger.info(f"{user_id} - {client} - reaping idle")
+                else:
+                    connection.enqueue(ping)
+                    continue
+
+                await connection.close(status.WS_1001_GOING_AWAY)
+                cls.close_client(UserIDSchema(id=user_id), client)
+
+    @classmethod
+    def reap_stats(cls) -> WebSocketReapStatsSchema:
+        return WebSocketReapStatsSchema(
+            idle=cls.reaped_idle, stalled=cls.reaped_stalled
+        )
+
+    @classmethod
+    def compression_stats(cls) -> WebSocketCompressionStatsSchema:
+        return compression.stats.schema()
+
+    @classmethod
+    def send_to_user(
+        cls, user: UserIDSchema, payload: OutboundPayload | OutboundBatch
+    ) -> None:
+        """
+        Queues the payload on every connection of the user without waiting for
+        it to be written.
+        """
+
+        clients = cls.users.get(user.id, {})
+        for connection in clients.values():
+            connection.enqueue(payload)
+
+        if cls.logger.isEnabledFor(logging.DEBUG):
+            cls.logger.debug(
+                f"{user.id} - queued {payload.key} to {len(clients)} clients"
+            )
+
+    @classmethod
+    def registry_stats(cls) -> WebSocketRegistryStatsSchema:
+        return WebSocketRegistryStatsSchema(
+            users=len(cls.users), connections=cls.connections
+        )
+
+    @classmethod
+    def client_count(cls, user: UserIDSchema) -> int:
+        return len(cls.users.get(user.id, ()))
+
+    @classmethod
+    def connection_stats(
+        cls, user: UserIDSchema | None = None
+    ) -> list[WebSocketConnectionStatsSchema]:
+        """
+        Returns stats of the connections of the given user, or of every
+        connection, which walks the whole registry.
+        """
+
+        if user:
+            return [c.stats() for c in cls.users.get(user.id, {}).values()]
+        return [
+            connection.stats()
+            for clients in cls.users.values()
+            for connection in clients.values()
+        ]
+
+    @classmethod
+    async def handle_client(
+        cls,
+        *,
+        user: UserIDSchema,
+        websocket: WebSocket,
+        recv_callback: Callable[[object], Awaitable[BaseModel | None]] | None = None,
+        resume: WebSocketResumeSchema | None = None,
+    ) -> None:
+        """
+        Serves the client until it disconnects. Every decoded inbound frame
+        is passed to `recv_callback` in order, and a model it returns is
+        queued back to this connection only.
+        """
+
+        client = await cls.accept_client(user, websocket, resume)
+        connection = cls.users[user.id][client]
+        codec = connection.codec
+
+        try:
+            while True:
+                message = await websocket.receive()
+                if message["type"] == "websocket.disconnect":
+                    raise WebSocketDisconnect(
+                        message.get("code", status.WS_1000_NORMAL_CLOSURE)
+                    )
+                connection.touch()
+
+                # Text frames are always JSON, binary ones use the
+                # negotiated codec.
+                text, payload = message.get("text"), message.get("bytes")
+
+                try:
+                    if text is not None:
+                        data = json.loads(text)
+                    else:
+                        data = codec.decode(payload or b"")
+                    if data == {"type": "pong"}:
+                        continue
+                    if recv_callback:
+                        reply = await recv_callback(data)
+                        if reply:
+                            connection.enqueue(
+                                OutboundPayload(f"reply:{next(cls.replies)}", reply)
+                            )
+                except ValueError:
+                    cls.logger.error(
+                        f"{user.id} - {client} - error decoding {text or payload}"
+                    )
+
+        except WebSocketDisconnect:
+            pass
+        finally:
+            cls.close_client(user, client)
+
+    @classmethod
+    async def announce(
+        cls,
+        *,
+        users: Iterable[UserIDSchema],
+        model: MessagePutAnnouncementSchema
+        | MessageDeleteAnnouncementSchema
+        | MessageAttachmentAnnouncementSchema,
+    ):
+        """
+        Sends the given model to users that are in the websocket connection
+        pool of any process subscribed to the broker, encoded in the wire
+        format negotiated by each connection (JSON by default).
+
+        Receivers should check whether the message payload exists in their
+        store. If so, update its attributes. Otherwise, add as new.
+
+        With a coalescing window configured, receivers may get a JSON array
+        of announcements in a single frame, to be applied in order.
+        """
+
+        await cls.announce_many(users=users, models=[model])
+
+    @classmethod
+    async def announce_many(
+        cls,
+        *,
+        users: Iterable[UserIDSchema],
+        models: list[
+            MessagePutAnnouncementSchema
+            | MessageDeleteAnnouncementSchema
+            | MessageAttachmentAnnouncementSchema
+        ],
+    ):
+        """
+        Sends the given models like `announce` does, in a single array frame
+        per connection. Each model still gets its own event id.
+        """
+
+        user_ids = [user.id for user in users]
+        announcements = await cls.assign_event_ids(list(models))
+
+        if not cls.broker:
+            await cls.deliver(
+                AnnouncementEnvelopeSchema(users=user_ids, announcements=announcements)
+            )
+            return
+
+        await cls.publish(user_ids, announcements)
+
+    @classmethod
+    async def assign_event_ids(
+        cls, models: list[AnnouncementSchema]
+    ) -> list[AnnouncementSchema]:
+        """
+        Returns copies of the models with new event ids, in order, taken from
+        the block of ids reserved by this worker.
+        """
+
+        if len(cls.event_ids) < len(models):
+            await cls.reserve_event_ids(len(models))
+
+        return [
+            model.model_copy(update={"event_id": cls.event_ids.popleft()})
+            for model in models
+        ]
+
+    @classmethod
+    async def reserve_event_ids(cls, count: int) -> None:
+        """
+        Reserves a new block of event ids unless `count` of them are left.
+        """
+
+        assert cls.uow_factory is not None and cls.event_ids_lock is not None
+
+        async with cls.event_ids_lock:
+            missing = count - len(cls.event_ids)
+            if missing <= 0:
+                return
+
+            size = max(missing, cls.settings.EVENT_ID_BLOCK_SIZE)
+            async with cls.uow_factory() as uow:
+                cls.event_ids.extend(await uow.messageRepository.next_event_ids(size))
+
+    @classmethod
+    async def publish(
+        cls, users: list[IDType], models: list[AnnouncementSchema]
+    ) -> None:
+        """
+        Publishes the envelope of the given models.
+        """
+
+        assert cls.broker is not None
+
+        payload = AnnouncementEnvelopeSchema(
+            users=users, announcements=models
+        ).model_dump_json()
+        await cls.broker.publish(cls.settings.BROKER_CHANNEL, payload)
+
+    @classmethod
+    async def receive_announcement(cls, payload: str) -> None:
+        await cls.deliver(AnnouncementEnvelopeSchema.model_validate_json(payload))
+
+    @classmethod
+    async def deliver(cls, envelope: AnnouncementEnvelopeSchema) -> None:
+        """
+        Sends the envelope announcements to its users connected to this
+        process.
+        """
+
+        # Encoded at most once per wire format in use by the recipients.
+        events: list[tuple[int, OutboundPayload]] = []
+        for announcement in envelope.announcements:
+            assert announcement.event_id is not None
+            cls.last_event_id = announcement.event_id
+            position = cls.event_log.record(announcement.event_id)
+            payload = OutboundPayload(cls.payload_key(announcement), announcement)
+            events.append((position, payload))
+
+        if not events:
+            return
+
+        outbound: OutboundPayload | OutboundBatch = events[0][1]
+        if len(events) > 1:
+            outbound = OutboundBatch([payload for _, payload in events])
+
+        for user_id in envelope.users:
+            for position, payload in events:
+                cls.event_log.append(user_id, position, payload)
+            if user_id not in cls.users:
+                continue
+            cls.send_to_user(UserIDSchema(id=user_id), outbound)
+
+    @staticmethod
+    def payload_key(announcement: AnnouncementSchema) -> str:
+        if isinstance(announcement, MessageAttachmentAnnouncementSchema):
+            return f"attachment:{announcement.attachment.id}"
+        return f"message:{announcement.message.id}"
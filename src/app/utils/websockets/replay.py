@@ -0,0 +1,98 @@
+from collections import OrderedDict, deque
+from dataclasses import dataclass, field
+
+from app.utils.types import IDType
+
+from .codecs import OutboundPayload
+
+
+@dataclass
+class _UserLog:
+    events: deque[tuple[int, OutboundPayload]] = field(default_factory=deque)
+    # Events of the user up to this position may have been dropped.
+    truncated_through: int = 0
+
+
+class EventLog:
+    """
+    Recent announcements of each user, kept to replay the ones a client
+    missed while reconnecting.
+
+    Events are replayed in the order the broker delivered them, which is the
+    same on every worker, rather than by event id: ids are reserved in blocks
+    by each publishing worker, so a later delivery may carry a smaller id.
+
+    Holds up to `size` events for each of the `max_users` users most
+    recently announced to, and the delivery position of the last
+    `max_events` event ids. Payloads are shared between users.
+    """
+
+    def __init__(self, *, size: int, max_users: int, max_events: int):
+        self.size = size
+        self.max_users = max_users
+        self.max_events = max_events
+
+        self._logs: OrderedDict[IDType, _UserLog] = OrderedDict()
+        self._positions: OrderedDict[int, int] = OrderedDict()
+        self.position = 0
+        # Events up to this position may have been dropped with an evicted
+        # user.
+        self.truncated_through = 0
+
+    def record(self, event_id: int) -> int:
+        """
+        Returns the delivery position of the given event, the next one.
+        """
+
+        self.position += 1
+        if self.size:
+            self._positions[event_id] = self.position
+            if len(self._positions) > self.max_events:
+                self._positions.popitem(last=False)
+        return self.position
+
+    def append(self, user_id: IDType, position: int, payload: OutboundPayload):
+        if not self.size:
+            return
+
+        log = self._logs.get(user_id)
+        if log is None:
+            log = self._logs[user_id] = _UserLog()
+            if len(self._logs) > self.max_users:
+                _, evicted = self._logs.popitem(last=False)
+                if evicted.events:
+                    last_position = evicted.events[-1][0]
+                    self.truncated_through = max(self.truncated_through, last_position)
+        else:
+            self._logs.move_to_end(user_id)
+
+        if len(log.events) == self.size:
+            log.truncated_through, _ = log.events.popleft()
+        log.events.append((position, payload))
+
+    def since(self, user_id: IDType, event_id: int) -> list[OutboundPayload] | None:
+        """
+        Returns payloads of the user delivered after the event `event_id`, or
+        None if some of them are no longer kept, or the event is not known.
+
+        The event id 0 stands for the start of the log, before any event was
+        delivered.
+        """
+
+        if event_id:
+            position = self._positions.get(event_id)
+            if position is None:
+                return None
+        elif self.position:
+            # The client did not see any event, but may have been connected
+            # to another worker that started later than this one.
+            return None
+        else:
+            position = 0
+
+        log = self._logs.get(user_id)
+        if log is None:
+            return [] if position >= self.truncated_through else None
+        if position < log.truncated_through:
+            return None
+        return [payload for position_, payload in log.events if position_ > position]
@@ -0,0 +1,126 @@
+import os
+from collections.abc import AsyncIterator, Awaitable, Callable
+from pathlib import Path
+
+import pytest
+
+# Settings the app requires at import, for running the tests without a
+# `.env`. Tests using the database are skipped unless it is reachable.
+if not (Path(__file__).parent.parent / ".env").exists():
+    for key, value in {
+        "PROJECT_NAME": "minichat-tests",
+        "SECRET_KEY": "tests",
+        "SITE_URL": "http://localhost",
+        "ALLOW_ORIGINS": '["http://localhost"]',
+        "DATABASE__POSTGRES_SERVER": "localhost",
+        "DATABASE__POSTGRES_PORT": "5432",
+        "DATABASE__POSTGRES_USER": "postgres",
+        "DATABASE__POSTGRES_PASSWORD": "postgres",
+        "DATABASE__POSTGRES_DB": "minichat-db",
+        "S3__ENDPOINT_URL": "http://localhost:9000",
+        "S3__ACCESS_KEY_ID": "tests",
+        "S3__SECRET_ACCESS_KEY": "tests",
+        "S3__BUCKET_NAME": "tests",
+    }.items():
+        os.environ.setdefault(key, value)
+
+from sqlalchemy.exc import DBAPIError  # noqa: E402
+from sqlalchemy.ext.asyncio import (  # noqa: E402
+    AsyncConnection,
+    AsyncEngine,
+    AsyncSession,
+    create_async_engine,
+)
+from sqlalchemy.pool import NullPool  # noqa: E402
+
+from app.core.config import config  # noqa: E402
+from app.schemas import TokenType, UserIDSchema, UserRegisterSchema  # noqa: E402
+from app.services import UserAuthService  # noqa: E402
+from app.utils.security import JWTManager  # noqa: E402
+from app.utils.uow import AsyncUnitOfWork  # noqa: E402
+
+PASSWORD = "correct horse battery staple"
+
+Register = Callable[[str], Awaitable[UserIDSchema]]
+
+
+@pytest.fixture
+def anyio_backend() -> str:
+    return "asyncio"
+
+
+@pytest.fixture
+async def engine() -> AsyncIterator[AsyncEngine]:
+    """
+    An engine of the configured database, migrated to the latest revision.
+    """
+
+    engine = create_async_engine(config.database.uri, poolclass=NullPool)
+    try:
+        async with engine.connect():
+            pass
+    except (OSError, DBAPIError) as error:
+        await engine.dispose()
+        pytest.skip(f"database not reachable: {error}")
+
+    yield engine
+    await engine.dispose()
+
+
+@pytest.fixture
+async def connection(engine: AsyncEngine) -> AsyncIterator[AsyncConnection]:
+    """
+    A connection in a transaction rolled back after the test.
+    """
+
+    async with engine.connect() as connection:
+        transaction = await connection.begin()
+        try:
+            yield connection
+        finally:
+            await transaction.rollback()
+
+
+@pytest.fixture
+async def session(connection: AsyncConnection) -> AsyncIterator[AsyncSession]:
+    async with AsyncSession(bind=connection, expire_on_commit=False) as session:
+        yield session
+
+
+@pytest.fixture
+def uow(connection: AsyncConnection) -> AsyncUnitOfWork:
+    """
+    A unit of work on the test connection, whose commits only release a
+    savepoint of the transaction rolled back after the test.
+    """
+
+    return AsyncUnitOfWork(
+        lambda: AsyncSession(
+            bind=connection,
+            expire_on_commit=False,
+            join_transaction_mode="create_savepoint",
+        )
+    )
+
+
+@pytest.fixture
+def register(uow: AsyncUnitOfWork) -> Register:
+    """
+    Registers a user named after the given word, with `PASSWORD`.
+    """
+
+    async def register(name: str) -> UserIDSchema:
+        token = await UserAuthService(config, uow).register(
+            registerSchema=UserRegisterSchema(
+                fullname=name,
+                username=f"@{name}",
+                email=f"{name}@example.com",
+                password=PASSWORD,
+            )
+        )
+        payload = JWTManager.validate_token(
+            config, token.access_token, TokenType.access_token
+        )
+        return UserIDSchema(id=payload.id)
+
+    return register
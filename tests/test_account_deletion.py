@@ -0,0 +1,92 @@
+import asyncio
+
+import pytest
+
+from app.core.config import PurgeConfig, config
+from app.core.exceptions import ChatNotFoundError
+from app.schemas import (
+    ChatIDSchema,
+    ChatInfoFetchSchema,
+    ChatRetrieveSchema,
+    MessageCreateSchema,
+    UserPasswordSchema,
+)
+from app.services import ChatService, UserAuthService
+from app.utils.purge import Purger
+from app.utils.uow import AsyncUnitOfWork
+
+from .conftest import PASSWORD, Register
+
+pytestmark = pytest.mark.anyio
+
+
+@pytest.fixture(autouse=True)
+def purge_queue() -> asyncio.Queue:
+    Purger.queue = asyncio.Queue()
+    Purger.queued = set()
+    return Purger.queue
+
+
+async def test_deleted_account_cannot_send_messages(
+    uow: AsyncUnitOfWork, register: Register, purge_queue: asyncio.Queue
+):
+    alice = await register("alice")
+    bob = await register("bob")
+    chats = ChatService(config, uow)
+    chat = await chats.get_or_create_chat(
+        userIDSchema=alice, retrieveSchema=ChatRetrieveSchema(with_user_id=bob.id)
+    )
+    message = MessageCreateSchema(chat_id=chat.id, sender_id=alice.id, content="Hi")
+    await chats.send_message(messageSchema=message)
+
+    await UserAuthService(config, uow).delete_account(
+        idSchema=alice, passwordSchema=UserPasswordSchema(password=PASSWORD)
+    )
+
+    with pytest.raises(ChatNotFoundError):
+        await chats.send_message(messageSchema=message)
+    page = await chats.get_chats_info(fetchSchema=ChatInfoFetchSchema(user_id=bob.id))
+    assert page.chats == []
+
+    # The hidden chat is purged before the user row its messages refer to.
+    assert [purge_queue.get_nowait() for _ in range(purge_queue.qsize())] == [
+        ("chat", chat.id),
+        ("account", alice.id),
+    ]
+
+
+async def test_chats_beyond_the_first_batch_are_hidden_by_the_purge(
+    uow: AsyncUnitOfWork, register: Register, purge_queue: asyncio.Queue
+):
+    alice = await register("alice")
+    chats = ChatService(config, uow)
+    chat_ids = []
+    for name in ("bob", "carol"):
+        other = await register(name)
+        chat = await chats.get_or_create_chat(
+            userIDSchema=alice, retrieveSchema=ChatRetrieveSchema(with_user_id=other.id)
+        )
+        chat_ids.append(chat.id)
+
+    Purger.settings = PurgeConfig(BATCH_SIZE=1, BATCH_PAUSE_SECONDS=0)
+    try:
+        await UserAuthService(config, uow).delete_account(
+            idSchema=alice, passwordSchema=UserPasswordSchema(password=PASSWORD)
+        )
+        async with uow:
+            [hidden] = await uow.chatRepository.get_hidden_ids()
+        assert [purge_queue.get_nowait() for _ in range(purge_queue.qsize())] == [
+            ("chat", hidden),
+            ("account", alice.id),
+        ]
+
+        Purger.uow = uow
+        await Purger.purge_chat(ChatIDSchema(id=hidden))
+        await Purger.purge_account(alice)
+        async with uow:
+            for chat_id in chat_ids:
+                assert await uow.chatRepository.get(ChatIDSchema(id=chat_id)) is None
+            assert await uow.userRepository.get(alice) is None
+    finally:
+        Purger.settings = PurgeConfig()
+        Purger.uow = None
@@ -0,0 +1,36 @@
+import asyncio
+
+import pytest
+from sqlalchemy import delete
+from sqlalchemy.ext.asyncio import AsyncEngine
+
+from app.db.models import BrokerPayloadModel
+from app.utils.websockets.broker import PostgresBroker
+
+pytestmark = pytest.mark.anyio
+
+CHANNEL = "minichat_tests"
+
+
+async def test_payloads_too_large_for_notify_reach_other_listeners(
+    engine: AsyncEngine,
+):
+    listener = PostgresBroker(engine)
+    received: asyncio.Queue[str] = asyncio.Queue()
+    await listener.subscribe(CHANNEL, received.put)
+    await listener.start()
+
+    try:
+        small, large = "{}", "ж" * PostgresBroker.MAX_PAYLOAD_BYTES
+        publisher = PostgresBroker(engine)
+        await publisher.publish(CHANNEL, small)
+        await publisher.publish(CHANNEL, large)
+
+        assert await asyncio.wait_for(received.get(), 5) == small
+        assert await asyncio.wait_for(received.get(), 5) == large
+    finally:
+        await listener.stop()
+        async with engine.begin() as connection:
+            await connection.execute(
+                delete(BrokerPayloadModel).where(BrokerPayloadModel.channel == CHANNEL)
+            )
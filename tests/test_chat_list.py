@@ -0,0 +1,68 @@
+import uuid
+
+import pytest
+
+from app.core.config import CacheConfig, config
+from app.schemas import ChatInfoFetchSchema, ChatInfoPageSchema, ChatRetrieveSchema
+from app.services import ChatService
+from app.utils.cache import ChatListCache
+from app.utils.uow import AsyncUnitOfWork
+from app.utils.websockets.broker import InProcessBroker
+
+from .conftest import Register
+
+pytestmark = pytest.mark.anyio
+
+
+async def test_chat_list_is_whole_unless_paged(
+    uow: AsyncUnitOfWork, register: Register
+):
+    alice = await register("alice")
+    chats = ChatService(config, uow)
+    for name in ("bob", "carol", "dave"):
+        other = await register(name)
+        await chats.get_or_create_chat(
+            userIDSchema=alice, retrieveSchema=ChatRetrieveSchema(with_user_id=other.id)
+        )
+
+    whole = await chats.get_chats_info(
+        fetchSchema=ChatInfoFetchSchema(user_id=alice.id)
+    )
+    assert len(whole.chats) == 3
+    assert whole.next_cursor is None
+
+    first = await chats.get_chats_info(
+        fetchSchema=ChatInfoFetchSchema(user_id=alice.id, count=2)
+    )
+    assert first.chats == whole.chats[:2]
+    assert first.next_cursor
+
+    rest = await chats.get_chats_info(
+        fetchSchema=ChatInfoFetchSchema(user_id=alice.id, cursor=first.next_cursor)
+    )
+    assert rest.chats == whole.chats[2:]
+    assert rest.next_cursor is None
+
+
+@pytest.fixture
+async def lagging_replicas():
+    await ChatListCache.start(InProcessBroker(), CacheConfig(), replica_lag=60)
+    yield
+    await ChatListCache.start(InProcessBroker(), CacheConfig())
+
+
+@pytest.mark.usefixtures("lagging_replicas")
+async def test_lists_invalidated_within_the_replica_lag_are_not_stored():
+    owner, other = uuid.uuid4(), uuid.uuid4()
+    page = ChatInfoPageSchema(chats=[], next_cursor=None)
+
+    await ChatListCache.invalidate(owner_ids=[owner])
+    for user_id in (owner, other):
+        ChatListCache.set(user_id, None, page, ChatListCache.begin(user_id))
+    assert ChatListCache.get(owner, None) is None
+    assert ChatListCache.get(other, None) == page
+
+    # Renames and deletions may change the list of any owner.
+    await ChatListCache.invalidate(user_ids=[uuid.uuid4()])
+    ChatListCache.set(other, 10, page, ChatListCache.begin(other))
+    assert ChatListCache.get(other, 10) is None
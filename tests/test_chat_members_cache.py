@@ -0,0 +1,66 @@
+import pytest
+from sqlalchemy.ext.asyncio import AsyncConnection, AsyncSession
+
+from app.core.config import CacheConfig, config
+from app.schemas import ChatIDSchema, ChatRetrieveSchema
+from app.services import ChatService
+from app.utils.cache import ChatMembersCache
+from app.utils.uow import AsyncUnitOfWork
+from app.utils.websockets.broker import InProcessBroker
+
+from .conftest import Register
+
+pytestmark = pytest.mark.anyio
+
+
+@pytest.fixture(autouse=True)
+async def members_cache():
+    await ChatMembersCache.start(InProcessBroker(), CacheConfig())
+    yield
+    await ChatMembersCache.start(InProcessBroker(), CacheConfig())
+
+
+async def create_chat(uow: AsyncUnitOfWork, register: Register) -> ChatIDSchema:
+    alice, bob = await register("alice"), await register("bob")
+    chat = await ChatService(config, uow).get_or_create_chat(
+        userIDSchema=alice, retrieveSchema=ChatRetrieveSchema(with_user_id=bob.id)
+    )
+    return ChatIDSchema(id=chat.id)
+
+
+async def test_read_only_lookups_on_the_primary_are_cached(
+    uow: AsyncUnitOfWork, register: Register
+):
+    chatIDSchema = await create_chat(uow, register)
+
+    # Without replicas, read-only units of work use the primary.
+    async with uow.read_only() as read_uow:
+        members = await ChatService(config, uow).get_chat_member_ids(
+            read_uow, chatIDSchema
+        )
+
+    assert len(members) == 2
+    assert ChatMembersCache.get(chatIDSchema.id) == members
+
+
+async def test_lookups_on_a_replica_are_not_cached(
+    connection: AsyncConnection, register: Register
+):
+    def session_factory() -> AsyncSession:
+        return AsyncSession(
+            bind=connection,
+            expire_on_commit=False,
+            join_transaction_mode="create_savepoint",
+        )
+
+    uow = AsyncUnitOfWork(session_factory, read_session_factory=session_factory)
+    chatIDSchema = await create_chat(uow, register)
+
+    async with uow.read_only() as read_uow:
+        assert read_uow.is_replica
+        members = await ChatService(config, uow).get_chat_member_ids(
+            read_uow, chatIDSchema
+        )
+
+    assert len(members) == 2
+    assert ChatMembersCache.get(chatIDSchema.id) is None
@@ -0,0 +1,32 @@
+import msgpack
+
+from app.schemas import HeartbeatPingSchema
+from app.utils.websockets.codecs import (
+    JSONCodec,
+    MessagePackCodec,
+    OutboundBatch,
+    OutboundPayload,
+    negotiate_codec,
+)
+
+
+def test_negotiates_the_first_supported_subprotocol():
+    codec, subprotocol = negotiate_codec(["unknown", "minichat.msgpack.v1"])
+    assert isinstance(codec, MessagePackCodec)
+    assert subprotocol == "minichat.msgpack.v1"
+
+    # Compression is the permessage-deflate extension, not a subprotocol.
+    for offered in (["unknown"], ["minichat.msgpack.v1+deflate"]):
+        codec, subprotocol = negotiate_codec(offered)
+        assert isinstance(codec, JSONCodec)
+        assert subprotocol is None
+
+
+def test_batches_are_arrays_in_either_codec():
+    ping = OutboundPayload("ping", HeartbeatPingSchema())
+    batch = OutboundBatch([ping, ping])
+
+    json_codec, msgpack_codec = JSONCodec(), MessagePackCodec()
+    expected = [{"announcement_type": "ping"}] * 2
+    assert json_codec.decode(json_codec.join(batch.encode(json_codec))) == expected
+    assert msgpack.unpackb(msgpack_codec.join(batch.encode(msgpack_codec))) == expected
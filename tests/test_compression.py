@@ -0,0 +1,85 @@
+import pytest
+from uvicorn.config import Config
+from uvicorn.server import ServerState
+from websockets import frames
+from websockets.extensions.permessage_deflate import (
+    ClientPerMessageDeflateFactory,
+)
+
+from app.core.config import WebSocketConfig
+from app.utils.websockets import compression
+from app.utils.websockets.compression import (
+    CompressionStats,
+    DeflateWebSocketProtocol,
+    ThresholdPerMessageDeflate,
+    ThresholdPerMessageDeflateFactory,
+)
+
+pytestmark = pytest.mark.anyio
+
+
+@pytest.fixture(autouse=True)
+def stats(monkeypatch: pytest.MonkeyPatch) -> CompressionStats:
+    stats = CompressionStats()
+    monkeypatch.setattr(compression, "stats", stats)
+    return stats
+
+
+def negotiate(settings: WebSocketConfig):
+    """
+    Returns the server and client ends of a negotiated extension.
+    """
+
+    client_factory = ClientPerMessageDeflateFactory(client_max_window_bits=True)
+    response, server = ThresholdPerMessageDeflateFactory(
+        settings
+    ).process_request_params(client_factory.get_request_params(), [])
+    client = client_factory.process_response_params(response, [])
+    return server, client
+
+
+def test_small_messages_are_sent_uncompressed(stats: CompressionStats):
+    server, client = negotiate(WebSocketConfig(COMPRESSION_MIN_SIZE=100))
+    assert isinstance(server, ThresholdPerMessageDeflate)
+    assert server.local_max_window_bits == 12
+
+    small = frames.Frame(frames.OP_TEXT, b'{"announcement_type": "ping"}')
+    large = frames.Frame(frames.OP_TEXT, b'{"content": "hello"}' * 50)
+
+    sent_small = server.encode(small)
+    assert not sent_small.rsv1
+    assert sent_small.data == small.data
+
+    sent_large = server.encode(large)
+    assert sent_large.rsv1
+    assert len(sent_large.data) < len(large.data)
+    assert client.decode(sent_large).data == large.data
+
+    assert stats.frames_uncompressed == stats.frames_compressed == 1
+    assert stats.bytes_in == len(small.data) + len(large.data)
+    assert stats.bytes_out == len(small.data) + len(sent_large.data)
+    assert stats.schema().ratio < 0.5
+
+
+def test_context_takeover_can_be_disabled():
+    server, _ = negotiate(WebSocketConfig(COMPRESSION_CONTEXT_TAKEOVER=False))
+    assert server.local_no_context_takeover
+
+
+async def test_protocol_negotiates_the_configured_extension(
+    monkeypatch: pytest.MonkeyPatch,
+):
+    async def app(scope, receive, send): ...
+
+    def protocol() -> DeflateWebSocketProtocol:
+        return DeflateWebSocketProtocol(
+            config=Config(app=app), server_state=ServerState(), app_state={}
+        )
+
+    factories = protocol().available_extensions
+    assert factories and isinstance(factories[0], ThresholdPerMessageDeflateFactory)
+
+    monkeypatch.setattr(
+        compression.config, "websocket", WebSocketConfig(COMPRESSION_ENABLED=False)
+    )
+    assert protocol().available_extensions == []
@@ -0,0 +1,37 @@
+import pytest
+from sqlalchemy import exc
+from sqlalchemy.ext.asyncio import AsyncEngine
+
+from app.core.config import config
+from app.db.configs import PostgresPoolConfig
+from app.db.session import create_engine, pool_stats
+
+pytestmark = pytest.mark.anyio
+
+
+@pytest.mark.usefixtures("engine")
+async def test_pool_settings_apply_and_starvation_shows_in_stats():
+    database = config.database.model_copy(
+        update={
+            "pool": PostgresPoolConfig(
+                SIZE=1, MAX_OVERFLOW=0, TIMEOUT_SECONDS=0.1, STATEMENT_CACHE_SIZE=0
+            )
+        }
+    )
+    engine: AsyncEngine = create_engine(database)
+    try:
+        async with engine.connect() as connection:
+            raw = await connection.get_raw_connection()
+            assert raw.dbapi_connection._prepared_statement_cache is None
+
+            with pytest.raises(exc.TimeoutError):
+                async with engine.connect():
+                    pass
+
+            stats = pool_stats(engine)
+            assert stats is not None
+            assert (stats.size, stats.max_overflow) == (1, 0)
+            assert (stats.checked_out, stats.timeouts) == (1, 1)
+            assert stats.wait_seconds_max >= 0.1
+    finally:
+        await engine.dispose()
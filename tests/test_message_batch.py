@@ -0,0 +1,58 @@
+import pytest
+
+from app.core.config import config
+from app.core.exceptions import ChatNotFoundError
+from app.schemas import (
+    ChatIDSchema,
+    ChatInfoFetchSchema,
+    ChatRetrieveSchema,
+    MessageBatchCreateSchema,
+    MessageContentSchema,
+)
+from app.services import ChatService
+from app.utils.uow import AsyncUnitOfWork
+
+from .conftest import Register
+
+pytestmark = pytest.mark.anyio
+
+
+async def test_batches_are_inserted_in_order_and_summarized_once(
+    uow: AsyncUnitOfWork, register: Register
+):
+    alice, bob, carol = (
+        await register("alice"),
+        await register("bob"),
+        await register("carol"),
+    )
+    chats = ChatService(config, uow)
+    chat = await chats.get_or_create_chat(
+        userIDSchema=alice, retrieveSchema=ChatRetrieveSchema(with_user_id=bob.id)
+    )
+    contents = [f"Hi {i}" for i in range(3)]
+
+    def batch(sender_id) -> MessageBatchCreateSchema:
+        return MessageBatchCreateSchema(
+            chat_id=chat.id,
+            sender_id=sender_id,
+            messages=[MessageContentSchema(content=c) for c in contents],
+        )
+
+    messages = await chats.send_messages(batchSchema=batch(alice.id))
+    assert [message.content for message in messages] == contents
+    assert {message.chat_id for message in messages} == {chat.id}
+
+    [info] = (
+        await chats.get_chats_info(fetchSchema=ChatInfoFetchSchema(user_id=bob.id))
+    ).chats
+    assert info.last_message == messages[-1]
+    assert info.unread_count == 3
+
+    # Non-members are rejected before anything is inserted.
+    with pytest.raises(ChatNotFoundError):
+        await chats.send_messages(batchSchema=batch(carol.id))
+    async with uow:
+        count = await uow.messageRepository.count_in_chat(
+            chat_id_schema=ChatIDSchema(id=chat.id), limit=10
+        )
+    assert count == 3
@@ -0,0 +1,82 @@
+import pytest
+from sqlalchemy import event
+from sqlalchemy.ext.asyncio import AsyncConnection
+
+from app.core.config import config
+from app.core.exceptions import MessageNotFoundError
+from app.schemas import (
+    ChatInfoFetchSchema,
+    ChatRetrieveSchema,
+    MessageCreateSchema,
+    MessageEditSchema,
+    MessageIDSchema,
+)
+from app.services import ChatService, MessageService
+from app.utils.uow import AsyncUnitOfWork
+
+from .conftest import Register
+
+pytestmark = pytest.mark.anyio
+
+
+async def test_edit_and_delete_take_one_statement_and_return_recipients(
+    connection: AsyncConnection, uow: AsyncUnitOfWork, register: Register
+):
+    alice, bob = await register("alice"), await register("bob")
+    chats = ChatService(config, uow)
+    chat = await chats.get_or_create_chat(
+        userIDSchema=alice, retrieveSchema=ChatRetrieveSchema(with_user_id=bob.id)
+    )
+    first, second = [
+        await chats.send_message(
+            messageSchema=MessageCreateSchema(
+                chat_id=chat.id, sender_id=alice.id, content=content
+            )
+        )
+        for content in ("Hi", "There")
+    ]
+    messages = MessageService(config, uow)
+
+    statements: list[str] = []
+
+    def record(conn, cursor, statement, *args) -> None:
+        if not statement.startswith(("SAVEPOINT", "RELEASE", "ROLLBACK")):
+            statements.append(statement)
+
+    event.listen(connection.sync_connection, "before_cursor_execute", record)
+    try:
+        edited = await messages.edit(
+            message_schema=MessageEditSchema(id=first.id, content="Hello"),
+            sender_id=alice.id,
+        )
+    finally:
+        event.remove(connection.sync_connection, "before_cursor_execute", record)
+
+    assert len(statements) == 1
+    assert edited.message.content == "Hello"
+    assert sorted(edited.recipients) == sorted([alice.id, bob.id])
+
+    # Only the sender may change a message, when one is given.
+    with pytest.raises(MessageNotFoundError):
+        await messages.edit(
+            message_schema=MessageEditSchema(id=first.id, content="Hey"),
+            sender_id=bob.id,
+        )
+    with pytest.raises(MessageNotFoundError):
+        await messages.delete(
+            message_schema=MessageIDSchema(id=second.id), sender_id=bob.id
+        )
+
+    deleted = await messages.delete(
+        message_schema=MessageIDSchema(id=second.id), sender_id=alice.id
+    )
+    assert (deleted.message.id, deleted.message.chat_id) == (second.id, chat.id)
+    assert sorted(deleted.recipients) == sorted([alice.id, bob.id])
+
+    # The chat summary falls back to the previous message.
+    [info] = (
+        await chats.get_chats_info(fetchSchema=ChatInfoFetchSchema(user_id=bob.id))
+    ).chats
+    assert info.last_message is not None
+    assert (info.last_message.id, info.last_message.content) == (first.id, "Hello")
+    assert info.unread_count == 1
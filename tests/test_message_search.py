@@ -0,0 +1,69 @@
+import pytest
+
+from app.core.config import config
+from app.schemas import ChatRetrieveSchema, MessageCreateSchema, MessageSearchSchema
+from app.services import ChatService
+from app.utils.uow import AsyncUnitOfWork
+
+from .conftest import Register
+
+pytestmark = pytest.mark.anyio
+
+
+async def test_search_snippet_escapes_content(uow: AsyncUnitOfWork, register: Register):
+    alice = await register("alice")
+    bob = await register("bob")
+    chats = ChatService(config, uow)
+    chat = await chats.get_or_create_chat(
+        userIDSchema=alice, retrieveSchema=ChatRetrieveSchema(with_user_id=bob.id)
+    )
+    await chats.send_message(
+        messageSchema=MessageCreateSchema(
+            chat_id=chat.id,
+            sender_id=alice.id,
+            content="<img src=x onerror=alert(1)> \x02hello\x03 'world'",
+        )
+    )
+
+    page = await chats.search_messages(
+        searchSchema=MessageSearchSchema(user_id=bob.id, query="hello")
+    )
+
+    assert [result.snippet for result in page.results] == [
+        "onerror=alert(1)&gt; <b>hello</b> &#x27;world"
+    ]
+
+
+async def test_search_pages_continue_with_the_cursor(
+    uow: AsyncUnitOfWork, register: Register
+):
+    alice = await register("alice")
+    bob = await register("bob")
+    chats = ChatService(config, uow)
+    chat = await chats.get_or_create_chat(
+        userIDSchema=alice, retrieveSchema=ChatRetrieveSchema(with_user_id=bob.id)
+    )
+    sent = {
+        (
+            await chats.send_message(
+                messageSchema=MessageCreateSchema(
+                    chat_id=chat.id, sender_id=alice.id, content=f"hello {i}"
+                )
+            )
+        ).id
+        for i in range(5)
+    }
+
+    found, cursor = [], None
+    while True:
+        page = await chats.search_messages(
+            searchSchema=MessageSearchSchema(
+                user_id=bob.id, query="hello", count=2, cursor=cursor
+            )
+        )
+        found += [result.message.id for result in page.results]
+        if not (cursor := page.next_cursor):
+            break
+
+    assert len(found) == len(sent)
+    assert set(found) == sent
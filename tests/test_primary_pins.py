@@ -0,0 +1,49 @@
+import time
+import uuid
+
+import pytest
+
+from app.core.config import CacheConfig
+from app.schemas import CacheInvalidationSchema
+from app.utils.cache import PrimaryPins
+from app.utils.websockets.broker import InProcessBroker
+
+pytestmark = pytest.mark.anyio
+
+
+class RecordingBroker(InProcessBroker):
+    def __init__(self) -> None:
+        super().__init__()
+        self.published: list[str] = []
+
+    async def publish(self, channel: str, payload: str) -> None:
+        self.published.append(payload)
+
+
+@pytest.fixture
+async def broker() -> RecordingBroker:
+    broker = RecordingBroker()
+    await PrimaryPins.start(broker, CacheConfig(), seconds=5)
+    return broker
+
+
+async def test_pins_are_published_once_per_period(broker: RecordingBroker):
+    user_id = uuid.uuid4()
+    assert not PrimaryPins.is_pinned(user_id)
+
+    await PrimaryPins.pin(user_id)
+    await PrimaryPins.pin(user_id)
+    assert PrimaryPins.is_pinned(user_id)
+    assert [
+        CacheInvalidationSchema.model_validate_json(payload).owner_ids
+        for payload in broker.published
+    ] == [[user_id]]
+
+
+async def test_received_pins_last_two_periods(broker: RecordingBroker):
+    user_id = uuid.uuid4()
+    schema = CacheInvalidationSchema(cache="primary_pins", owner_ids=[user_id])
+
+    await PrimaryPins.receive_invalidation(schema.model_dump_json())
+    until = PrimaryPins.pins.get(user_id)
+    assert until is not None and until - time.monotonic() > 5
@@ -0,0 +1,174 @@
+import asyncio
+import uuid
+from collections.abc import AsyncIterator
+
+import pytest
+from sqlalchemy import delete, select
+from sqlalchemy.ext.asyncio import AsyncEngine, async_sessionmaker
+
+from app.core.config import PurgeConfig, config
+from app.db.models import ChatModel, MessageModel, UserModel
+from app.schemas import (
+    ChatIDSchema,
+    ChatRetrieveSchema,
+    ChatUserSchema,
+    MessageCreateSchema,
+    TokenType,
+    UserIDSchema,
+    UserPasswordSchema,
+    UserRegisterSchema,
+)
+from app.services import ChatService, UserAuthService
+from app.utils.purge import Purger
+from app.utils.security import JWTManager
+from app.utils.uow import AsyncUnitOfWork
+
+from .conftest import PASSWORD, Register
+
+pytestmark = pytest.mark.anyio
+
+
+@pytest.fixture(autouse=True)
+async def purger() -> AsyncIterator[type[Purger]]:
+    Purger.settings = PurgeConfig(CHAT_BACKGROUND_MIN_MESSAGES=2, BATCH_PAUSE_SECONDS=0)
+    Purger.queue = asyncio.Queue()
+    Purger.queued = set()
+    yield Purger
+    await Purger.stop()
+    Purger.settings = PurgeConfig()
+
+
+async def create_chat(
+    uow: AsyncUnitOfWork, alice: UserIDSchema, bob: UserIDSchema, messages: int
+) -> ChatIDSchema:
+    chats = ChatService(config, uow)
+    chat = await chats.get_or_create_chat(
+        userIDSchema=alice, retrieveSchema=ChatRetrieveSchema(with_user_id=bob.id)
+    )
+    for i in range(messages):
+        await chats.send_message(
+            messageSchema=MessageCreateSchema(
+                chat_id=chat.id, sender_id=alice.id, content=f"Hi {i}"
+            )
+        )
+    return ChatIDSchema(id=chat.id)
+
+
+def queued() -> list:
+    return [Purger.queue.get_nowait() for _ in range(Purger.queue.qsize())]
+
+
+async def test_chats_with_many_messages_are_left_in_the_background(
+    uow: AsyncUnitOfWork, register: Register
+):
+    alice, bob, carol = (
+        await register("alice"),
+        await register("bob"),
+        await register("carol"),
+    )
+    small = await create_chat(uow, alice, bob, messages=1)
+    large = await create_chat(uow, alice, carol, messages=2)
+    chats = ChatService(config, uow)
+
+    await chats.leave_chat(
+        chatUserSchema=ChatUserSchema(user_id=alice.id, chat_id=small.id)
+    )
+    await chats.leave_chat(
+        chatUserSchema=ChatUserSchema(user_id=alice.id, chat_id=large.id)
+    )
+
+    # The small chat is deleted right away, the large one only hidden.
+    async with uow:
+        assert await uow.chatRepository.get_hidden_ids() == [large.id]
+        assert (
+            await uow.messageRepository.count_in_chat(chat_id_schema=small, limit=10)
+            == 0
+        )
+    assert queued() == [("chat", large.id)]
+
+
+async def test_purger_resumes_interrupted_jobs_on_start(
+    uow: AsyncUnitOfWork, register: Register
+):
+    alice, bob, carol = (
+        await register("alice"),
+        await register("bob"),
+        await register("carol"),
+    )
+    await create_chat(uow, alice, bob, messages=3)
+    left = await create_chat(uow, bob, carol, messages=3)
+    await ChatService(config, uow).leave_chat(
+        chatUserSchema=ChatUserSchema(user_id=bob.id, chat_id=left.id)
+    )
+    await UserAuthService(config, uow).delete_account(
+        idSchema=alice, passwordSchema=UserPasswordSchema(password=PASSWORD)
+    )
+
+    # Queued jobs are lost with the process.
+    await Purger.start(Purger.settings, uow, s3=None, bucket="")
+    async with asyncio.timeout(10):
+        while not Purger.queue.empty() or Purger.current:
+            await asyncio.sleep(0.01)
+
+    async with uow:
+        assert await uow.chatRepository.get_hidden_ids() == []
+        assert await uow.userRepository.get_deleted_ids() == []
+        assert await uow.userRepository.get(alice) is None
+
+
+async def test_delete_batch_skips_messages_locked_elsewhere(engine: AsyncEngine):
+    # Locks are only seen across connections, so the rows are committed and
+    # deleted after the test.
+    uow = AsyncUnitOfWork(async_sessionmaker(engine, expire_on_commit=False))
+    users: list[UserIDSchema] = []
+    chat: ChatIDSchema | None = None
+    try:
+        for name in ("alice", "bob"):
+            word = f"{name}{uuid.uuid4().hex[:8]}"
+            token = await UserAuthService(config, uow).register(
+                registerSchema=UserRegisterSchema(
+                    fullname=word,
+                    username=f"@{word}",
+                    email=f"{word}@example.com",
+                    password=PASSWORD,
+                )
+            )
+            payload = JWTManager.validate_token(
+                config, token.access_token, TokenType.access_token
+            )
+            users.append(UserIDSchema(id=payload.id))
+        chat = await create_chat(uow, *users, messages=3)
+
+        async with engine.connect() as other:
+            await other.begin()
+            locked = await other.scalar(
+                select(MessageModel.id)
+                .where(MessageModel.chat_id == chat.id)
+                .limit(1)
+                .with_for_update()
+            )
+
+            async with uow:
+                rows = await uow.messageRepository.delete_batch(
+                    chat_id_schema=chat, count=10
+                )
+                await uow.commit()
+            assert len(rows) == 2
+            assert locked not in {message_id for message_id, _ in rows}
+            await other.rollback()
+
+        async with uow:
+            rows = await uow.messageRepository.delete_batch(
+                chat_id_schema=chat, count=10
+            )
+            await uow.commit()
+        assert [message_id for message_id, _ in rows] == [locked]
+    finally:
+        async with engine.begin() as connection:
+            if chat:
+                await connection.execute(
+                    delete(ChatModel).where(ChatModel.id == chat.id)
+                )
+            await connection.execute(
+                delete(UserModel).where(UserModel.id.in_([u.id for u in users]))
+            )
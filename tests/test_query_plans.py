@@ -0,0 +1,217 @@
+"""
+Plans of the hot queries, checked against the indexes added for them.
+
+Each query is built by its repository method and captured as it runs, then
+explained with the same parameters. Sequential scans are disabled, so that
+the planner picks an index on the nearly empty test tables whenever one
+can serve the query, and the tests fail once none can.
+"""
+
+import json
+import uuid
+from collections.abc import Awaitable, Callable
+from datetime import UTC, datetime
+from typing import Any
+
+import pytest
+from sqlalchemy import event, select, text
+from sqlalchemy.ext.asyncio import AsyncConnection, AsyncSession
+
+from app.db.models import MessageModel
+from app.db.repositories import (
+    AttachmentRepository,
+    ChatUserRepository,
+    MessageRepository,
+    UserRepository,
+)
+from app.schemas import (
+    ChatIDSchema,
+    ChatInfoCursorSchema,
+    ChatSearchByType,
+    ChatSearchCursorSchema,
+    MessageCursorSchema,
+    MessageSearchCursorSchema,
+    UserIDSchema,
+)
+
+pytestmark = pytest.mark.anyio
+
+Explain = Callable[[Callable[[], Awaitable[Any]]], Awaitable[set[str]]]
+
+
+def index_names(plan: dict[str, Any]) -> set[str]:
+    names = {plan["Index Name"]} if "Index Name" in plan else set()
+    for child in plan.get("Plans", ()):
+        names |= index_names(child)
+    return names
+
+
+@pytest.fixture
+async def explain(connection: AsyncConnection) -> Explain:
+    await connection.execute(text("SET LOCAL enable_seqscan = off"))
+
+    async def explain(run: Callable[[], Awaitable[Any]]) -> set[str]:
+        """
+        Runs the query and returns the names of the indexes its plan uses.
+        """
+
+        statements: list[tuple[str, Any]] = []
+
+        def capture(conn, cursor, statement, parameters, context, executemany):
+            statements.append((statement, parameters))
+
+        sync_connection = connection.sync_connection
+        assert sync_connection is not None
+        event.listen(sync_connection, "before_cursor_execute", capture)
+        try:
+            await run()
+        finally:
+            event.remove(sync_connection, "before_cursor_execute", capture)
+
+        statement, parameters = statements[-1]
+        result = await connection.exec_driver_sql(
+            f"EXPLAIN (FORMAT JSON) {statement}", parameters
+        )
+        plan = result.scalar_one()
+        if isinstance(plan, str):
+            plan = json.loads(plan)
+        return index_names(plan[0]["Plan"])
+
+    return explain
+
+
+def new_id() -> uuid.UUID:
+    return uuid.uuid4()
+
+
+@pytest.mark.parametrize("direction", ["older", "newer"])
+@pytest.mark.parametrize("paged", [False, True])
+async def test_message_page_uses_chat_timestamp_index(
+    session: AsyncSession, explain: Explain, direction, paged
+):
+    # 3f9c2d7e8b41
+    cursor = None
+    if paged:
+        cursor = MessageCursorSchema(id=new_id(), timestamp=datetime.now(UTC))
+
+    indexes = await explain(
+        lambda: MessageRepository(session).fetch_page(
+            chat_id_schema=ChatIDSchema(id=new_id()),
+            cursor=cursor,
+            direction=direction,
+            count=50,
+        )
+    )
+    assert "ix_message_chat_id_timestamp_id" in indexes
+
+
+async def test_purge_batch_uses_chat_timestamp_index(
+    session: AsyncSession, explain: Explain
+):
+    # 3f9c2d7e8b41, its leading column serves lookups by chat.
+    indexes = await explain(
+        lambda: MessageRepository(session).delete_batch(
+            chat_id_schema=ChatIDSchema(id=new_id()), count=1000
+        )
+    )
+    assert "ix_message_chat_id_timestamp_id" in indexes
+    assert "ix_attachment_message_id" in indexes
+
+
+async def test_chat_attachments_use_message_id_index(
+    session: AsyncSession, explain: Explain
+):
+    # 8d41b6a0c2f7
+    indexes = await explain(
+        lambda: AttachmentRepository(session).get_ids_in_chat(ChatIDSchema(id=new_id()))
+    )
+    assert "ix_attachment_message_id" in indexes
+
+
+async def test_sender_foreign_key_check_uses_sender_id_index(
+    session: AsyncSession, explain: Explain
+):
+    # 8d41b6a0c2f7, the lookup Postgres runs for the foreign key when a user
+    # row is deleted, see Purger.purge_account.
+    indexes = await explain(
+        lambda: session.execute(
+            select(MessageModel.id)
+            .where(MessageModel.sender_id == new_id())
+            .with_for_update(key_share=True)
+        )
+    )
+    assert "ix_message_sender_id" in indexes
+
+
+@pytest.mark.parametrize("paged", [False, True])
+async def test_chat_list_uses_user_activity_index(
+    session: AsyncSession, explain: Explain, paged
+):
+    # 8d41b6a0c2f7, extended with the activity order by 21f9555f53fe.
+    cursor = None
+    if paged:
+        cursor = ChatInfoCursorSchema(last_activity=datetime.now(UTC), chat_id=new_id())
+
+    indexes = await explain(
+        lambda: ChatUserRepository(session).get_chats_info(
+            UserIDSchema(id=new_id()), cursor=cursor, count=50
+        )
+    )
+    assert "ix_chat_user_user_id_last_activity_chat_id" in indexes
+
+
+@pytest.mark.parametrize("by", list(ChatSearchByType))
+@pytest.mark.parametrize("paged", [False, True])
+async def test_user_search_uses_trigram_index(
+    session: AsyncSession, explain: Explain, by, paged
+):
+    # c7e15a93d0b2
+    repository = UserRepository(session)
+    if not await repository.has_trigram():
+        pytest.skip("pg_trgm is not installed")
+
+    cursor = None
+    if paged:
+        cursor = ChatSearchCursorSchema(
+            prefix=True, score=0.5, value="alice", id=new_id()
+        )
+
+    indexes = await explain(
+        lambda: repository.search(
+            by=by,
+            contains="ali",
+            skip_id=UserIDSchema(id=new_id()),
+            cursor=cursor,
+            count=20,
+        )
+    )
+    assert f"ix_user_{by.value}_trgm" in indexes
+
+
+@pytest.mark.parametrize("in_chat", [False, True])
+@pytest.mark.parametrize("paged", [False, True])
+async def test_message_search_uses_tsvector_index(
+    session: AsyncSession, explain: Explain, in_chat, paged
+):
+    # 5b2e9f1a7c34. Scanning the messages of the user's chats is cheaper on
+    # tables this small, so that path is taken away for the test, which the
+    # rollback undoes.
+    await session.execute(text("SET LOCAL enable_nestloop = off"))
+    await session.execute(text("DROP INDEX ix_message_chat_id_timestamp_id"))
+
+    cursor = None
+    if paged:
+        cursor = MessageSearchCursorSchema(
+            id=new_id(), timestamp=datetime.now(UTC), rank=0.1
+        )
+
+    indexes = await explain(
+        lambda: MessageRepository(session).search(
+            user_id_schema=UserIDSchema(id=new_id()),
+            query='hello "good morning" -bye',
+            chat_id_schema=ChatIDSchema(id=new_id()) if in_chat else None,
+            cursor=cursor,
+            count=20,
+        )
+    )
+    assert "ix_message_content_tsv" in indexes
@@ -0,0 +1,104 @@
+import asyncio
+import uuid
+
+import pytest
+
+from app.core.config import CacheConfig
+from app.schemas import ChatReadMarkerSchema
+from app.utils.cache import ReadMarkerBuffer
+
+pytestmark = pytest.mark.anyio
+
+
+class FakeChatUserRepository:
+    def __init__(self) -> None:
+        self.failures = 0
+        self.written: list[ChatReadMarkerSchema] = []
+        self.release: asyncio.Event | None = None
+        self.started = asyncio.Event()
+
+    async def move_read_markers(self, markers: list[ChatReadMarkerSchema]) -> int:
+        self.started.set()
+        if self.release:
+            await self.release.wait()
+        if self.failures:
+            self.failures -= 1
+            raise ConnectionError("database is unreachable")
+        self.written.extend(markers)
+        return 0
+
+
+class FakeUnitOfWork:
+    def __init__(self) -> None:
+        self.chatUserRepository = FakeChatUserRepository()
+
+    async def __aenter__(self):
+        return self
+
+    async def __aexit__(self, *args) -> None:
+        pass
+
+    async def commit(self) -> None:
+        pass
+
+
+@pytest.fixture
+async def uow():
+    uow = FakeUnitOfWork()
+    # A long interval, so that flushes only happen when the tests run them.
+    await ReadMarkerBuffer.start(
+        CacheConfig(READ_MARKERS_FLUSH_INTERVAL_SECONDS=3600), uow
+    )
+    yield uow
+    await ReadMarkerBuffer.stop()
+
+
+def marker() -> ChatReadMarkerSchema:
+    return ChatReadMarkerSchema(
+        chat_id=uuid.uuid4(), user_id=uuid.uuid4(), message_id=uuid.uuid4()
+    )
+
+
+async def test_failed_flush_keeps_markers_for_the_next_one(uow):
+    uow.chatUserRepository.failures = 1
+    first = marker()
+    ReadMarkerBuffer.put(first)
+
+    await ReadMarkerBuffer.flush()
+    assert uow.chatUserRepository.written == []
+
+    # Markers put while the batch was failing are merged with it.
+    later = first.model_copy(update={"message_id": uuid.uuid4()})
+    ReadMarkerBuffer.put(later)
+    assert ReadMarkerBuffer.pending == {
+        (first.chat_id, first.user_id): {first.message_id, later.message_id}
+    }
+
+    await ReadMarkerBuffer.flush()
+    assert {m.message_id for m in uow.chatUserRepository.written} == {
+        first.message_id,
+        later.message_id,
+    }
+    assert ReadMarkerBuffer.pending == {}
+
+
+async def test_stop_waits_for_the_flush_in_progress_and_drains(uow):
+    repository = uow.chatUserRepository
+    repository.release = asyncio.Event()
+    in_flight, queued = marker(), marker()
+
+    ReadMarkerBuffer.put(in_flight)
+    ReadMarkerBuffer._full.set()
+    await repository.started.wait()
+    ReadMarkerBuffer.put(queued)
+
+    stopping = asyncio.create_task(ReadMarkerBuffer.stop())
+    await asyncio.sleep(0)
+    assert not stopping.done()
+
+    repository.release.set()
+    await stopping
+    assert [m.message_id for m in repository.written] == [
+        in_flight.message_id,
+        queued.message_id,
+    ]
@@ -0,0 +1,61 @@
+import pytest
+from sqlalchemy import select
+
+from app.db.models import UserModel
+from app.utils.uow import AsyncUnitOfWork
+
+from .conftest import Register
+
+pytestmark = pytest.mark.anyio
+
+
+async def user_count(uow: AsyncUnitOfWork) -> int:
+    async with uow:
+        return len((await uow._async_session.scalars(select(UserModel.id))).all())
+
+
+async def test_scoped_services_share_one_transaction(
+    uow: AsyncUnitOfWork, register: Register
+):
+    before = await user_count(uow)
+    committed: list[str] = []
+
+    async def hook() -> None:
+        committed.append("hook")
+
+    async with uow.scoped():
+        async with uow as first:
+            session = first._async_session
+        await register("alice")
+        async with uow as second:
+            assert second._async_session is session
+            second.on_commit(hook)
+            await second.commit()
+        # Commits inside the scope only flush, and reads share the session.
+        assert committed == []
+        assert uow.read_only() is uow
+        assert await user_count(uow) == before + 1
+
+    assert committed == ["hook"]
+    assert await user_count(uow) == before + 1
+
+
+async def test_scopes_are_rolled_back_on_errors(
+    uow: AsyncUnitOfWork, register: Register
+):
+    before = await user_count(uow)
+    committed: list[str] = []
+
+    async def hook() -> None:
+        committed.append("hook")
+
+    with pytest.raises(RuntimeError):
+        async with uow.scoped():
+            await register("alice")
+            async with uow:
+                uow.on_commit(hook)
+                await uow.commit()
+            raise RuntimeError
+
+    assert committed == []
+    assert await user_count(uow) == before
@@ -0,0 +1,62 @@
+import uuid
+from types import SimpleNamespace
+
+import pytest
+
+from app.core.config import SearchConfig
+from app.schemas import ChatSearchByType, ChatSearchResultSchema, UserIDSchema
+from app.utils.search import UserSearchIndex
+from app.utils.websockets.broker import InProcessBroker
+
+pytestmark = pytest.mark.anyio
+
+ALICE = ChatSearchResultSchema(id=uuid.uuid4(), fullname="Alice", username="@alice")
+BOB = ChatSearchResultSchema(id=uuid.uuid4(), fullname="Bob", username="@bob")
+
+
+class FakeUserRepository:
+    async def get_names(self) -> list[SimpleNamespace]:
+        # Renamed after the rows were read, the rename must win.
+        await UserSearchIndex.put([ALICE.model_copy(update={"fullname": "Alicia"})])
+        return [SimpleNamespace(**user.model_dump()) for user in (ALICE, BOB)]
+
+
+class FakeUnitOfWork:
+    userRepository = FakeUserRepository()
+
+    async def __aenter__(self):
+        return self
+
+    async def __aexit__(self, *args) -> None:
+        pass
+
+
+@pytest.fixture(autouse=True)
+def index_disabled_after():
+    yield
+    UserSearchIndex.ready = False
+    UserSearchIndex.settings = SearchConfig()
+
+
+async def search(contains: str) -> list[str]:
+    page = await UserSearchIndex.search(
+        by=ChatSearchByType("fullname"),
+        contains=contains,
+        skip_id=UserIDSchema(id=uuid.uuid4()),
+        cursor=None,
+        count=20,
+    )
+    return [result.fullname for _, result in page]
+
+
+async def test_updates_received_while_loading_are_applied_after_it():
+    await UserSearchIndex.start(
+        InProcessBroker(), SearchConfig(USER_INDEX_ENABLED=True), FakeUnitOfWork()
+    )
+
+    assert UserSearchIndex.ready
+    assert await search("ali") == ["Alicia"]
+    assert await search("b") == ["Bob"]
+
+    await UserSearchIndex.remove([BOB.id])
+    assert await search("b") == []
@@ -0,0 +1,104 @@
+import pytest
+from sqlalchemy.ext.asyncio import AsyncConnection, AsyncSession
+
+from app.api.v1.commands import MessageCommandHandler
+from app.core.config import WebSocketConfig, config
+from app.schemas import ChatRetrieveSchema
+from app.services import ChatService, MessageService
+from app.utils.uow import AsyncUnitOfWork
+from app.utils.websockets import WebSocketManager
+from app.utils.websockets.broker import InProcessBroker
+
+from .conftest import Register
+from .test_websocket_manager import connect, received
+
+pytestmark = pytest.mark.anyio
+
+
+@pytest.fixture
+async def manager(connection: AsyncConnection):
+    def uow_factory() -> AsyncUnitOfWork:
+        return AsyncUnitOfWork(
+            lambda: AsyncSession(
+                bind=connection, join_transaction_mode="create_savepoint"
+            )
+        )
+
+    WebSocketManager.users = {}
+    WebSocketManager.connections = 0
+    await WebSocketManager.start(
+        InProcessBroker(), WebSocketConfig(HEARTBEAT_INTERVAL_SECONDS=0), uow_factory
+    )
+    yield WebSocketManager
+    await WebSocketManager.stop()
+    WebSocketManager.settings = WebSocketConfig()
+
+
+async def test_commands_are_acked_and_announced(
+    manager, uow: AsyncUnitOfWork, register: Register
+):
+    alice, bob = await register("alice"), await register("bob")
+    chat = await ChatService(config, uow).get_or_create_chat(
+        userIDSchema=alice, retrieveSchema=ChatRetrieveSchema(with_user_id=bob.id)
+    )
+    _, websocket = connect(1, bob.id)
+
+    def handler(user) -> MessageCommandHandler:
+        return MessageCommandHandler(
+            user=user,
+            chat_service=ChatService(config, uow),
+            message_service=MessageService(config, uow),
+        )
+
+    ack = await handler(alice)(
+        {
+            "type": "message/send",
+            "request_id": "1",
+            "message": {"chat_id": str(chat.id), "content": "Hi"},
+        }
+    )
+    assert ack.announcement_type == "ack"
+    assert ack.request_id == "1"
+    [announcement] = await received(websocket)
+    assert announcement["announcement_type"] == "message/put"
+    assert announcement["message"]["id"] == str(ack.message.id)
+
+    # Only the sender may edit a message, others get the HTTP route's error.
+    edit = {
+        "type": "message/edit",
+        "request_id": "2",
+        "message": {"id": str(ack.message.id), "content": "Hi!"},
+    }
+    error = await handler(bob)(edit)
+    assert (error.announcement_type, error.request_id) == ("error", "2")
+    assert error.status_code == 404
+
+    ack = await handler(alice)(edit)
+    assert ack.message.content == "Hi!"
+    [announcement] = await received(websocket)
+    assert announcement["message"]["content"] == "Hi!"
+
+    ack = await handler(alice)(
+        {
+            "type": "message/delete",
+            "request_id": "3",
+            "message": {"id": str(ack.message.id), "chat_id": str(chat.id)},
+        }
+    )
+    assert (ack.announcement_type, ack.request_id) == ("ack", "3")
+    [announcement] = await received(websocket)
+    assert announcement["announcement_type"] == "message/delete"
+
+
+async def test_invalid_commands_get_an_error_frame(manager, uow: AsyncUnitOfWork):
+    handler = MessageCommandHandler(
+        user=None,  # type: ignore[arg-type]
+        chat_service=ChatService(config, uow),
+        message_service=MessageService(config, uow),
+    )
+
+    error = await handler({"type": "message/send", "request_id": "1", "message": {}})
+    assert error.announcement_type == "error"
+    assert error.request_id == "1"
+    assert error.status_code == 422
+    assert "message.chat_id" in error.detail
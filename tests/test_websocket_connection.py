@@ -0,0 +1,134 @@
+import asyncio
+import json
+import uuid
+
+import pytest
+from pydantic import BaseModel
+from starlette.datastructures import Address
+
+from app.core.config import SlowConsumerPolicy
+from app.utils.websockets.codecs import OutboundBatch, OutboundPayload
+from app.utils.websockets.connection import WebSocketConnection
+
+pytestmark = pytest.mark.anyio
+
+
+class Event(BaseModel):
+    n: int
+
+
+class FakeWebSocket:
+    def __init__(self, stalled: bool = False) -> None:
+        self.sent: list[str] = []
+        self.close_code: int | None = None
+        self.stalled = stalled
+
+    async def send_text(self, data: str) -> None:
+        if self.stalled:
+            await asyncio.Event().wait()
+        self.sent.append(data)
+
+    async def close(self, code: int) -> None:
+        self.close_code = code
+
+
+def connection(
+    websocket: FakeWebSocket,
+    policy: SlowConsumerPolicy = "drop_oldest",
+    max_queue_size: int = 2,
+    **kwargs,
+) -> WebSocketConnection:
+    return WebSocketConnection(
+        user_id=uuid.uuid4(),
+        client=Address("127.0.0.1", 1),
+        websocket=websocket,  # type: ignore[arg-type]
+        max_queue_size=max_queue_size,
+        policy=policy,
+        **kwargs,
+    )
+
+
+def enqueue(connection: WebSocketConnection, key: str, n: int) -> bool:
+    return connection.enqueue(OutboundPayload(key, Event(n=n)))
+
+
+async def drain(connection: WebSocketConnection, websocket: FakeWebSocket) -> list:
+    connection.start()
+    await asyncio.sleep(0.01)
+    connection.stop()
+    return [json.loads(frame) for frame in websocket.sent]
+
+
+async def test_drop_oldest_keeps_the_latest_frames():
+    websocket = FakeWebSocket()
+    conn = connection(websocket)
+    for n in range(3):
+        assert enqueue(conn, f"event:{n}", n)
+
+    assert conn.stats().max_queue_depth == 2
+    assert await drain(conn, websocket) == [{"n": 1}, {"n": 2}]
+    assert conn.dropped == 1
+
+
+async def test_coalesce_replaces_queued_frames_of_the_same_key():
+    websocket = FakeWebSocket()
+    conn = connection(websocket, policy="coalesce")
+    enqueue(conn, "message:a", 1)
+    enqueue(conn, "message:b", 2)
+
+    # Updates of a queued message replace it in place, others drop the oldest.
+    assert not enqueue(conn, "message:a", 3)
+    assert enqueue(conn, "message:c", 4)
+
+    assert await drain(conn, websocket) == [{"n": 2}, {"n": 4}]
+    assert (conn.coalesced, conn.dropped) == (1, 1)
+
+
+async def test_disconnect_closes_clients_that_fall_behind():
+    websocket = FakeWebSocket(stalled=True)
+    conn = connection(websocket, policy="disconnect", max_queue_size=1)
+    conn.start()
+    assert enqueue(conn, "event:1", 1)
+    await asyncio.sleep(0)
+
+    # The first frame is being sent, the next one fills the queue.
+    assert enqueue(conn, "event:2", 2)
+    assert not enqueue(conn, "event:3", 3)
+    await asyncio.sleep(0)
+
+    assert conn.closed
+    assert websocket.close_code == 1008
+    assert not enqueue(conn, "event:3", 3)
+
+
+async def test_stalled_sends_time_out():
+    websocket = FakeWebSocket(stalled=True)
+    conn = connection(websocket, send_timeout=0.01)
+    enqueue(conn, "event:1", 1)
+    conn.start()
+    await asyncio.sleep(0.05)
+
+    assert conn.closed
+    assert websocket.sent == []
+    conn.stop()
+
+
+async def test_coalescing_window_merges_frames_into_one_array():
+    websocket = FakeWebSocket()
+    conn = connection(websocket, max_queue_size=16, coalesce_window=0.01)
+    conn.start()
+    enqueue(conn, "message:a", 1)
+    conn.enqueue(
+        OutboundBatch(
+            [OutboundPayload("message:b", Event(n=2)), OutboundPayload("c", Event(n=3))]
+        )
+    )
+    # Repeated edits of a message collapse into the latest one, in place.
+    enqueue(conn, "message:a", 4)
+    await asyncio.sleep(0.05)
+    conn.stop()
+
+    assert [json.loads(frame) for frame in websocket.sent] == [
+        [{"n": 4}, {"n": 2}, {"n": 3}]
+    ]
+    assert (conn.sent, conn.coalesced) == (1, 1)
@@ -0,0 +1,270 @@
+import asyncio
+import json
+import time
+import uuid
+from collections.abc import Callable
+
+import pytest
+from sqlalchemy.ext.asyncio import AsyncConnection, AsyncSession
+from starlette.datastructures import Address
+
+from app.core.config import WebSocketConfig
+from app.schemas import (
+    AnnouncementEnvelopeSchema,
+    MessageDeleteAnnouncementSchema,
+    MessageDeleteSchema,
+    UserIDSchema,
+    WebSocketResumeSchema,
+)
+from app.utils.uow import AsyncUnitOfWork
+from app.utils.websockets import WebSocketManager
+from app.utils.websockets.broker import InProcessBroker
+from app.utils.websockets.connection import WebSocketConnection
+
+pytestmark = pytest.mark.anyio
+
+
+class FakeWebSocket:
+    def __init__(self) -> None:
+        self.sent: list[str | bytes] = []
+        self.close_code: int | None = None
+
+    async def send_text(self, data: str) -> None:
+        self.sent.append(data)
+
+    async def send_bytes(self, data: bytes) -> None:
+        self.sent.append(data)
+
+    async def close(self, code: int) -> None:
+        self.close_code = code
+
+
+@pytest.fixture(autouse=True)
+def manager():
+    WebSocketManager.users = {}
+    WebSocketManager.connections = 0
+    WebSocketManager.reaped_idle = WebSocketManager.reaped_stalled = 0
+    yield WebSocketManager
+    WebSocketManager.settings = WebSocketConfig()
+
+
+def connect(
+    port: int = 1, user_id: uuid.UUID | None = None
+) -> tuple[WebSocketConnection, FakeWebSocket]:
+    websocket = FakeWebSocket()
+    client = Address("127.0.0.1", port)
+    connection = WebSocketConnection(
+        user_id=user_id or uuid.uuid4(),
+        client=client,
+        websocket=websocket,  # type: ignore[arg-type]
+        max_queue_size=16,
+        policy="drop_oldest",
+    )
+    connection.start()
+    WebSocketManager.users[connection.user_id] = {client: connection}
+    WebSocketManager.connections += 1
+    return connection, websocket
+
+
+async def test_reap_pings_listen_only_clients_by_default():
+    connection, websocket = connect()
+    connection.last_seen = time.monotonic() - 3600
+
+    await WebSocketManager.reap()
+    await asyncio.sleep(0)
+
+    assert WebSocketManager.connections == 1
+    assert websocket.close_code is None
+    assert [json.loads(frame) for frame in websocket.sent] == [
+        {"announcement_type": "ping"}
+    ]
+
+
+async def test_reap_closes_idle_clients_with_a_timeout():
+    WebSocketManager.settings = WebSocketConfig(IDLE_TIMEOUT_SECONDS=60)
+    idle, idle_websocket = connect(1)
+    idle.last_seen = time.monotonic() - 61
+    _, active_websocket = connect(2)
+
+    await WebSocketManager.reap()
+
+    assert WebSocketManager.reaped_idle == 1
+    assert idle_websocket.close_code == 1001
+    assert active_websocket.close_code is None
+    assert WebSocketManager.connections == 1
+
+
+async def test_reap_closes_stalled_clients():
+    connection, websocket = connect()
+    connection.closed = True
+
+    await WebSocketManager.reap()
+
+    assert WebSocketManager.reaped_stalled == 1
+    assert websocket.close_code == 1001
+    assert WebSocketManager.users == {}
+
+
+async def received(websocket: FakeWebSocket) -> list[dict]:
+    await asyncio.sleep(0)
+    frames, websocket.sent = websocket.sent, []
+    return [json.loads(frame) for frame in frames]
+
+
+@pytest.fixture
+def uow_factory(connection: AsyncConnection) -> Callable[[], AsyncUnitOfWork]:
+    def factory() -> AsyncUnitOfWork:
+        factory.calls += 1
+        return AsyncUnitOfWork(
+            lambda: AsyncSession(
+                bind=connection, join_transaction_mode="create_savepoint"
+            )
+        )
+
+    factory.calls = 0
+    return factory
+
+
+async def start(uow_factory: Callable[[], AsyncUnitOfWork]) -> None:
+    await WebSocketManager.start(
+        InProcessBroker(),
+        WebSocketConfig(HEARTBEAT_INTERVAL_SECONDS=0, EVENT_ID_BLOCK_SIZE=10),
+        uow_factory,
+    )
+
+
+def delete_announcement() -> MessageDeleteAnnouncementSchema:
+    return MessageDeleteAnnouncementSchema(
+        message=MessageDeleteSchema(id=uuid.uuid4(), chat_id=uuid.uuid4())
+    )
+
+
+def resume(last_event_id: int) -> WebSocketResumeSchema:
+    return WebSocketResumeSchema(
+        stream=WebSocketManager.stream, last_event_id=last_event_id
+    )
+
+
+async def test_resume_replays_missed_events(uow_factory):
+    await start(uow_factory)
+    listener, websocket = connect()
+    user = UserIDSchema(id=listener.user_id)
+
+    # Nothing was delivered before the client connected to this worker.
+    WebSocketManager.resume(user, listener, resume(0))
+    assert [frame["resync"] for frame in await received(websocket)] == [False]
+
+    await WebSocketManager.announce(users=[user], model=delete_announcement())
+    await WebSocketManager.announce(users=[user], model=delete_announcement())
+    first, second = await received(websocket)
+    assert second["event_id"] == first["event_id"] + 1
+
+    reconnected, websocket = connect(2, user.id)
+    WebSocketManager.resume(user, reconnected, resume(first["event_id"]))
+    session, replayed = await received(websocket)
+    assert session == {
+        "announcement_type": "session",
+        "stream": WebSocketManager.stream,
+        "event_id": second["event_id"],
+        "resync": False,
+    }
+    assert replayed == second
+
+    # A restarted worker shares the stream, but not the events it delivered.
+    await WebSocketManager.stop()
+    await start(uow_factory)
+    stream = WebSocketManager.stream
+    WebSocketManager.resume(user, reconnected, resume(second["event_id"]))
+    [session] = await received(websocket)
+    assert session["stream"] == stream
+    assert session["resync"] is True
+    await WebSocketManager.stop()
+
+
+async def test_resume_follows_delivery_order_of_interleaved_publishers(
+    uow_factory,
+):
+    await start(uow_factory)
+    listener, websocket = connect()
+    user = UserIDSchema(id=listener.user_id)
+
+    await WebSocketManager.announce(users=[user], model=delete_announcement())
+    [first] = await received(websocket)
+    assert uow_factory.calls == 2
+
+    # Another worker publishes from the block it reserved after this one.
+    async with uow_factory() as uow:
+        [other_id, *_] = await uow.messageRepository.next_event_ids(10)
+    assert other_id > first["event_id"]
+    envelope = AnnouncementEnvelopeSchema(
+        users=[user.id],
+        announcements=[delete_announcement().model_copy(update={"event_id": other_id})],
+    )
+    await WebSocketManager.broker.publish(
+        WebSocketManager.settings.BROKER_CHANNEL, envelope.model_dump_json()
+    )
+    [other] = await received(websocket)
+    assert other["event_id"] == other_id
+
+    # This worker then publishes a smaller id, without reserving new ones,
+    # while the client reconnects.
+    WebSocketManager.close_client(user, listener.client)
+    calls = uow_factory.calls
+    await WebSocketManager.announce(users=[user], model=delete_announcement())
+    assert uow_factory.calls == calls
+
+    reconnected, websocket = connect(2, user.id)
+    WebSocketManager.resume(user, reconnected, resume(other_id))
+    session, replayed = await received(websocket)
+    assert session["resync"] is False
+    assert replayed["event_id"] == first["event_id"] + 1
+    assert session["event_id"] == replayed["event_id"]
+    await WebSocketManager.stop()
+
+
+class AcceptingWebSocket(FakeWebSocket):
+    def __init__(self, port: int) -> None:
+        super().__init__()
+        self.client = Address("127.0.0.1", port)
+        self.scope: dict = {"subprotocols": []}
+
+    async def accept(self, subprotocol: str | None = None) -> None:
+        pass
+
+
+async def test_registry_counts_users_and_connections():
+    alice, bob = UserIDSchema(id=uuid.uuid4()), UserIDSchema(id=uuid.uuid4())
+    for user, port in ((alice, 1), (alice, 2), (bob, 3)):
+        await WebSocketManager.accept_client(user, AcceptingWebSocket(port))  # type: ignore[arg-type]
+
+    stats = WebSocketManager.registry_stats()
+    assert (stats.users, stats.connections) == (2, 3)
+    assert WebSocketManager.client_count(alice) == 2
+
+    WebSocketManager.close_client(alice, Address("127.0.0.1", 1))
+    assert WebSocketManager.client_count(alice) == 1
+    await WebSocketManager.close_user(bob)
+    WebSocketManager.close_client(alice, Address("127.0.0.1", 2))
+
+    stats = WebSocketManager.registry_stats()
+    assert (stats.users, stats.connections) == (0, 0)
+    assert WebSocketManager.users == {}
+
+
+async def test_batches_are_announced_in_one_frame(uow_factory):
+    await start(uow_factory)
+    listener, websocket = connect()
+    user = UserIDSchema(id=listener.user_id)
+
+    models = [delete_announcement() for _ in range(3)]
+    await WebSocketManager.announce_many(users=[user], models=models)
+    await asyncio.sleep(0)
+
+    [frame] = websocket.sent
+    events = json.loads(frame)
+    assert [event["message"]["id"] for event in events] == [
+        str(model.message.id) for model in models
+    ]
+    # Each announcement still gets its own event id.
+    assert len({event["event_id"] for event in events}) == 3
+    await WebSocketManager.stop()